@@ -0,0 +1,81 @@
+"""add_hot_path_partial_indexes
+
+Revision ID: 25335a7fc516
+Revises: 1e22211c0b09
+Create Date: 2026-10-18 10:12:41.519203
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "25335a7fc516"
+down_revision: str | Sequence[str] | None = "1e22211c0b09"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# 論理削除されていない行だけを対象にした部分インデックスの条件
+ACTIVE_ROWS = sa.text("deleted_at IS NULL")
+
+# (インデックス名, テーブル名, カラム, 部分インデックスかどうか)
+INDEXES = [
+    # list_projects: owner_id + 未削除, id順
+    ("ix_project_owner_active", "project", ["owner_id", "id"], True),
+    # list_sprints: project_id + 未削除
+    ("ix_sprint_project_active", "sprint", ["project_id", "id"], True),
+    # list_tasks: project_id + 未削除, id順（キーセットページネーション）
+    ("ix_task_project_active", "task", ["project_id", "id"], True),
+    # list_tasks?sort=priority: priority DESC, id ASC
+    (
+        "ix_task_project_active_priority",
+        "task",
+        ["project_id", sa.text("priority DESC"), "id"],
+        True,
+    ),
+    # list_tasks?status=...
+    ("ix_task_project_active_status", "task", ["project_id", "status", "id"], True),
+    # list_tasks?sprint_id=...
+    (
+        "ix_task_project_active_sprint",
+        "task",
+        ["project_id", "sprint_id", "id"],
+        True,
+    ),
+    # ON DELETE CASCADE（project削除時のtaskの検索）用にだけ残す
+    ("ix_task_project_id", "task", ["project_id"], False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 稼働中のテーブルをロックしないよう CONCURRENTLY で作成する
+    # （トランザクション外で実行する必要がある）
+    with op.get_context().autocommit_block():
+        for name, table, columns, partial in INDEXES:
+            where = ACTIVE_ROWS if partial else None
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_where=where,
+                sqlite_where=where,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,90 @@
+"""add_archived_record_and_purge_indexes
+
+Revision ID: 4c7e2a91d3b6
+Revises: 25335a7fc516
+Create Date: 2026-10-18 16:40:12.318204
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4c7e2a91d3b6"
+down_revision: str | Sequence[str] | None = "25335a7fc516"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# 論理削除された行だけを対象にした部分インデックスの条件
+DELETED_ROWS = sa.text("deleted_at IS NOT NULL")
+
+# (インデックス名, テーブル名, カラム, 部分インデックスかどうか)
+INDEXES = [
+    # 保持期間を過ぎた論理削除行の削除
+    ("ix_user_deleted_at", "user", ["deleted_at"], True),
+    ("ix_project_deleted_at", "project", ["deleted_at"], True),
+    ("ix_sprint_deleted_at", "sprint", ["deleted_at"], True),
+    ("ix_task_deleted_at", "task", ["deleted_at"], True),
+    # スプリント削除時の参照確認
+    ("ix_task_sprint_id", "task", ["sprint_id"], False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "archived_record",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("source_table", sa.String(), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_archived_record_source",
+        "archived_record",
+        ["source_table", "record_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_archived_record_archived_at"),
+        "archived_record",
+        ["archived_at"],
+        unique=False,
+    )
+
+    # 稼働中のテーブルをロックしないよう CONCURRENTLY で作成する
+    # （トランザクション外で実行する必要がある）
+    with op.get_context().autocommit_block():
+        for name, table, columns, partial in INDEXES:
+            where = DELETED_ROWS if partial else None
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_where=where,
+                sqlite_where=where,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_index(op.f("ix_archived_record_archived_at"), table_name="archived_record")
+    op.drop_index("ix_archived_record_source", table_name="archived_record")
+    op.drop_table("archived_record")
@@ -0,0 +1,43 @@
+"""add_task_project_updated_index
+
+Revision ID: b91f3d7c2e84
+Revises: 4c7e2a91d3b6
+Create Date: 2026-10-18 18:05:47.902113
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b91f3d7c2e84"
+down_revision: str | Sequence[str] | None = "4c7e2a91d3b6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # list_task_changes: 更新日時順（論理削除行も含む）
+    # 稼働中のテーブルをロックしないよう CONCURRENTLY で作成する
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_task_project_updated",
+            "task",
+            ["project_id", "updated_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_task_project_updated",
+            table_name="task",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
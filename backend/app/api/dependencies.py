@@ -2,17 +2,76 @@ from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.config import settings
 from app.core.security import decode_access_token
-from app.db.session import get_session
+from app.db.session import get_async_session, get_session
 from app.models import Project, User
+from app.utils.ttl_cache import TTLCache
 
 # Reexport for convenience
 SessionDep = Annotated[Session, Depends(get_session)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
 
 _bearer_scheme = HTTPBearer()
 
+# 認証ユーザー行の短期キャッシュ（user_id -> カラム値）
+# プロセスごとのキャッシュのため、無効化は変更したワーカーにしか届かない。他のワーカーでは
+# 最大 USER_CACHE_TTL_SECONDS 秒まで古い値が残るため、権限の判定（require_admin）には
+# キャッシュの値を使わず、ロールを毎回DBから読み直す（ポイントの表示も同様）。
+_user_cache: TTLCache[int, dict] = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+# キャッシュしないカラム（復元したユーザーでは未ロードの属性になる）
+_UNCACHED_FIELDS = {"password_hash"}
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """ユーザー行のキャッシュを破棄（ロール・ポイント変更のコミット後に呼ぶ）"""
+    _user_cache.pop(user_id)
+
+
+def invalidate_cached_user_after_commit(session: Session, user_id: int) -> None:
+    """
+    同期セッションのコミット後にユーザー行のキャッシュを破棄する
+
+    コミット前に破棄すると、コミットまでの間に別のリクエストが変更前の行を
+    キャッシュし直してしまうため、コミットを待ってから破棄する。
+    """
+
+    @event.listens_for(session, "after_commit", once=True)
+    def _invalidate(_session: Session) -> None:
+        invalidate_cached_user(user_id)
+
+
+def clear_user_cache() -> None:
+    """ユーザー行のキャッシュを全て破棄（テスト用）"""
+    _user_cache.clear()
+
+
+async def _load_user(session: AsyncSession, user_id: int) -> User | None:
+    """
+    キャッシュがあればDBに問い合わせずにユーザーをセッションへ取り込む
+
+    キャッシュから復元したオブジェクトは merge(load=False) で永続状態として扱うため、
+    ルーター側で変更・コミットしても通常どおりUPDATEされる。
+    """
+    cached = _user_cache.get(user_id)
+    if cached is not None:
+        user = User(**cached)
+        make_transient_to_detached(user)
+        return await session.merge(user, load=False)
+
+    loaded = await session.get(User, user_id)
+    if loaded is not None:
+        _user_cache.set(user_id, loaded.model_dump(exclude=_UNCACHED_FIELDS))
+    return loaded
+
 
 def get_current_user_id(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(_bearer_scheme)],
@@ -36,9 +95,9 @@ def get_current_user_id(
 CurrentUserIdDep = Annotated[int, Depends(get_current_user_id)]
 
 
-def get_current_user(
+async def get_current_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(_bearer_scheme)],
-    session: SessionDep,
+    session: AsyncSessionDep,
 ) -> User:
     """
     JWTトークンを検証し、ユーザーオブジェクトを返す。
@@ -53,7 +112,7 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     user_id = int(payload["sub"])
-    user = session.get(User, user_id)
+    user = await _load_user(session, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,11 +125,13 @@ def get_current_user(
 CurrentUserDep = Annotated[User, Depends(get_current_user)]
 
 
-def require_admin(user: CurrentUserDep) -> User:
+async def require_admin(user: CurrentUserDep, session: AsyncSessionDep) -> User:
     """
     管理者権限チェック用の依存関係。
     ユーザーが管理者でない場合は403エラーを返す。
+    ロールは他のワーカーで変更されている場合があるため、キャッシュではなくDBから読み直す。
     """
+    await session.refresh(user, attribute_names=["role"])
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -96,3 +157,21 @@ def verify_project_access(project_id: int, user: User, session: Session) -> Proj
             status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
         )
     return project
+
+
+async def verify_project_access_async(
+    project_id: int, user: User, session: AsyncSession
+) -> Project:
+    """
+    プロジェクトへのアクセス権限を確認（非同期セッション版）
+    """
+    project = await session.get(Project, project_id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
+        )
+    if project.owner_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
+    return project
@@ -21,6 +21,7 @@ async def taskforge_exception_handler(request: Request, exc: TaskForgeException)
                 "status_code": exc.status_code,
             }
         },
+        headers=exc.headers,
     )
 
 
@@ -1,9 +1,19 @@
 from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import select
 
-from app.api.dependencies import AdminDep, SessionDep
-from app.api.schemas import ProjectResponse, UserResponse
+from app.api.dependencies import AdminDep, SessionDep, invalidate_cached_user
+from app.api.schemas import (
+    AIQueueStatsResponse,
+    PasswordHasherStatsResponse,
+    PoolStatsResponse,
+    ProjectResponse,
+    UserResponse,
+)
+from app.core.password_hasher import password_hasher
+from app.db.session import get_pool_stats
 from app.models import Project, User
+from app.tasks.queues import QUEUES, queue_depths, wait_stats
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -32,6 +42,53 @@ def list_all_projects(
     return projects
 
 
+@router.get("/db-pool", response_model=list[PoolStatsResponse])
+def get_db_pool_stats(
+    admin_user: AdminDep,
+) -> list[dict]:
+    """
+    管理者用：DBコネクションプールの統計を取得
+    チェックアウト待ち時間・待機回数・オーバーフロー使用量からプールサイズを調整する
+    """
+    return get_pool_stats()
+
+
+@router.get("/password-hasher", response_model=PasswordHasherStatsResponse)
+def get_password_hasher_stats(
+    admin_user: AdminDep,
+) -> dict:
+    """
+    管理者用：パスワードハッシュ用エグゼキューターの統計を取得
+    待ち行列の深さ・待ち時間・拒否件数からワーカー数と上限を調整する
+    """
+    return password_hasher.snapshot()
+
+
+@router.get("/ai-queues", response_model=list[AIQueueStatsResponse])
+async def get_ai_queue_stats(
+    admin_user: AdminDep,
+) -> list[AIQueueStatsResponse]:
+    """
+    管理者用：AIワーカーのキュー統計を取得
+    待機中のジョブ数と投入から実行開始までの待ち時間からワーカー数を調整する
+    """
+    depths = await run_in_threadpool(queue_depths)
+    stats = []
+    for queue in QUEUES:
+        wait = await wait_stats(queue)
+        stats.append(
+            AIQueueStatsResponse(
+                queue=queue,
+                depth=depths.get(queue) if depths is not None else None,
+                wait_samples=wait["samples"],
+                wait_ms_p50=wait["p50_ms"],
+                wait_ms_p95=wait["p95_ms"],
+                wait_ms_max=wait["max_ms"],
+            )
+        )
+    return stats
+
+
 @router.post("/users/{user_id}/make-admin")
 def make_user_admin(
     user_id: int,
@@ -49,6 +106,7 @@ def make_user_admin(
     session.add(user)
     session.commit()
     session.refresh(user)
+    invalidate_cached_user(user_id)
 
     return {"detail": f"User {user.email} promoted to admin"}
 
@@ -74,5 +132,6 @@ def revoke_user_admin(
     session.add(user)
     session.commit()
     session.refresh(user)
+    invalidate_cached_user(user_id)
 
     return {"detail": f"User {user.email} admin privileges revoked"}
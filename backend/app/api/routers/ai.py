@@ -3,20 +3,60 @@ AI連携APIルーター
 Celeryによる非同期処理を使用
 """
 
-from fastapi import APIRouter, HTTPException, status
+import json
+import time
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from redis.exceptions import RedisError
 
-from app.api.dependencies import CurrentUserDep, SessionDep, verify_project_access
+from app.api.dependencies import (
+    AsyncSessionDep,
+    CurrentUserDep,
+    verify_project_access_async,
+)
 from app.api.schemas import (
     AIDecompositionItem,
     AIDecompositionRequest,
     AIDecompositionResponse,
 )
-from app.models import Sprint, Task
+from app.core.config import settings
+from app.core.exceptions import RateLimitExceededException
+from app.core.redis import get_redis_client
+from app.middleware.rate_limit import RateLimit
+from app.services.ai_admission import (
+    Admission,
+    JobKeys,
+    admit,
+    job_keys,
+    release,
+    seconds_until_budget_reset,
+)
+from app.services.ai_persistence import save_decomposition_async
+from app.services.ai_progress import (
+    TERMINAL_EVENTS,
+    channel_name,
+    get_events,
+    get_job_owner,
+    parse_message,
+    record_job_owner,
+)
 from app.tasks.ai_tasks import decompose_tasks_async, get_task_status
+from app.tasks.queues import fair_priority, queue_for
+from app.utils.cache_version import bump_version
 
 router = APIRouter(tags=["ai"])
 
+# LLMを呼び出すエンドポイント（非同期・同期）で上限を共有する
+decompose_rate_limit = RateLimit("ai:decompose", settings.RATE_LIMIT_AI_DECOMPOSE)
+
+# 同時実行数の上限で受付を断った場合に再試行を促すまでの秒数
+AI_JOB_RETRY_AFTER_SECONDS = 30
+
 
 class AIDecompositionJobResponse(BaseModel):
     """AI分解ジョブ作成応答"""
@@ -36,30 +76,98 @@ class AIDecompositionStatusResponse(BaseModel):
     meta: dict | None = Field(None, description="メタ情報")
 
 
+async def _admit(keys: JobKeys) -> Admission:
+    """
+    AIジョブを受け付ける
+
+    ユーザー・プロジェクトごとの同時実行数、ユーザーごとの1日のトークン予算を
+    超える場合は429を返す。
+
+    Raises:
+        RateLimitExceededException: 受け付けられない場合
+    """
+    admission = await admit(keys)
+    if admission.status == "budget":
+        raise RateLimitExceededException(
+            retry_after=seconds_until_budget_reset(),
+            message="Daily AI token budget exceeded",
+        )
+    if not admission.accepted:
+        raise RateLimitExceededException(
+            retry_after=AI_JOB_RETRY_AFTER_SECONDS,
+            message="Too many AI jobs in progress",
+        )
+    return admission
+
+
 @router.post(
     "/projects/{project_id}/ai/decompose",
     response_model=AIDecompositionJobResponse,
     status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(decompose_rate_limit)],
 )
-def start_decomposition(
+async def start_decomposition(
     project_id: int,
     body: AIDecompositionRequest,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """
     AIタスク分解を非同期で開始
     ジョブIDを返し、クライアントはポーリングまたはWebhookで結果を確認
 
+    同じプロジェクトで同じ要件のジョブが実行中の場合は、そのジョブIDを返す。
+    ユーザー・プロジェクトごとの同時実行数、ユーザーごとの1日のトークン予算を
+    超える場合は429を返す。
+
+    background=true の場合はバックグラウンド用のキューに入れる。同じプロジェクトで
+    実行中のジョブが多いほど優先度を下げ、他のプロジェクトのジョブを先に処理する。
+
     処理時間: 通常10-30秒
     """
     # プロジェクトへのアクセス権限を確認
-    verify_project_access(project_id, current_user, session)
+    await verify_project_access_async(project_id, current_user, session)
 
-    # Celeryタスクを開始
-    task = decompose_tasks_async.delay(
-        project_id=project_id, user_requirement=body.prompt, sprint_id=body.sprint_id
+    budget_day = datetime.now(UTC).strftime("%Y%m%d")
+    keys = job_keys(
+        current_user.id,  # type: ignore[arg-type]
+        project_id,
+        body.prompt,
+        body.sprint_id,
+        budget_day,
     )
+    admission = await _admit(keys)
+    if admission.status == "duplicate":
+        return AIDecompositionJobResponse(
+            job_id=admission.job_id,  # type: ignore[arg-type]
+            status="queued",
+            message="同じ内容のAIタスク分解が実行中です。既存のジョブIDでステータスを確認してください。",
+        )
+
+    # Celeryタスクを開始（受付時に決めたジョブIDを使う）
+    queue = queue_for(body.background)
+    try:
+        if admission.job_id:
+            # 進捗の購読を本人に限るため、ジョブを投入する前に記録する
+            await record_job_owner(admission.job_id, current_user.id)  # type: ignore[arg-type]
+        task = decompose_tasks_async.apply_async(
+            kwargs={
+                "project_id": project_id,
+                "user_requirement": body.prompt,
+                "sprint_id": body.sprint_id,
+                "user_id": current_user.id,
+                "budget_day": budget_day,
+                "queue": queue,
+                "enqueued_at": time.time(),
+            },
+            task_id=admission.job_id,
+            queue=queue,
+            priority=fair_priority(admission.project_in_flight),
+        )
+    except Exception:
+        if admission.job_id:
+            await release(keys, admission.job_id, tokens_used=0)
+        raise
 
     return AIDecompositionJobResponse(
         job_id=task.id,
@@ -87,31 +195,153 @@ def get_decomposition_status(
     )
 
 
+# 購読中に新しいイベントがない場合にコメント行を送る間隔（プロキシのタイムアウト対策）
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+def _sse(seq: int | None, event: str, data: dict) -> str:
+    """SSEのイベント1件を整形"""
+    lines = [] if seq is None else [f"id: {seq}"]
+    lines += [f"event: {event}", f"data: {json.dumps(data, ensure_ascii=False)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def _final_event(status_info: dict) -> tuple[str, dict] | None:
+    """進捗イベントが残っていない終了済みジョブの結果を終了イベントにする"""
+    if status_info["status"] == "SUCCESS":
+        result = status_info.get("result") or {}
+        if result.get("status") == "completed":
+            return "completed", result
+        return "failed", {"error": result.get("error")}
+    if status_info["status"] == "FAILURE":
+        return "failed", {"error": status_info.get("error")}
+    return None
+
+
+@router.get("/ai/jobs/{job_id}/events")
+async def stream_decomposition_events(
+    job_id: str,
+    request: Request,
+    current_user: CurrentUserDep,
+    last_event_id: int = Header(0, alias="Last-Event-ID"),
+) -> StreamingResponse:
+    """
+    AIタスク分解ジョブの進捗をServer-Sent Eventsで配信
+
+    段階ごとの完了時に epics / epic_tasks / tasks / sprints イベントを送り、
+    ジョブの終了時に completed または failed を送ってストリームを閉じる。
+    接続前に配信済みのイベントも先に送るため、再接続時は Last-Event-ID 以降から再開できる。
+    ジョブを受け付けたユーザー以外には（ジョブの有無を明かさないよう）404を返す。
+    """
+    client = get_redis_client()
+    if client is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Progress streaming is unavailable",
+        )
+    try:
+        owner = await get_job_owner(job_id)
+    except RedisError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Progress streaming is unavailable",
+        ) from e
+    if owner != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+
+    async def stream() -> AsyncIterator[str]:
+        pubsub = client.pubsub()
+        # 購読を先に始めてから履歴を読み、その間に配信されたイベントを取りこぼさない
+        await pubsub.subscribe(channel_name(job_id))
+        try:
+            last = last_event_id
+            for seq, event in await get_events(job_id, after=last):
+                last = seq
+                yield _sse(seq, event["event"], event["data"])
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+
+            # 進捗イベントの履歴がない終了済みジョブ（期限切れなど）は結果だけ返す
+            final = _final_event(await run_in_threadpool(get_task_status, job_id))
+            if final is not None:
+                yield _sse(None, *final)
+                return
+
+            while not await request.is_disconnected():
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=SSE_KEEPALIVE_SECONDS
+                )
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                seq, event = parse_message(message["data"])
+                if seq <= last:
+                    continue
+                last = seq
+                yield _sse(seq, event["event"], event["data"])
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+        except RedisError as e:
+            yield _sse(None, "error", {"error": f"Progress stream interrupted: {e}"})
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # 後方互換性のための同期エンドポイント（非推奨）
 @router.post(
     "/projects/{project_id}/ai/decompose-sync",
     response_model=AIDecompositionResponse,
     deprecated=True,
     summary="同期処理（非推奨）",
+    dependencies=[Depends(decompose_rate_limit)],
 )
 async def decompose_tasks_sync(
     project_id: int,
     body: AIDecompositionRequest,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """
     【非推奨】AIワークフローを同期的に実行
     処理に時間がかかるため、非同期エンドポイントの使用を推奨
+
+    LLMの応答待ちの間もイベントループを塞がないよう、DBアクセスも非同期セッションで行う
+    非同期エンドポイントと同じく、同時実行数・トークン予算を超える場合は429を返す
     """
     from app.services.ai_service import run_ai_decomposition
 
     # プロジェクトへのアクセス権限を確認
-    verify_project_access(project_id, current_user, session)
+    await verify_project_access_async(project_id, current_user, session)
 
+    # 非同期エンドポイントと同じ同時実行数・トークン予算で受け付ける
+    keys = job_keys(
+        current_user.id,  # type: ignore[arg-type]
+        project_id,
+        body.prompt,
+        body.sprint_id,
+        datetime.now(UTC).strftime("%Y%m%d"),
+    )
+    admission = await _admit(keys)
+    if admission.status == "duplicate":
+        raise RateLimitExceededException(
+            retry_after=AI_JOB_RETRY_AFTER_SECONDS,
+            message="An identical AI decomposition is already in progress",
+        )
+
+    tokens_used = None
     try:
         # AIワークフロー実行
         result = await run_ai_decomposition(body.prompt)
+        tokens_used = result.get("token_usage")
 
         if result["error"]:
             raise HTTPException(
@@ -119,43 +349,14 @@ async def decompose_tasks_sync(
                 detail=f"AI decomposition failed: {result['error']}",
             )
 
-        # スプリントを作成（存在しない場合）
-        sprint_map = {}
-        for sprint_data in result["sprints"]:
-            sprint = Sprint(
-                project_id=project_id,
-                name=sprint_data["name"],
-            )
-            session.add(sprint)
-            session.flush()
-            sprint_map[sprint_data["name"]] = sprint.id
-
-        # タスクを作成
-        for idx, task_data in enumerate(result["tasks"]):
-            # スプリントIDを決定
-            task_sprint_id = body.sprint_id
-            if not task_sprint_id:
-                for sprint_data in result["sprints"]:
-                    if idx in sprint_data.get("tasks", []):
-                        task_sprint_id = sprint_map.get(sprint_data["name"])
-                        break
-
-            task = Task(
-                project_id=project_id,
-                sprint_id=task_sprint_id,
-                title=task_data.get("title", ""),
-                description=task_data.get("description", ""),
-                priority=task_data.get("priority", 2),
-                estimate=task_data.get("estimate", 8.0),
-                status="todo",
-            )
-            session.add(task)
-
+        # スプリント・タスクを一括で作成
         try:
-            session.commit()
+            await save_decomposition_async(session, project_id, result, body.sprint_id)
+            await session.commit()
         except Exception:
-            session.rollback()
+            await session.rollback()
             raise
+        await bump_version("project", project_id)
 
         return AIDecompositionResponse(
             tasks=[
@@ -177,3 +378,7 @@ async def decompose_tasks_sync(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"AI decomposition failed: {str(e)}",
         )
+    finally:
+        if admission.job_id:
+            # 同時実行枠を解放し、予約したトークン数を実際の消費量で精算する
+            await release(keys, admission.job_id, tokens_used=tokens_used)
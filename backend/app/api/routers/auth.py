@@ -1,37 +1,43 @@
-from fastapi import APIRouter, HTTPException, Request, status
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import select
 
-from app.api.dependencies import SessionDep
+from app.api.dependencies import AsyncSessionDep
 from app.api.schemas import LoginRequest, RegisterRequest, TokenResponse
-from app.core.security import create_access_token, hash_password, verify_password
+from app.core.config import settings
+from app.core.password_hasher import hash_password_async, verify_password_async
+from app.core.security import create_access_token
+from app.middleware.rate_limit import RateLimit
 from app.models import User
 
 router = APIRouter(prefix="/auth", tags=["auth"])
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.post(
-    "/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED
+    "/register",
+    response_model=TokenResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RateLimit("auth:register", settings.RATE_LIMIT_REGISTER))],
 )
-@limiter.limit("5/minute")
-def register(request: Request, body: RegisterRequest, session: SessionDep):
+async def register(body: RegisterRequest, session: AsyncSessionDep):
     """ユーザー登録エンドポイント（レート制限：5回/分）"""
     # 重複チェック
-    existing = session.exec(select(User).where(User.email == body.email)).first()
+    existing = (
+        await session.exec(select(User).where(User.email == body.email))
+    ).first()
     if existing:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already registered",
         )
-    user = User(email=body.email, password_hash=hash_password(body.password))
+    # bcryptは専用エグゼキューターで実行し、他のリクエストを待たせない
+    password_hash = await hash_password_async(body.password)
+    user = User(email=body.email, password_hash=password_hash)
     try:
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
     # user.id is guaranteed to be int after commit and refresh
     if user.id is None:
@@ -42,12 +48,15 @@ def register(request: Request, body: RegisterRequest, session: SessionDep):
     return TokenResponse(access_token=token)
 
 
-@router.post("/login", response_model=TokenResponse)
-@limiter.limit("10/minute")
-def login(request: Request, body: LoginRequest, session: SessionDep):
+@router.post(
+    "/login",
+    response_model=TokenResponse,
+    dependencies=[Depends(RateLimit("auth:login", settings.RATE_LIMIT_LOGIN))],
+)
+async def login(body: LoginRequest, session: AsyncSessionDep):
     """ユーザーログインエンドポイント（レート制限：10回/分）"""
     # ユーザー検索
-    user = session.exec(select(User).where(User.email == body.email)).first()
+    user = (await session.exec(select(User).where(User.email == body.email))).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,7 +65,7 @@ def login(request: Request, body: LoginRequest, session: SessionDep):
         )
 
     # パスワード検証
-    if not verify_password(body.password, user.password_hash):
+    if not await verify_password_async(body.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
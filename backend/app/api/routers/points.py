@@ -1,14 +1,24 @@
-from fastapi import APIRouter
-from sqlmodel import Session, select
-
-from app.api.dependencies import CurrentUserDep, SessionDep
+from fastapi import APIRouter, Query
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.dependencies import (
+    AsyncSessionDep,
+    CurrentUserDep,
+    invalidate_cached_user,
+    invalidate_cached_user_after_commit,
+)
 from app.api.schemas import (
     AchievementResponse,
     AddPointsRequest,
+    LeaderboardRankResponse,
     UserAchievementResponse,
     UserPointsResponse,
 )
 from app.models import Achievement, PointsHistory, User, UserAchievement
+from app.services import leaderboard
+from app.services.achievements import check_and_unlock, check_and_unlock_async
 
 router = APIRouter(prefix="/points", tags=["points"])
 
@@ -17,22 +27,30 @@ router = APIRouter(prefix="/points", tags=["points"])
 
 
 @router.get("/me", response_model=UserPointsResponse)
-def get_my_points(
-    session: SessionDep,
+async def get_my_points(
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """Get current user's points, achievements, and history."""
-    achievements = session.exec(
-        select(UserAchievement)
-        .where(UserAchievement.user_id == current_user.id)
-        .order_by(UserAchievement.unlocked_at.desc())
+    # ポイントは他のワーカー・Celeryで加算されている場合があるため、キャッシュではなく
+    # DBから読み直す
+    await session.refresh(current_user, attribute_names=["total_points"])
+    achievements = (
+        await session.exec(
+            select(UserAchievement)
+            .where(UserAchievement.user_id == current_user.id)
+            .options(selectinload(UserAchievement.achievement))  # type: ignore[arg-type]
+            .order_by(UserAchievement.unlocked_at.desc())
+        )
     ).all()
 
-    history = session.exec(
-        select(PointsHistory)
-        .where(PointsHistory.user_id == current_user.id)
-        .order_by(PointsHistory.created_at.desc())
-        .limit(50)
+    history = (
+        await session.exec(
+            select(PointsHistory)
+            .where(PointsHistory.user_id == current_user.id)
+            .order_by(PointsHistory.created_at.desc())
+            .limit(50)
+        )
     ).all()
 
     return UserPointsResponse(
@@ -44,9 +62,9 @@ def get_my_points(
 
 
 @router.post("/me/add", response_model=UserPointsResponse)
-def add_points(
+async def add_points(
     body: AddPointsRequest,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """Add points to current user."""
@@ -60,39 +78,46 @@ def add_points(
     session.add(history)
 
     # Update user total points
+    # current_userはキャッシュから復元されている場合があるため最新の値から加算する
+    await session.refresh(current_user)
     current_user.total_points += body.points
 
     # Check for achievements to unlock
-    check_and_unlock_achievements(session, current_user)
+    await check_and_unlock_achievements_async(session, current_user)
 
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    await session.refresh(current_user)
+    invalidate_cached_user(current_user.id)  # type: ignore[arg-type]
+    await leaderboard.update_score(current_user.id, current_user.total_points)  # type: ignore[arg-type]
 
-    return get_my_points(session, current_user)
+    return await get_my_points(session, current_user)
 
 
 # ── Achievements ────────────────────────────────────────────────────────────
 
 
 @router.get("/achievements", response_model=list[AchievementResponse])
-def list_achievements(
-    session: SessionDep,
+async def list_achievements(
+    session: AsyncSessionDep,
 ):
     """List all available achievements."""
-    achievements = session.exec(select(Achievement)).all()
+    achievements = (await session.exec(select(Achievement))).all()
     return achievements
 
 
 @router.get("/me/achievements", response_model=list[UserAchievementResponse])
-def get_my_achievements(
-    session: SessionDep,
+async def get_my_achievements(
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """Get current user's unlocked achievements."""
-    achievements = session.exec(
-        select(UserAchievement)
-        .where(UserAchievement.user_id == current_user.id)
-        .order_by(UserAchievement.unlocked_at.desc())
+    achievements = (
+        await session.exec(
+            select(UserAchievement)
+            .where(UserAchievement.user_id == current_user.id)
+            .options(selectinload(UserAchievement.achievement))  # type: ignore[arg-type]
+            .order_by(UserAchievement.unlocked_at.desc())
+        )
     ).all()
     return achievements
 
@@ -101,51 +126,79 @@ def get_my_achievements(
 
 
 @router.get("/leaderboard")
-def get_leaderboard(
-    session: SessionDep,
-    limit: int = 10,
-):
+async def get_leaderboard(
+    session: AsyncSessionDep,
+    limit: int = Query(10, ge=1, le=100),
+) -> list[dict]:
     """Get top users by points."""
-    users = session.exec(
-        select(User).order_by(User.total_points.desc()).limit(limit)
-    ).all()
+    top = await leaderboard.get_top(limit)
+    if top is None:
+        # ランキング未構築・Redis未接続時はDBから集計する
+        users = (
+            await session.exec(
+                select(User).order_by(col(User.total_points).desc()).limit(limit)
+            )
+        ).all()
+        top = [(user.id, user.total_points) for user in users if user.id is not None]
+        emails = {user.id: user.email for user in users}
+    else:
+        user_ids = [user_id for user_id, _ in top]
+        rows = (
+            await session.exec(
+                select(User.id, User.email).where(col(User.id).in_(user_ids))
+            )
+        ).all()
+        emails = dict(rows)
 
     return [
         {
-            "user_id": user.id,
-            "email": user.email,
-            "total_points": user.total_points,
+            "user_id": user_id,
+            "email": emails[user_id],
+            "total_points": total_points,
         }
-        for user in users
+        for user_id, total_points in top
+        if user_id in emails
     ]
 
 
+@router.get("/leaderboard/me", response_model=LeaderboardRankResponse)
+async def get_my_rank(
+    session: AsyncSessionDep,
+    current_user: CurrentUserDep,
+) -> LeaderboardRankResponse:
+    """Get current user's rank on the leaderboard."""
+    await session.refresh(current_user, attribute_names=["total_points"])
+    rank = await leaderboard.get_rank(current_user.total_points)
+    if rank is None:
+        higher = (
+            await session.exec(
+                select(func.count()).where(
+                    User.total_points > current_user.total_points
+                )
+            )
+        ).one()
+        rank = higher + 1
+
+    return LeaderboardRankResponse(
+        user_id=current_user.id,  # type: ignore[arg-type]
+        total_points=current_user.total_points,
+        rank=rank,
+    )
+
+
 # ── Helper Functions ─────────────────────────────────────────────────────────
 
 
 def check_and_unlock_achievements(session: Session, user: User):
     """Check and unlock achievements based on user's point total."""
-    achievements = session.exec(select(Achievement)).all()
-
-    for achievement in achievements:
-        # Check if user already has this achievement
-        existing = session.exec(
-            select(UserAchievement).where(
-                UserAchievement.user_id == user.id,
-                UserAchievement.achievement_id == achievement.id,
-            )
-        ).first()
+    check_and_unlock(session, user)
 
-        if existing:
-            continue
 
-        # Unlock achievement if user has enough points
-        if user.total_points >= achievement.points:
-            user_achievement = UserAchievement(
-                user_id=user.id,
-                achievement_id=achievement.id,
-            )
-            session.add(user_achievement)
+async def check_and_unlock_achievements_async(
+    session: AsyncSession, user: User
+) -> None:
+    """Async variant of check_and_unlock_achievements for the async routers."""
+    await check_and_unlock_async(session, user)
 
 
 def add_points_to_user(
@@ -170,3 +223,5 @@ def add_points_to_user(
 
         # Check for achievements
         check_and_unlock_achievements(session, user)
+        invalidate_cached_user_after_commit(session, user_id)
+        leaderboard.update_score_after_commit(session, user_id, user.total_points)
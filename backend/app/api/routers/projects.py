@@ -1,45 +1,91 @@
-from fastapi import APIRouter, HTTPException, status
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from sqlmodel import select
 
-from app.api.dependencies import CurrentUserDep, SessionDep
+from app.api.dependencies import AsyncSessionDep, CurrentUserDep
 from app.api.schemas import PaginatedResponse, ProjectCreate, ProjectResponse
 from app.models import Project
-from app.utils.pagination import create_paginated_response
-from app.utils.soft_delete import filter_active, soft_delete
+from app.utils.cache_version import bump_version
+from app.utils.etag import not_modified, resource_etag
+from app.utils.pagination import (
+    CountStrategy,
+    SortKey,
+    apply_keyset,
+    count_total,
+    create_paginated_response,
+)
+from app.utils.soft_delete import (
+    filter_active,
+    restore_project_async,
+    soft_delete_project_async,
+)
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
+PROJECT_SORT_KEYS: list[SortKey] = [(Project.id, False)]
+
 
 @router.get("", response_model=PaginatedResponse[ProjectResponse])
-def list_projects(
-    session: SessionDep,
+async def list_projects(
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
+    count: CountStrategy = "exact",
 ):
-    """プロジェクト一覧取得（ページネーション付き）"""
+    """
+    プロジェクト一覧取得（ページネーション付き）
+
+    cursorに前回のnext_cursorを指定すると、OFFSETを使わないキーセット方式で次ページを取得する
+    countで総件数の取得方法を選べる
+    If-None-Match が前回のETagと一致する場合（変更なし）は304を返す
+    """
+    etag = await resource_etag(
+        request,
+        ("owner", current_user.id),  # type: ignore[arg-type]
+    )
+    if (unchanged := not_modified(request, response, etag)) is not None:
+        return unchanged
+
     # ベースクエリ
     base_query = select(Project).where(Project.owner_id == current_user.id)
     base_query = filter_active(base_query, Project)
 
     # 総件数を取得
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total = session.exec(count_query).one()
+    total, total_estimated = await count_total(
+        session,
+        base_query,
+        count,
+        cache_scope=("owner", current_user.id),  # type: ignore[arg-type]
+    )
 
     # ページネーションを適用
-    offset = (page - 1) * page_size
-    query = base_query.offset(offset).limit(page_size)
-    projects = session.exec(query).all()
+    if cursor is None:
+        offset = (page - 1) * page_size
+        query = (
+            apply_keyset(base_query, PROJECT_SORT_KEYS).offset(offset).limit(page_size)
+        )
+    else:
+        query = apply_keyset(base_query, PROJECT_SORT_KEYS, cursor).limit(page_size + 1)
+    projects = (await session.exec(query)).all()
 
     return create_paginated_response(
-        items=projects, total=total, page=page, page_size=page_size
+        items=projects,
+        total=total,
+        page=page,
+        page_size=page_size,
+        sort_keys=PROJECT_SORT_KEYS,
+        cursor=cursor,
+        total_estimated=total_estimated,
     )
 
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-def create_project(
+async def create_project(
     body: ProjectCreate,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """プロジェクト作成"""
@@ -50,21 +96,27 @@ def create_project(
     )
     try:
         session.add(project)
-        session.commit()
-        session.refresh(project)
+        await session.commit()
+        await session.refresh(project)
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
+    await bump_version("owner", current_user.id)  # type: ignore[arg-type]
     return project
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-def get_project(
+async def get_project(
     project_id: int,
-    session: SessionDep,
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
-    project = session.get(Project, project_id)
+    """プロジェクト取得（変更がなければ304）"""
+    # 読み込みより前にバージョンを取得する
+    etag = await resource_etag(request, ("project", project_id))
+    project = await session.get(Project, project_id)
     if not project or project.deleted_at is not None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
@@ -73,17 +125,19 @@ def get_project(
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
         )
+    if (unchanged := not_modified(request, response, etag)) is not None:
+        return unchanged
     return project
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_project(
+async def delete_project(
     project_id: int,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
-    """プロジェクト削除（ソフトデリート）"""
-    project = session.get(Project, project_id)
+    """プロジェクト削除（ソフトデリート。配下のスプリント・タスクも削除）"""
+    project = await session.get(Project, project_id)
     if not project or project.deleted_at is not None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Project not found"
@@ -93,8 +147,37 @@ def delete_project(
             status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
         )
     try:
-        # ソフトデリートを実行
-        soft_delete(session, project)
+        # 配下のスプリント・タスクを含めてソフトデリート
+        await soft_delete_project_async(session, project_id)
+    except Exception:
+        await session.rollback()
+        raise
+    await bump_version("owner", current_user.id)
+    await bump_version("project", project_id)
+
+
+@router.post("/{project_id}/restore", response_model=ProjectResponse)
+async def restore_project(
+    project_id: int,
+    session: AsyncSessionDep,
+    current_user: CurrentUserDep,
+) -> Project:
+    """削除したプロジェクトを復元（同時に削除されたスプリント・タスクも復元）"""
+    project = await session.get(Project, project_id)
+    if not project or project.deleted_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Deleted project not found"
+        )
+    if project.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized"
+        )
+    try:
+        await restore_project_async(session, project_id)
+        await session.refresh(project)
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
+    await bump_version("owner", current_user.id)
+    await bump_version("project", project_id)
+    return project
@@ -1,24 +1,40 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
 from sqlmodel import select
 
-from app.api.dependencies import CurrentUserDep, SessionDep, verify_project_access
+from app.api.dependencies import (
+    AsyncSessionDep,
+    CurrentUserDep,
+    verify_project_access_async,
+)
 from app.api.schemas import SprintCreate, SprintResponse
 from app.models import Sprint
-from app.utils.soft_delete import filter_active, soft_delete
+from app.utils.cache_version import bump_version
+from app.utils.etag import not_modified, resource_etag
+from app.utils.soft_delete import (
+    filter_active,
+    restore_sprint_async,
+    soft_delete_sprint_async,
+)
 
 router = APIRouter(tags=["sprints"])
 
 
 @router.get("/projects/{project_id}/sprints", response_model=list[SprintResponse])
-def list_sprints(
+async def list_sprints(
     project_id: int,
-    session: SessionDep,
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
-    verify_project_access(project_id, current_user, session)
+    """スプリント一覧取得（変更がなければ304）"""
+    etag = await resource_etag(request, ("project", project_id))
+    await verify_project_access_async(project_id, current_user, session)
+    if (unchanged := not_modified(request, response, etag)) is not None:
+        return unchanged
     base_query = select(Sprint).where(Sprint.project_id == project_id)
     base_query = filter_active(base_query, Sprint)
-    sprints = session.exec(base_query).all()
+    sprints = (await session.exec(base_query)).all()
     return sprints
 
 
@@ -27,22 +43,23 @@ def list_sprints(
     response_model=SprintResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def create_sprint(
+async def create_sprint(
     project_id: int,
     body: SprintCreate,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """スプリント作成"""
-    verify_project_access(project_id, current_user, session)
+    await verify_project_access_async(project_id, current_user, session)
     sprint = Sprint(project_id=project_id, **body.model_dump())
     try:
         session.add(sprint)
-        session.commit()
-        session.refresh(sprint)
+        await session.commit()
+        await session.refresh(sprint)
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
+    await bump_version("project", project_id)
     return sprint
 
 
@@ -50,40 +67,68 @@ def create_sprint(
     "/projects/{project_id}/sprints/{sprint_id}",
     status_code=status.HTTP_204_NO_CONTENT,
 )
-def delete_sprint(
+async def delete_sprint(
     project_id: int,
     sprint_id: int,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
-    """スプリント削除（ソフトデリート）"""
-    verify_project_access(project_id, current_user, session)
-    sprint = session.get(Sprint, sprint_id)
+    """スプリント削除（ソフトデリート。所属するタスクも削除）"""
+    await verify_project_access_async(project_id, current_user, session)
+    sprint = await session.get(Sprint, sprint_id)
     if not sprint or sprint.project_id != project_id or sprint.deleted_at is not None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Sprint not found"
         )
     try:
-        soft_delete(session, sprint)
+        await soft_delete_sprint_async(session, project_id, sprint_id)
+    except Exception:
+        await session.rollback()
+        raise
+    await bump_version("project", project_id)
+
+
+@router.post(
+    "/projects/{project_id}/sprints/{sprint_id}/restore",
+    response_model=SprintResponse,
+)
+async def restore_sprint(
+    project_id: int,
+    sprint_id: int,
+    session: AsyncSessionDep,
+    current_user: CurrentUserDep,
+) -> Sprint:
+    """削除したスプリントを復元（同時に削除されたタスクも復元）"""
+    await verify_project_access_async(project_id, current_user, session)
+    sprint = await session.get(Sprint, sprint_id)
+    if not sprint or sprint.project_id != project_id or sprint.deleted_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Deleted sprint not found"
+        )
+    try:
+        await restore_sprint_async(session, project_id, sprint_id)
+        await session.refresh(sprint)
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
+    await bump_version("project", project_id)
+    return sprint
 
 
 @router.put(
     "/projects/{project_id}/sprints/{sprint_id}",
     response_model=SprintResponse,
 )
-def update_sprint(
+async def update_sprint(
     project_id: int,
     sprint_id: int,
     body: SprintCreate,  # SprintUpdateスキーマを別途作るほどでもないので再利用
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """スプリント更新"""
-    verify_project_access(project_id, current_user, session)
-    sprint = session.get(Sprint, sprint_id)
+    await verify_project_access_async(project_id, current_user, session)
+    sprint = await session.get(Sprint, sprint_id)
     if not sprint or sprint.project_id != project_id or sprint.deleted_at is not None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Sprint not found"
@@ -95,9 +140,10 @@ def update_sprint(
 
     try:
         session.add(sprint)
-        session.commit()
-        session.refresh(sprint)
+        await session.commit()
+        await session.refresh(sprint)
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
+    await bump_version("project", project_id)
     return sprint
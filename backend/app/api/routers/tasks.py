@@ -1,16 +1,61 @@
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Literal
 
-from fastapi import APIRouter, HTTPException, status
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.dependencies import CurrentUserDep, SessionDep, verify_project_access
-from app.api.schemas import PaginatedResponse, TaskCreate, TaskResponse, TaskUpdate
+from app.api.dependencies import (
+    AsyncSessionDep,
+    CurrentUserDep,
+    verify_project_access_async,
+)
+from app.api.schemas import (
+    TASK_CHANGES_MAX_LIMIT,
+    PaginatedResponse,
+    TaskBatchCreate,
+    TaskBatchDelete,
+    TaskBatchItemResult,
+    TaskBatchResponse,
+    TaskBatchUpdate,
+    TaskChangesResponse,
+    TaskCreate,
+    TaskResponse,
+    TaskUpdate,
+)
+from app.core.config import settings
+from app.core.exceptions import ValidationException
 from app.models import Task
-from app.utils.pagination import create_paginated_response
-from app.utils.soft_delete import filter_active, soft_delete
+from app.services.task_batch import (
+    BatchItemResult,
+    create_tasks,
+    delete_tasks,
+    update_tasks,
+)
+from app.utils.cache_version import bump_version
+from app.utils.etag import not_modified, resource_etag
+from app.utils.pagination import (
+    CountStrategy,
+    SortKey,
+    apply_keyset,
+    count_total,
+    create_paginated_response,
+    decode_cursor,
+    encode_cursor,
+)
+from app.utils.soft_delete import filter_active, soft_delete_async
 
 router = APIRouter(tags=["tasks"])
 
+# 一覧のソート順（最後のキーは一意であること）
+TASK_SORT_KEYS: dict[str, list[SortKey]] = {
+    "id": [(Task.id, False)],
+    "priority": [(Task.priority, True), (Task.id, False)],
+}
+# 差分同期の順序（更新日時が同じ行はIDで区別する）
+TASK_CHANGE_SORT_KEYS: list[SortKey] = [(Task.updated_at, False), (Task.id, False)]
+
 
 # ── プロジェクト配下のタスクCRUD ─────────────────────────────────────────────
 
@@ -18,17 +63,32 @@ router = APIRouter(tags=["tasks"])
 @router.get(
     "/projects/{project_id}/tasks", response_model=PaginatedResponse[TaskResponse]
 )
-def list_tasks(
+async def list_tasks(
     project_id: int,
-    session: SessionDep,
+    request: Request,
+    response: Response,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
     page: int = 1,
     page_size: int = 20,
     status: str | None = None,
     sprint_id: int | None = None,
+    sort: Literal["id", "priority"] = "id",
+    cursor: str | None = None,
+    count: CountStrategy = "exact",
 ):
-    """タスク一覧取得（ページネーション付き）"""
-    verify_project_access(project_id, current_user, session)
+    """
+    タスク一覧取得（ページネーション付き）
+
+    cursorに前回のnext_cursorを指定すると、OFFSETを使わないキーセット方式で次ページを取得する
+    countで総件数の取得方法を選べる（大規模プロジェクトではcached / estimatedを推奨）
+    If-None-Match が前回のETagと一致する場合（変更なし）は304を返す
+    """
+    # 読み込みより前にバージョンを取得する
+    etag = await resource_etag(request, ("project", project_id))
+    await verify_project_access_async(project_id, current_user, session)
+    if (unchanged := not_modified(request, response, etag)) is not None:
+        return unchanged
 
     # ベースクエリ
     base_query = select(Task).where(Task.project_id == project_id)
@@ -41,16 +101,114 @@ def list_tasks(
         base_query = base_query.where(Task.sprint_id == sprint_id)
 
     # 総件数を取得
-    count_query = select(func.count()).select_from(base_query.subquery())
-    total = session.exec(count_query).one()
+    total, total_estimated = await count_total(
+        session, base_query, count, cache_scope=("project", project_id)
+    )
 
     # ページネーションを適用
-    offset = (page - 1) * page_size
-    query = base_query.offset(offset).limit(page_size)
-    tasks = session.exec(query).all()
+    sort_keys = TASK_SORT_KEYS[sort]
+    if cursor is None:
+        offset = (page - 1) * page_size
+        query = apply_keyset(base_query, sort_keys).offset(offset).limit(page_size)
+    else:
+        query = apply_keyset(base_query, sort_keys, cursor).limit(page_size + 1)
+    tasks = (await session.exec(query)).all()
 
     return create_paginated_response(
-        items=tasks, total=total, page=page, page_size=page_size
+        items=tasks,
+        total=total,
+        page=page,
+        page_size=page_size,
+        sort_keys=sort_keys,
+        cursor=cursor,
+        total_estimated=total_estimated,
+    )
+
+
+def _sync_cursor(position: Any, issued_at: datetime) -> str:
+    """差分同期のカーソル（位置のキーセットカーソル + 発行時刻のUNIX秒）"""
+    keyset = encode_cursor(TASK_CHANGE_SORT_KEYS, position)
+    return f"{keyset}.{int(issued_at.replace(tzinfo=UTC).timestamp())}"
+
+
+def _parse_sync_cursor(cursor: str) -> tuple[str, list, datetime]:
+    """
+    差分同期のカーソルを (キーセットカーソル, 位置, 発行時刻) に分解
+
+    Raises:
+        ValidationException: カーソルが不正な場合
+    """
+    keyset, _, issued = cursor.rpartition(".")
+    try:
+        issued_at = datetime.fromtimestamp(int(issued), UTC).replace(tzinfo=None)
+    except (ValueError, OverflowError, OSError) as e:
+        raise ValidationException("Invalid cursor") from e
+    return keyset, decode_cursor(TASK_CHANGE_SORT_KEYS, keyset), issued_at
+
+
+@router.get("/projects/{project_id}/tasks/changes", response_model=TaskChangesResponse)
+async def list_task_changes(
+    project_id: int,
+    session: AsyncSessionDep,
+    current_user: CurrentUserDep,
+    since: str | None = None,
+    limit: int = Query(default=500, ge=1, le=TASK_CHANGES_MAX_LIMIT),
+) -> TaskChangesResponse:
+    """
+    タスクの差分同期
+
+    sinceに前回のnext_cursorを指定すると、それ以降に作成・更新・論理削除された
+    タスクを更新日時順に返す。省略時は削除されていない全タスクを返す（初回の同期）。
+    has_moreがTrueの間はnext_cursorで続けて取得する。
+
+    保持期間（PURGE_RETENTION_DAYS）より前に発行したカーソルは、その後に論理削除
+    された行が既に物理削除されている可能性があるため410を返す（初回の同期からやり直す）。
+    """
+    await verify_project_access_async(project_id, current_user, session)
+    now = datetime.now(UTC).replace(tzinfo=None)
+    # 直近の変更は次回に回す。更新日時を設定してからコミットするまでの間に
+    # カーソルが追い越し、その変更を返さないままになるのを防ぐ
+    settled = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+
+    query = select(Task).where(Task.project_id == project_id, Task.updated_at < settled)
+    keyset, since_position = None, None
+    if since is None:
+        query = filter_active(query, Task)
+    else:
+        keyset, since_position, issued_at = _parse_sync_cursor(since)
+        retention = settings.PURGE_RETENTION_DAYS
+        if retention > 0 and issued_at < now - timedelta(days=retention):
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Sync cursor expired; sync all tasks again",
+            )
+    query = apply_keyset(query, TASK_CHANGE_SORT_KEYS, keyset).limit(limit + 1)
+    tasks = (await session.exec(query)).all()
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+
+    position: Task | SimpleNamespace
+    if has_more:
+        position = tasks[-1]
+    elif since_position is not None and tuple(since_position) > (settled, 0):
+        position = SimpleNamespace(updated_at=since_position[0], id=since_position[1])
+    else:
+        # 確定済みの時刻より前の変更は全て返したため、そこまで進める
+        position = SimpleNamespace(updated_at=settled, id=0)
+
+    return TaskChangesResponse(
+        updated=[
+            TaskResponse.model_validate(task)
+            for task in tasks
+            if task.deleted_at is None
+        ],
+        deleted_ids=[
+            task.id  # type: ignore[misc]
+            for task in tasks
+            if task.deleted_at is not None
+        ],
+        next_cursor=_sync_cursor(position, now),
+        has_more=has_more,
     )
 
 
@@ -59,74 +217,160 @@ def list_tasks(
     response_model=TaskResponse,
     status_code=201,
 )
-def create_task(
+async def create_task(
     project_id: int,
     body: TaskCreate,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """タスク作成"""
-    verify_project_access(project_id, current_user, session)
+    await verify_project_access_async(project_id, current_user, session)
     task = Task(project_id=project_id, **body.model_dump())
     try:
         session.add(task)
-        session.commit()
-        session.refresh(task)
+        await session.commit()
+        await session.refresh(task)
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
+    await bump_version("project", task.project_id)
     return task
 
 
+# ── 一括操作 ──────────────────────────────────────────────────────────────────
+# アクセス権限の確認は1回、変更は1トランザクションで適用し、項目ごとの結果を返す
+
+
+async def _commit_batch(
+    session: AsyncSession, project_id: int, results: list[BatchItemResult]
+) -> TaskBatchResponse:
+    succeeded = sum(result.ok for result in results)
+    try:
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    if succeeded:
+        await bump_version("project", project_id)
+    return TaskBatchResponse(
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        results=[TaskBatchItemResult.model_validate(result) for result in results],
+    )
+
+
+@router.post("/projects/{project_id}/tasks:batch", response_model=TaskBatchResponse)
+async def create_tasks_batch(
+    project_id: int,
+    body: TaskBatchCreate,
+    session: AsyncSessionDep,
+    current_user: CurrentUserDep,
+) -> TaskBatchResponse:
+    """タスク一括作成（存在しないスプリントを指定した項目はエラー）"""
+    await verify_project_access_async(project_id, current_user, session)
+    try:
+        results = await create_tasks(
+            session, project_id, [item.model_dump() for item in body.items]
+        )
+    except Exception:
+        await session.rollback()
+        raise
+    return await _commit_batch(session, project_id, results)
+
+
+@router.patch("/projects/{project_id}/tasks:batch", response_model=TaskBatchResponse)
+async def update_tasks_batch(
+    project_id: int,
+    body: TaskBatchUpdate,
+    session: AsyncSessionDep,
+    current_user: CurrentUserDep,
+) -> TaskBatchResponse:
+    """
+    タスク一括更新（指定した項目のみ変更）
+
+    プロジェクトにない・削除済み・リクエスト内で重複したタスクの項目はエラー
+    """
+    await verify_project_access_async(project_id, current_user, session)
+    try:
+        results = await update_tasks(
+            session,
+            project_id,
+            [item.model_dump(exclude_unset=True) for item in body.items],
+        )
+    except Exception:
+        await session.rollback()
+        raise
+    return await _commit_batch(session, project_id, results)
+
+
+@router.delete("/projects/{project_id}/tasks:batch", response_model=TaskBatchResponse)
+async def delete_tasks_batch(
+    project_id: int,
+    body: TaskBatchDelete,
+    session: AsyncSessionDep,
+    current_user: CurrentUserDep,
+) -> TaskBatchResponse:
+    """タスク一括削除（ソフトデリート）"""
+    await verify_project_access_async(project_id, current_user, session)
+    try:
+        results = await delete_tasks(session, project_id, body.ids)
+    except Exception:
+        await session.rollback()
+        raise
+    return await _commit_batch(session, project_id, results)
+
+
 # ── 個別タスク操作 ────────────────────────────────────────────────────────────
 
 
 @router.put("/tasks/{task_id}", response_model=TaskResponse)
-def update_task(
+async def update_task(
     task_id: int,
     body: TaskUpdate,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """タスク更新"""
-    task = session.get(Task, task_id)
+    task = await session.get(Task, task_id)
     if not task or task.deleted_at is not None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
         )
-    verify_project_access(task.project_id, current_user, session)
+    await verify_project_access_async(task.project_id, current_user, session)
 
     update_data = body.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(task, key, value)
-    task.updated_at = datetime.now(UTC)
+    task.updated_at = datetime.now(UTC).replace(tzinfo=None)  # カラムはnaiveなUTC
 
     try:
         session.add(task)
-        session.commit()
-        session.refresh(task)
+        await session.commit()
+        await session.refresh(task)
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
+    await bump_version("project", task.project_id)
     return task
 
 
 @router.delete("/tasks/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     task_id: int,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUserDep,
 ):
     """タスク削除（ソフトデリート）"""
-    task = session.get(Task, task_id)
+    task = await session.get(Task, task_id)
     if not task or task.deleted_at is not None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
         )
-    verify_project_access(task.project_id, current_user, session)
+    await verify_project_access_async(task.project_id, current_user, session)
     try:
         # ソフトデリートを実行
-        soft_delete(session, task)
+        await soft_delete_async(session, task)
     except Exception:
-        session.rollback()
+        await session.rollback()
         raise
+    await bump_version("project", task.project_id)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Generic, TypeVar
 
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 
 # ── Paginated Response ────────────────────────────────────────────────────────
 
@@ -18,6 +18,8 @@ class PaginatedResponse(BaseModel, Generic[T]):
     total_pages: int
     has_next: bool
     has_prev: bool
+    next_cursor: str | None = None
+    total_estimated: bool = False
 
 
 # ── Auth schemas ──────────────────────────────────────────────────────────────
@@ -48,6 +50,49 @@ class UserResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class PoolStatsResponse(BaseModel):
+    """DBコネクションプール統計"""
+
+    pool: str
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    max_overflow: int
+    overflow_peak: int
+    checkouts: int
+    waits: int
+    checkout_seconds_avg: float
+    checkout_seconds_max: float
+
+
+class AIQueueStatsResponse(BaseModel):
+    """AIワーカーのキュー統計"""
+
+    queue: str
+    depth: int | None  # ブローカーに接続できない場合はNone
+    wait_samples: int
+    wait_ms_p50: int
+    wait_ms_p95: int
+    wait_ms_max: int
+
+
+class PasswordHasherStatsResponse(BaseModel):
+    """パスワードハッシュ用エグゼキューターの統計"""
+
+    workers: int
+    max_queue: int
+    running: int
+    queued: int
+    queued_peak: int
+    submitted: int
+    completed: int
+    rejected: int
+    wait_seconds_avg: float
+    wait_seconds_max: float
+    run_seconds_avg: float
+
+
 # ── Project schemas ───────────────────────────────────────────────────────────
 
 
@@ -150,12 +195,66 @@ class TaskResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+# 一括操作の1リクエストあたりの最大件数
+TASK_BATCH_MAX_ITEMS = 500
+
+
+class TaskBatchCreate(BaseModel):
+    items: list[TaskCreate] = Field(min_length=1, max_length=TASK_BATCH_MAX_ITEMS)
+
+
+class TaskBatchUpdateItem(TaskUpdate):
+    id: int
+
+
+class TaskBatchUpdate(BaseModel):
+    items: list[TaskBatchUpdateItem] = Field(
+        min_length=1, max_length=TASK_BATCH_MAX_ITEMS
+    )
+
+
+class TaskBatchDelete(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=TASK_BATCH_MAX_ITEMS)
+
+
+class TaskBatchItemResult(BaseModel):
+    """一括操作の項目ごとの結果（失敗した項目は error を持つ）"""
+
+    index: int
+    id: int | None = None
+    task: TaskResponse | None = None
+    error: str | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class TaskBatchResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: list[TaskBatchItemResult]
+
+
+# 差分同期の1リクエストあたりの最大件数
+TASK_CHANGES_MAX_LIMIT = 1000
+
+
+class TaskChangesResponse(BaseModel):
+    """前回のカーソル以降に変更されたタスク"""
+
+    updated: list[TaskResponse]  # 作成・更新・復元されたタスク
+    deleted_ids: list[int]  # 論理削除されたタスクのID
+    next_cursor: str  # 次回の since に指定する
+    has_more: bool  # Trueの場合は next_cursor ですぐに続きを取得する
+
+
 # ── AI schemas ──────────────────────────────────────────────────────────────
 
 
 class AIDecompositionRequest(BaseModel):
     prompt: str
     sprint_id: int | None = None
+    # 非同期ジョブのみ: Trueの場合はバックグラウンド処理用のキューに入れる
+    background: bool = False
 
 
 class AIDecompositionItem(BaseModel):
@@ -202,6 +301,12 @@ class PointsHistoryResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class LeaderboardRankResponse(BaseModel):
+    user_id: int
+    total_points: int
+    rank: int
+
+
 class UserPointsResponse(BaseModel):
     user_id: int
     total_points: int
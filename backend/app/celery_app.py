@@ -2,15 +2,27 @@
 Celery アプリケーション設定
 """
 
+import os
+from typing import Any
+
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
+from kombu import Queue
 
 from app.core.config import settings
+from app.core.metrics import mark_process_dead, start_metrics_server
+from app.tasks.queues import (
+    BULK_QUEUE,
+    INTERACTIVE_QUEUE,
+    PRIORITY_SEP,
+    PRIORITY_STEPS,
+)
 
 celery_app = Celery(
     "taskforge_worker",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_BROKER_URL.replace("/1", "/2"),  # 結果保存用DB
-    include=["app.tasks.ai_tasks"],
+    include=["app.tasks.ai_tasks", "app.tasks.maintenance_tasks"],
 )
 
 # Celery 設定
@@ -21,6 +33,21 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # キュー設定（ワーカーは既定で両方を処理する。-Q で用途ごとにプールを分けられる）
+    task_queues=(Queue(INTERACTIVE_QUEUE), Queue(BULK_QUEUE)),
+    task_default_queue=INTERACTIVE_QUEUE,
+    task_routes={
+        "ai.decompose_tasks": {"queue": INTERACTIVE_QUEUE},
+        # 定期メンテナンスはAIジョブの待ち時間に影響しないよう最も低い優先度で
+        "maintenance.*": {"queue": BULK_QUEUE, "priority": PRIORITY_STEPS[-1]},
+    },
+    # プロジェクトごとの公平性のための優先度（0が最優先、優先度ごとにリストを分ける）
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "sep": PRIORITY_SEP,
+        "queue_order_strategy": "priority",
+    },
+    task_default_priority=0,
     # タスク結果の設定
     result_expires=3600,  # 1時間で結果を期限切れ
     task_track_started=True,
@@ -30,4 +57,23 @@ celery_app.conf.update(
     # タスクのタイムアウト
     task_soft_time_limit=300,  # 5分
     task_time_limit=360,  # 6分（ハードリミット）
+    # 定期実行（celery -A app.celery_app beat を1プロセスだけ起動する）
+    beat_schedule={
+        "purge-soft-deleted": {
+            "task": "maintenance.purge_soft_deleted",
+            "schedule": settings.PURGE_INTERVAL_SECONDS,
+        },
+    },
 )
+
+
+@worker_init.connect
+def _start_worker_metrics_server(**kwargs: Any) -> None:
+    # 親プロセスで1つだけ起動する（子プロセスの値は PROMETHEUS_MULTIPROC_DIR で合算）
+    if settings.WORKER_METRICS_PORT:
+        start_metrics_server(settings.WORKER_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def _mark_worker_process_dead(**kwargs: Any) -> None:
+    mark_process_dead(os.getpid())
@@ -8,9 +8,12 @@ from fastapi import status
 class TaskForgeException(Exception):
     """基底例外クラス"""
 
-    def __init__(self, message: str, status_code: int = 500):
+    def __init__(
+        self, message: str, status_code: int = 500, headers: dict | None = None
+    ):
         self.message = message
         self.status_code = status_code
+        self.headers = headers
         super().__init__(self.message)
 
 
@@ -60,3 +63,24 @@ class AIProcessingException(TaskForgeException):
         super().__init__(
             message=message, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+class ServiceUnavailableException(TaskForgeException):
+    """過負荷などで一時的に処理できない場合の例外"""
+
+    def __init__(self, message: str = "Service temporarily unavailable"):
+        super().__init__(
+            message=message, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+class RateLimitExceededException(TaskForgeException):
+    """レート制限超過エラー"""
+
+    def __init__(self, retry_after: int, message: str = "Rate limit exceeded"):
+        self.retry_after = retry_after
+        super().__init__(
+            message=message,
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(retry_after)},
+        )
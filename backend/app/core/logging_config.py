@@ -0,0 +1,210 @@
+"""
+ログ出力の設定（キュー経由の非同期出力）
+
+ロガーにはキューに積むだけの QueueHandler を付け、整形・標準出力・ファイルへの書き込みは
+QueueListener の専用スレッドで行う。リクエストを処理するスレッドはディスクI/Oで待たない。
+
+- 形式: JSON（1行1レコード）またはテキスト（LOG_FORMAT）
+- ファイル: サイズでローテーション（LOG_FILE_MAX_BYTES × LOG_FILE_BACKUP_COUNT）
+- 間引き: 大量に出るロガー（SQLなど）は LOG_SAMPLE_RATES の割合だけ残す。
+  WARNING以上は間引かない
+- キューが満杯の場合は待たずに捨て、件数をメトリクス（log_records_dropped_total）に数える
+
+uvicornのロガー（アクセスログなど）も同じ経路に流す。
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from app.core.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+
+# 独自のハンドラーを持つため、ルートロガーに流すよう付け替えるロガー
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+
+# LogRecord の標準属性（これ以外は extra で渡された項目としてJSONに含める）
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: QueueListener | None = None
+_exception_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """1レコードを1行のJSONに整形"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def parse_sample_rates(value: str) -> dict[str, float]:
+    """
+    "ロガー名=割合,..." 形式（例: "sqlalchemy.engine=0.1"）を辞書に変換
+
+    Raises:
+        ValueError: 形式が不正、または割合が0〜1の範囲外の場合
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, sep, rate = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid log sample rate: {item!r}")
+        rates[name.strip()] = float(rate)
+        if not 0.0 <= rates[name.strip()] <= 1.0:
+            raise ValueError(f"Log sample rate must be between 0 and 1: {item!r}")
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    ロガーごとにレコードを一定の割合で間引くフィルター
+
+    ロガー名の前方一致（"sqlalchemy.engine" は "sqlalchemy.engine.Engine" にも一致）で
+    最も長く一致した設定を使う。割合どおりの件数を残すよう、乱数ではなく累積で判定する。
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._credits: dict[str, float] = {}
+        self._rules: dict[str, str | None] = {}  # ロガー名→一致した設定
+        self._lock = threading.Lock()
+
+    def _rule_for(self, name: str) -> str | None:
+        if name not in self._rules:
+            matches = [
+                prefix
+                for prefix in self.rates
+                if name == prefix or name.startswith(prefix + ".")
+            ]
+            self._rules[name] = max(matches, key=len, default=None)
+        return self._rules[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rule = self._rule_for(record.name)
+        if rule is None:
+            return True
+        rate = self.rates[rule]
+        if rate <= 0.0:
+            return False
+        with self._lock:
+            # 最初の1件は残す
+            credit = self._credits.get(rule, 1.0 - rate) + rate
+            keep = credit >= 1.0
+            self._credits[rule] = credit - 1.0 if keep else credit
+        return keep
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """キューが満杯でも待たずに捨てるQueueHandler"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 引数・トレースバックは後から変わりうるため呼び出し元で文字列にし、
+        # 整形（JSON化など）はリスナーのスレッドに任せる
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def _formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+def _output_handlers() -> list[logging.Handler]:
+    handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if settings.LOG_FILE:
+        handlers.append(
+            RotatingFileHandler(
+                settings.LOG_FILE,
+                maxBytes=settings.LOG_FILE_MAX_BYTES,
+                backupCount=settings.LOG_FILE_BACKUP_COUNT,
+                encoding="utf-8",
+            )
+        )
+    formatter = _formatter()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def setup_logging() -> None:
+    """
+    ルートロガーをキュー経由の出力に切り替え、出力用のスレッドを開始する
+
+    既存のハンドラーは外す。複数回呼んだ場合は前回のスレッドを止めてから作り直す。
+    """
+    global _listener
+    stop_logging()
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(parse_sample_rates(settings.LOG_SAMPLE_RATES)))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL)
+    for name in _UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+    if settings.DB_ECHO:
+        # SQLAlchemyの echo=True は標準出力へ直接書くため使わず、ロガー経由で出す
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    _listener = QueueListener(
+        log_queue, *_output_handlers(), respect_handler_level=True
+    )
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """キューに残ったレコードを書き出してから出力用のスレッドを止める"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
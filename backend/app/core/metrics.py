@@ -0,0 +1,165 @@
+"""
+Prometheusメトリクスの定義と公開
+
+APIプロセスは /metrics で、Celeryワーカーは WORKER_METRICS_PORT で公開する。
+
+- HTTP: ルートのテンプレートごとのレイテンシ、処理中のリクエスト数
+- DB: エンジンごとのクエリの所要時間（件数はヒストグラムの _count）、
+  1リクエストあたりのクエリ数・合計時間
+- Redis: コマンドごとのレイテンシ
+- AI: ワークフローの段階ごと・ジョブ全体の所要時間
+- ログ: キューが満杯で捨てたレコード数
+- 論理削除行の定期削除: テーブルごとの処理行数・バッチの所要時間・残りの対象行数
+
+複数プロセス（uvicorn --workers、Celeryのprefork）で動かす場合は環境変数
+PROMETHEUS_MULTIPROC_DIR を設定すると、全プロセスの値を合算して公開する。
+"""
+
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+# ルートに一致しなかったリクエスト（404・マウントしたアプリ）のラベル
+UNMATCHED_ROUTE = "<unmatched>"
+
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+_SLOW_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Total database query time per HTTP request",
+    ["route"],
+    buckets=_FAST_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Database query latency by engine",
+    ["engine"],
+    buckets=_FAST_BUCKETS,
+)
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency (pipelines are recorded as PIPELINE)",
+    ["command"],
+    buckets=_FAST_BUCKETS,
+)
+AI_STAGE_DURATION = Histogram(
+    "ai_stage_duration_seconds",
+    "AI decomposition workflow stage latency",
+    ["stage"],
+    buckets=_SLOW_BUCKETS,
+)
+AI_JOB_DURATION = Histogram(
+    "ai_job_duration_seconds",
+    "AI decomposition Celery job latency",
+    ["queue", "status"],
+    buckets=_SLOW_BUCKETS,
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the logging queue was full",
+)
+PURGED_ROWS = Counter(
+    "soft_delete_purged_rows_total",
+    "Soft-deleted rows removed from hot tables after the retention period",
+    ["table", "action"],
+)
+PURGE_BATCH_DURATION = Histogram(
+    "soft_delete_purge_batch_duration_seconds",
+    "Soft-deleted row purge batch latency",
+    ["table"],
+)
+PURGE_PENDING_ROWS = Gauge(
+    "soft_delete_purge_pending_rows",
+    "Soft-deleted rows past the retention period left after the last purge run",
+    ["table"],
+    multiprocess_mode="mostrecent",
+)
+
+
+@dataclass
+class RequestDbStats:
+    """1リクエストの間に実行したクエリの集計"""
+
+    queries: int = 0
+    seconds: float = 0.0
+
+
+# リクエスト処理中のみ設定される（スレッドプールで実行する同期ルートにも引き継がれる）
+request_db_stats: ContextVar[RequestDbStats | None] = ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def observe_db_query(engine: str, seconds: float) -> None:
+    """クエリ1件の所要時間を記録（リクエスト処理中ならリクエストの集計にも加える）"""
+    DB_QUERY_DURATION.labels(engine).observe(seconds)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += seconds
+
+
+def observe_redis_command(command: str | bytes, seconds: float) -> None:
+    """Redisコマンド1回の所要時間を記録"""
+    if isinstance(command, bytes):
+        command = command.decode("ascii", "replace")
+    REDIS_COMMAND_DURATION.labels(command.upper()).observe(seconds)
+
+
+def _registry() -> CollectorRegistry:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    公開用のテキスト形式でメトリクスを出力
+
+    Returns:
+        (本文, Content-Type)
+    """
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> None:
+    """メトリクス公開用のHTTPサーバーをバックグラウンドで起動（Celeryワーカー用）"""
+    start_http_server(port, registry=_registry())
+
+
+def mark_process_dead(pid: int) -> None:
+    """終了したプロセスの処理中ゲージを集計から外す（複数プロセス構成のみ）"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
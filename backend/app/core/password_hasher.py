@@ -0,0 +1,136 @@
+"""
+パスワードハッシュ専用のエグゼキューター
+
+bcryptは1回あたり数百ミリ秒のCPUを使うため、共有スレッドプールで実行すると
+ログインが集中した際に他のエンドポイントまで詰まる。専用の固定サイズのスレッドで実行し、
+待ち行列が上限を超えた場合は503で即座に拒否する（bcryptはハッシュ計算中にGILを解放する）。
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.security import hash_password, verify_password
+
+
+@dataclass
+class HasherMetrics:
+    """エグゼキューターの待ち行列・処理時間の統計"""
+
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    running: int = 0
+    queued: int = 0
+    queued_peak: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    run_seconds_total: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class PasswordHasher:
+    """上限付きの待ち行列を持つbcrypt専用エグゼキューター"""
+
+    def __init__(self, workers: int, max_queue: int):
+        """
+        Args:
+            workers: ハッシュ計算に使うスレッド数
+            max_queue: 実行待ちにできる最大件数（超えた場合は拒否）
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.metrics = HasherMetrics()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+
+    async def run[R](self, func: Callable[..., R], *args: Any) -> R:
+        """
+        専用スレッドで関数を実行し、結果を待つ
+
+        Raises:
+            ServiceUnavailableException: 待ち行列が上限に達している場合
+        """
+        metrics = self.metrics
+        with metrics._lock:
+            if metrics.running + metrics.queued >= self.workers + self.max_queue:
+                metrics.rejected += 1
+                raise ServiceUnavailableException(
+                    "Authentication service is busy, please retry"
+                )
+            metrics.submitted += 1
+            metrics.queued += 1
+            metrics.queued_peak = max(metrics.queued_peak, metrics.queued)
+        submitted_at = time.perf_counter()
+
+        def task() -> R:
+            started_at = time.perf_counter()
+            wait = started_at - submitted_at
+            with metrics._lock:
+                metrics.queued -= 1
+                metrics.running += 1
+                metrics.wait_seconds_total += wait
+                metrics.wait_seconds_max = max(metrics.wait_seconds_max, wait)
+            try:
+                return func(*args)
+            finally:
+                with metrics._lock:
+                    metrics.running -= 1
+                    metrics.completed += 1
+                    metrics.run_seconds_total += time.perf_counter() - started_at
+
+        def on_done(future: Future) -> None:
+            # 実行前にキャンセルされた（クライアント切断など）場合も待ち行列から外す
+            if future.cancelled():
+                with metrics._lock:
+                    metrics.queued -= 1
+
+        future = self._executor.submit(task)
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def snapshot(self) -> dict:
+        """現在の待ち行列の深さと累積統計を辞書で返す"""
+        metrics = self.metrics
+        with metrics._lock:
+            completed = metrics.completed
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": metrics.running,
+                "queued": metrics.queued,
+                "queued_peak": metrics.queued_peak,
+                "submitted": metrics.submitted,
+                "completed": completed,
+                "rejected": metrics.rejected,
+                "wait_seconds_avg": (
+                    metrics.wait_seconds_total / completed if completed else 0.0
+                ),
+                "wait_seconds_max": metrics.wait_seconds_max,
+                "run_seconds_avg": (
+                    metrics.run_seconds_total / completed if completed else 0.0
+                ),
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """専用エグゼキューターでパスワードをハッシュ化"""
+    return await password_hasher.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """専用エグゼキューターでパスワードを検証"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
@@ -1,21 +1,146 @@
+import asyncio
 import os
+import time
+from typing import TYPE_CHECKING, Any
+from weakref import WeakKeyDictionary
 
-import redis.asyncio as redis
+import redis
+import redis.asyncio as aioredis
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.client import Pipeline
 
-redis_client = None
+from app.core.metrics import observe_redis_command
 
+if TYPE_CHECKING:
+    # 型チェック時のみクライアントを基底にし、super() とクライアントの属性を解決させる
+    _AsyncRedisBase = aioredis.Redis
+    _SyncRedisBase = redis.Redis
+else:
+    _AsyncRedisBase = object
+    _SyncRedisBase = object
 
-async def init_redis():
+redis_client: aioredis.Redis | None = None
+# 同期コード（同期セッションのヘルパー・Celeryワーカー）用のクライアント。初回利用時に生成する
+sync_redis_client: redis.Redis | None = None
+# Celeryワーカーのイベントループごとのクライアント。非同期の接続は作成したループでしか
+# 使えないため、ループ（スレッド）ごとに分けて保持する（ループが破棄されるとエントリも消える）
+_loop_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis] = (
+    WeakKeyDictionary()
+)
+
+
+class _MeteredAsyncPipeline(AsyncPipeline):
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        start = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            observe_redis_command("PIPELINE", time.perf_counter() - start)
+
+
+class _MeteredAsyncCommandsMixin(_AsyncRedisBase):
+    """コマンドごとの所要時間を記録する非同期クライアント用ミックスイン"""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            observe_redis_command(args[0], time.perf_counter() - start)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> AsyncPipeline:
+        return _MeteredAsyncPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class MeteredRedis(_MeteredAsyncCommandsMixin, aioredis.Redis):  # type: ignore[misc]
+    """計測付きの非同期クライアント"""
+
+
+class _MeteredSyncPipeline(Pipeline):
+    def execute(self, raise_on_error: bool = True) -> list[Any]:
+        start = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            observe_redis_command("PIPELINE", time.perf_counter() - start)
+
+
+class _MeteredSyncCommandsMixin(_SyncRedisBase):
+    """コマンドごとの所要時間を記録する同期クライアント用ミックスイン"""
+
+    def execute_command(self, *args: Any, **options: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            observe_redis_command(args[0], time.perf_counter() - start)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> Pipeline:
+        return _MeteredSyncPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+class MeteredSyncRedis(_MeteredSyncCommandsMixin, redis.Redis):
+    """計測付きの同期クライアント"""
+
+
+def _redis_url() -> str:
+    return os.environ.get("REDIS_URL", "redis://localhost:6379/0")
+
+
+async def init_redis() -> None:
     global redis_client
-    redis_url = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
-    redis_client = redis.from_url(redis_url, encoding="utf8", decode_responses=True)
+    redis_client = MeteredRedis.from_url(
+        _redis_url(), encoding="utf8", decode_responses=True
+    )
 
 
-async def close_redis():
+async def close_redis() -> None:
     global redis_client
     if redis_client:
         await redis_client.close()
 
 
-def get_redis_client() -> redis.Redis:
-    return redis_client
+def init_loop_redis(loop: asyncio.AbstractEventLoop) -> None:
+    """
+    イベントループ専用の非同期クライアントを登録（Celeryワーカー用）
+
+    プロセス共有のクライアント（init_redis）がない場合に、そのループ上の
+    get_redis_client() が返すクライアントになる。接続は最初のコマンドで張られる。
+    """
+    _loop_clients[loop] = MeteredRedis.from_url(
+        _redis_url(), encoding="utf8", decode_responses=True
+    )
+
+
+async def close_loop_redis() -> None:
+    """実行中のループ専用のクライアントを閉じて登録を解除"""
+    client = _loop_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def get_redis_client() -> aioredis.Redis | None:
+    if redis_client is not None:
+        return redis_client
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    return _loop_clients.get(loop)
+
+
+def get_sync_redis_client() -> redis.Redis:
+    global sync_redis_client
+    if sync_redis_client is None:
+        sync_redis_client = MeteredSyncRedis.from_url(
+            _redis_url(), encoding="utf8", decode_responses=True
+        )
+    return sync_redis_client
@@ -1,9 +1,15 @@
+import hashlib
+import time
 from datetime import UTC, datetime, timedelta
 
 import bcrypt
 from jose import JWTError, jwt
 
 from app.core.config import settings
+from app.utils.ttl_cache import TTLCache
+
+# 検証済みトークンのクレーム（キーはトークンのSHA-256）。有効期限(exp)まで保持する
+_claims_cache: TTLCache[str, dict] = TTLCache(maxsize=settings.JWT_CACHE_MAX_SIZE)
 
 
 def hash_password(password: str) -> str:
@@ -39,10 +45,25 @@ def create_access_token(subject: int, email: str, role: str = "user") -> str:
 
 
 def decode_access_token(token: str) -> dict | None:
+    # 同じトークンの署名検証・デコードはプロセス内で1回だけ行う
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = _claims_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
     try:
         payload = jwt.decode(
             token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
+
+    exp = payload.get("exp")
+    if exp is not None:
+        _claims_cache.set(key, dict(payload), ttl=exp - time.time())
+    return payload
+
+
+def clear_token_cache() -> None:
+    """検証済みトークンのキャッシュを破棄（鍵のローテーション時・テスト用）"""
+    _claims_cache.clear()
@@ -0,0 +1,104 @@
+"""
+コネクションプールのメトリクス収集
+
+チェックアウト待ち時間・待機回数・オーバーフロー使用量を記録し、
+ワーカーごとのプールサイズ調整の判断材料にする。
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+if TYPE_CHECKING:
+    # 型チェック時のみQueuePoolを基底にし、super() とプールのメソッドを解決させる
+    _PoolBase = QueuePool
+else:
+    _PoolBase = object
+
+
+@dataclass
+class PoolMetrics:
+    """プール単位のチェックアウト統計"""
+
+    name: str
+    max_overflow: int = 0
+    checkouts: int = 0
+    waits: int = 0
+    checkout_seconds_total: float = 0.0
+    checkout_seconds_max: float = 0.0
+    overflow_peak: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_checkout(self, seconds: float, waited: bool, overflow: int) -> None:
+        """チェックアウト1回分の計測結果を記録"""
+        with self._lock:
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+            self.checkout_seconds_total += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+            self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def snapshot(self, pool: QueuePool) -> dict:
+        """現在のプール状態と累積統計を辞書で返す"""
+        with self._lock:
+            avg = (
+                self.checkout_seconds_total / self.checkouts if self.checkouts else 0.0
+            )
+            return {
+                "pool": self.name,
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": self.max_overflow,
+                "overflow_peak": self.overflow_peak,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "checkout_seconds_avg": avg,
+                "checkout_seconds_max": self.checkout_seconds_max,
+            }
+
+
+class _MeteredPoolMixin(_PoolBase):
+    """connect() の所要時間を計測するQueuePool用ミックスイン"""
+
+    metrics: PoolMetrics | None = None
+
+    def connect(self) -> PoolProxiedConnection:
+        metrics = self.metrics
+        if metrics is None:
+            return super().connect()
+
+        # アイドル接続がなく、オーバーフロー枠も使い切っている場合は待機が発生する
+        saturated = (
+            metrics.max_overflow >= 0
+            and self.checkedin() == 0
+            and self.checkedout() >= self.size() + metrics.max_overflow
+        )
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            # タイムアウトした待機も記録する
+            metrics.record_checkout(
+                time.perf_counter() - start, saturated, max(self.overflow(), 0)
+            )
+
+    def recreate(self) -> QueuePool:
+        # dispose() などで再生成されたプールにも計測を引き継ぐ
+        pool = super().recreate()
+        if isinstance(pool, _MeteredPoolMixin):
+            pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    """同期エンジン用の計測付きプール"""
+
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    """非同期エンジン用の計測付きプール"""
@@ -0,0 +1,56 @@
+"""
+クエリのメトリクス収集
+
+エンジンのカーソル実行イベントでクエリ1件ごとの所要時間を計測し、
+Prometheusのメトリクスとリクエストごとの集計に記録する。
+"""
+
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExceptionContext
+
+from app.core.metrics import observe_db_query
+
+_START_KEY = "query_start_times"
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """
+    エンジンにクエリ計測のイベントリスナーを登録
+
+    Args:
+        engine: 同期エンジン（非同期エンジンは .sync_engine を渡す）
+        name: メトリクスのラベル（sync / async）
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        many: bool,
+    ) -> None:
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        many: bool,
+    ) -> None:
+        observe_db_query(name, time.perf_counter() - conn.info[_START_KEY].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context: ExceptionContext) -> None:
+        # 失敗したクエリも所要時間を記録する
+        conn = exception_context.connection
+        starts = conn.info.get(_START_KEY) if conn is not None else None
+        if starts:
+            observe_db_query(name, time.perf_counter() - starts.pop())
@@ -1,13 +1,96 @@
+from collections.abc import AsyncIterator
 from contextlib import contextmanager
+from typing import cast
 
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
+from app.db.pool_metrics import (
+    MeteredAsyncAdaptedQueuePool,
+    MeteredQueuePool,
+    PoolMetrics,
+)
+from app.db.query_metrics import instrument_engine
 
 DATABASE_URL = settings.DATABASE_URL
 
+# 同期URLから対応する非同期ドライバのURLへの変換表
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_database_url(url: str) -> str:
+    """
+    同期ドライバのDB URLを非同期ドライバ（asyncpg / aiosqlite）のURLに変換
+
+    Args:
+        url: 同期ドライバのDB URL（例: postgresql://...）
+
+    Returns:
+        非同期ドライバのDB URL（例: postgresql+asyncpg://...）
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"Unsupported database backend for async engine: {backend}")
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+def _engine_options() -> dict:
+    """Settingsからエンジン・プール共通のオプションを組み立てる"""
+    # DB_ECHO のSQLログはロガー経由で出す（app.core.logging_config）
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 # Engine is globally configured here
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(DATABASE_URL, poolclass=MeteredQueuePool, **_engine_options())
+
+# 非同期ルーター用のエンジン（asyncpg）
+async_engine = create_async_engine(
+    to_async_database_url(DATABASE_URL),
+    poolclass=MeteredAsyncAdaptedQueuePool,
+    **_engine_options(),
+)
+
+# プールメトリクス（管理APIから参照）
+sync_pool_metrics = PoolMetrics(name="sync", max_overflow=settings.DB_MAX_OVERFLOW)
+async_pool_metrics = PoolMetrics(name="async", max_overflow=settings.DB_MAX_OVERFLOW)
+cast(MeteredQueuePool, engine.pool).metrics = sync_pool_metrics
+cast(
+    MeteredAsyncAdaptedQueuePool, async_engine.sync_engine.pool
+).metrics = async_pool_metrics
+
+# クエリ数・所要時間（Prometheusの /metrics で公開）
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
+
+def get_pool_stats() -> list[dict]:
+    """同期・非同期エンジンのプール統計を取得"""
+    return [
+        sync_pool_metrics.snapshot(cast(QueuePool, engine.pool)),
+        async_pool_metrics.snapshot(cast(QueuePool, async_engine.sync_engine.pool)),
+    ]
+
+
+# expire_on_commit=False: コミット後の属性アクセスで暗黙のIOを発生させない
+async_session_factory = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
 
 
 def get_session():
@@ -16,6 +99,12 @@ def get_session():
         yield session
 
 
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI依存性注入用の非同期セッション生成"""
+    async with async_session_factory() as session:
+        yield session
+
+
 @contextmanager
 def get_session_context():
     """
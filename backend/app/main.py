@@ -1,50 +1,29 @@
 import logging
-import sys
 from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_mcp import FastApiMCP
-from slowapi import Limiter
-from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
 from sqlmodel import Session, select
 
 from app.api.dependencies import get_current_user
 from app.api.error_handlers import register_error_handlers
 from app.api.routers import admin, ai, auth, points, projects, sprints, tasks
 from app.core.config import settings
+from app.core.logging_config import setup_logging
+from app.core.metrics import render_metrics
 from app.core.redis import close_redis, init_redis
 from app.db.session import get_session
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.rate_limit import default_rate_limit
 from app.models import Project, Task, User
+from app.utils.soft_delete import filter_active
 
-# 構造化ログの設定
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("server.log", encoding="utf-8"),
-    ],
-)
+# 構造化ログの設定（キュー経由で専用スレッドから書き出す）
+setup_logging()
 
 logger = logging.getLogger(__name__)
 
-# レート制限の設定（fastapi-mcpとの互換性を考慮して手動実装）
-limiter = Limiter(
-    key_func=get_remote_address, default_limits=["10/minute"], storage_uri="memory://"
-)
-
-
-# レート制限超過時のエラーハンドラー
-def rate_limit_handler(request: any, exc: RateLimitExceeded):
-    """レート制限超過時のハンドラー"""
-    return {
-        "detail": f"レート制限を超過しました: {exc.detail}",
-        "status": status.HTTP_429_TOO_MANY_REQUESTS,
-    }
-
-
 app = FastAPI(
     title="TaskForge API",
     description="API for the TaskForge AI-powered project management app.",
@@ -63,8 +42,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# ルートごとのレイテンシ・処理中の件数・DBクエリ数（最も外側で計測する）
+app.add_middleware(MetricsMiddleware)
+
 # 1. MCPの初期化
 mcp = FastApiMCP(
     fastapi=app, name="TaskForge API MCP", description="MCP server for TaskForge API"
@@ -79,7 +62,9 @@ def list_projects_mcp(
     current_user: User = Depends(get_current_user),
 ):
     """List all projects available in TaskForge. Requires authentication."""
-    statement = select(Project).where(Project.owner_id == current_user.id)
+    statement = filter_active(
+        select(Project).where(Project.owner_id == current_user.id), Project
+    )
     projects_list = session.exec(statement).all()
     return projects_list
 
@@ -92,11 +77,11 @@ def list_tasks_mcp(
 ):
     """List all tasks for a specific project by project_id. Requires authentication."""
     project = session.get(Project, project_id)
-    if not project:
+    if not project or project.deleted_at is not None:
         raise HTTPException(status_code=404, detail="Project not found")
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
-    statement = select(Task).where(Task.project_id == project_id)
+    statement = filter_active(select(Task).where(Task.project_id == project_id), Task)
     tasks_list = session.exec(statement).all()
     return tasks_list
 
@@ -108,16 +93,18 @@ async def lifespan(app: FastAPI):
     await close_redis()
 
 
-app.lifespan = lifespan
+app.router.lifespan_context = lifespan
 
 # ── ルーター登録 ──────────────────────────────────────────────────────────────
-app.include_router(auth.router, prefix="/api")
-app.include_router(projects.router, prefix="/api")
-app.include_router(tasks.router, prefix="/api")
-app.include_router(sprints.router, prefix="/api")
-app.include_router(ai.router, prefix="/api")
-app.include_router(points.router, prefix="/api")
-app.include_router(admin.router, prefix="/api")
+# /api 以下には既定のレート制限をかける（ルートごとのポリシーは各ルーターで追加）
+api_dependencies = [Depends(default_rate_limit)]
+app.include_router(auth.router, prefix="/api", dependencies=api_dependencies)
+app.include_router(projects.router, prefix="/api", dependencies=api_dependencies)
+app.include_router(tasks.router, prefix="/api", dependencies=api_dependencies)
+app.include_router(sprints.router, prefix="/api", dependencies=api_dependencies)
+app.include_router(ai.router, prefix="/api", dependencies=api_dependencies)
+app.include_router(points.router, prefix="/api", dependencies=api_dependencies)
+app.include_router(admin.router, prefix="/api", dependencies=api_dependencies)
 
 
 @app.get("/health")
@@ -149,6 +136,13 @@ async def health_check(session: Session = Depends(get_session)):
     return health_status
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus形式のメトリクス"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 # ── MCP設定（重要：ルーター登録の後に書く！） ───────────────────────────────────
 
 # 3. SSEエンドポイントをマウントします
@@ -0,0 +1,60 @@
+"""
+HTTPリクエストのメトリクスを記録するASGIミドルウェア
+
+ルーティング後に FastAPI が scope["route"] に設定するルートのテンプレート
+（例: /api/projects/{project_id}/tasks）をラベルにし、パスパラメータごとに
+系列が増えないようにする。レスポンスの送信完了（ストリーミングを含む）までを計測する。
+"""
+
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DB_SECONDS,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_PROGRESS,
+    UNMATCHED_ROUTE,
+    RequestDbStats,
+    request_db_stats,
+)
+
+
+class MetricsMiddleware:
+    """ルートごとのレイテンシ・処理中の件数・DBクエリ数を記録"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            request_db_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(
+                elapsed
+            )
+            HTTP_REQUEST_DB_QUERIES.labels(route).observe(stats.queries)
+            HTTP_REQUEST_DB_SECONDS.labels(route).observe(stats.seconds)
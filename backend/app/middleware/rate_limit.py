@@ -1,20 +1,164 @@
-"""Rate limiting middleware for API endpoints."""
-
-from fastapi import Request, status
-from slowapi import Limiter
-from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
-
-# レート制限の設定
-# デフォルト: 1分あたり10回のリクエストを許可
-limiter = Limiter(
-    key_func=get_remote_address, default_limits=["10/minute"], storage_uri="memory://"
-)
-
-
-def rate_limit_handler(request: Request, exc: RateLimitExceeded):
-    """レート制限超過時のハンドラー"""
-    return {
-        "detail": f"レート制限を超過しました: {exc.detail}",
-        "status": status.HTTP_429_TOO_MANY_REQUESTS,
-    }
+"""
+Redisのトークンバケットによるレート制限
+
+バケットの状態をRedisに置き、残量の補充・消費・有効期限の更新をLuaスクリプトで
+原子的に行う。全ワーカー・全プロセスで同じ上限を共有し、再起動してもリセットされない。
+時刻はRedisサーバーの TIME を使うため、ワーカー間の時計のずれの影響を受けない。
+
+認証済みのリクエストはユーザーID、それ以外はクライアントのIPアドレスごとに制限する。
+ルートごとのポリシーは依存関係として付ける:
+
+    @router.post("/login", dependencies=[Depends(RateLimit("auth:login", "10/minute"))])
+
+Redis未接続・障害時は制限しない（リクエストは通す）。
+"""
+
+import hashlib
+import logging
+import math
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from redis.exceptions import NoScriptError, RedisError
+
+from app.core.config import settings
+from app.core.exceptions import RateLimitExceededException
+from app.core.redis import get_redis_client
+from app.core.security import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# 戻り値: {許可したか(0/1), 残りトークン数, 次のトークンまでのミリ秒}
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local period_ms = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local rate = capacity / period_ms
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = math.ceil((cost - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+-- 満タンに戻るまで保持すれば十分（満タンのバケットはキーがなくても同じ）
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate) + 1000)
+return {allowed, math.floor(tokens), retry_after}
+"""
+_TOKEN_BUCKET_SHA = hashlib.sha1(_TOKEN_BUCKET_SCRIPT.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """レート制限のポリシー（period 秒あたり limit 回、最大 limit 回まで連続で許可）"""
+
+    name: str
+    limit: int
+    period: int
+
+    @classmethod
+    def parse(cls, name: str, rate: str) -> "RateLimitPolicy":
+        """
+        "回数/期間" 形式（例: "10/minute"）からポリシーを作成
+
+        Raises:
+            ValueError: 形式が不正な場合
+        """
+        count, _, unit = rate.partition("/")
+        period = _PERIODS.get(unit.strip().lower().removesuffix("s"))
+        if period is None or not count.strip().isdigit() or int(count) <= 0:
+            raise ValueError(f"Invalid rate limit: {rate!r}")
+        return cls(name=name, limit=int(count), period=period)
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    remaining: int
+    retry_after_ms: int
+
+
+def client_identity(request: Request) -> str:
+    """制限の単位（認証済みならユーザーID、それ以外はIPアドレス）"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        # 検証済みトークンはプロセス内にキャッシュされるため、ほぼ追加コストなし
+        claims = decode_access_token(token)
+        if claims and claims.get("sub"):
+            return f"user:{claims['sub']}"
+    host = request.client.host if request.client else "unknown"
+    return f"ip:{host}"
+
+
+async def consume(
+    policy: RateLimitPolicy, identity: str, cost: int = 1
+) -> RateLimitResult | None:
+    """
+    バケットからトークンを消費
+
+    Returns:
+        判定結果（Redis未接続・障害時はNone）
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+    key = f"ratelimit:{policy.name}:{identity}"
+    args = (1, key, policy.limit, policy.period * 1000, cost)
+    try:
+        try:
+            reply = await client.evalsha(_TOKEN_BUCKET_SHA, *args)  # type: ignore[misc]
+        except NoScriptError:
+            # スクリプト未登録（Redisの再起動後など）の場合だけ本文を送る
+            reply = await client.eval(_TOKEN_BUCKET_SCRIPT, *args)  # type: ignore[misc]
+    except RedisError as e:
+        logger.warning(f"Rate limit check failed for {policy.name}: {e}")
+        return None
+    allowed, remaining, retry_after_ms = (int(value) for value in reply)
+    return RateLimitResult(bool(allowed), remaining, retry_after_ms)
+
+
+class RateLimit:
+    """ルートに付けるレート制限の依存関係"""
+
+    def __init__(self, name: str, rate: str):
+        """
+        Args:
+            name: ポリシー名（Redisのキーに使う。同じ名前のルートは上限を共有する）
+            rate: "回数/期間" 形式の上限（例: "10/minute"）
+        """
+        self.policy = RateLimitPolicy.parse(name, rate)
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        result = await consume(self.policy, client_identity(request))
+        if result is None:
+            return
+        if not result.allowed:
+            raise RateLimitExceededException(
+                retry_after=max(1, math.ceil(result.retry_after_ms / 1000))
+            )
+        response.headers["X-RateLimit-Limit"] = str(self.policy.limit)
+        response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+
+
+# /api 以下の全エンドポイントに付ける既定のポリシー
+default_rate_limit = RateLimit("api", settings.RATE_LIMIT_DEFAULT)
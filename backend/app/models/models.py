@@ -3,13 +3,28 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import JSON, Column, Index, text
 from sqlmodel import Field, Relationship, SQLModel
 
+# 論理削除されていない行だけを対象にした部分インデックスの条件
+ACTIVE_ROWS = text("deleted_at IS NULL")
+# 論理削除された行だけを対象にした部分インデックスの条件（保持期間を過ぎた行の削除用）
+DELETED_ROWS = text("deleted_at IS NOT NULL")
+
 
 class User(SQLModel, table=True):
     """ユーザーモデル"""
 
     __tablename__ = "user"
+    __table_args__ = (
+        # 保持期間を過ぎた論理削除行の削除
+        Index(
+            "ix_user_deleted_at",
+            "deleted_at",
+            postgresql_where=DELETED_ROWS,
+            sqlite_where=DELETED_ROWS,
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     email: str = Field(unique=True, index=True, nullable=False)
@@ -29,6 +44,24 @@ class User(SQLModel, table=True):
 class Project(SQLModel, table=True):
     """プロジェクトモデル"""
 
+    __table_args__ = (
+        # list_projects: owner_id + 未削除, id順
+        Index(
+            "ix_project_owner_active",
+            "owner_id",
+            "id",
+            postgresql_where=ACTIVE_ROWS,
+            sqlite_where=ACTIVE_ROWS,
+        ),
+        # 保持期間を過ぎた論理削除行の削除
+        Index(
+            "ix_project_deleted_at",
+            "deleted_at",
+            postgresql_where=DELETED_ROWS,
+            sqlite_where=DELETED_ROWS,
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(nullable=False)
     description: Optional[str] = Field(default=None)
@@ -46,6 +79,24 @@ class Project(SQLModel, table=True):
 class Sprint(SQLModel, table=True):
     """スプリントモデル"""
 
+    __table_args__ = (
+        # list_sprints: project_id + 未削除
+        Index(
+            "ix_sprint_project_active",
+            "project_id",
+            "id",
+            postgresql_where=ACTIVE_ROWS,
+            sqlite_where=ACTIVE_ROWS,
+        ),
+        # 保持期間を過ぎた論理削除行の削除
+        Index(
+            "ix_sprint_deleted_at",
+            "deleted_at",
+            postgresql_where=DELETED_ROWS,
+            sqlite_where=DELETED_ROWS,
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     project_id: int = Field(foreign_key="project.id", ondelete="CASCADE", nullable=False)
     name: str = Field(nullable=False)
@@ -63,6 +114,56 @@ class Sprint(SQLModel, table=True):
 class Task(SQLModel, table=True):
     """タスクモデル"""
 
+    __table_args__ = (
+        # list_tasks: project_id + 未削除, id順（キーセットページネーション）
+        Index(
+            "ix_task_project_active",
+            "project_id",
+            "id",
+            postgresql_where=ACTIVE_ROWS,
+            sqlite_where=ACTIVE_ROWS,
+        ),
+        # list_tasks?sort=priority: priority DESC, id ASC
+        Index(
+            "ix_task_project_active_priority",
+            "project_id",
+            text("priority DESC"),
+            "id",
+            postgresql_where=ACTIVE_ROWS,
+            sqlite_where=ACTIVE_ROWS,
+        ),
+        # list_tasks?status=...
+        Index(
+            "ix_task_project_active_status",
+            "project_id",
+            "status",
+            "id",
+            postgresql_where=ACTIVE_ROWS,
+            sqlite_where=ACTIVE_ROWS,
+        ),
+        # list_tasks?sprint_id=...
+        Index(
+            "ix_task_project_active_sprint",
+            "project_id",
+            "sprint_id",
+            "id",
+            postgresql_where=ACTIVE_ROWS,
+            sqlite_where=ACTIVE_ROWS,
+        ),
+        # ON DELETE CASCADE・連鎖削除の復元（deleted_at = 親の削除時刻）用
+        Index("ix_task_project_id", "project_id"),
+        # 保持期間を過ぎた論理削除行の削除・スプリント削除時の参照確認
+        Index(
+            "ix_task_deleted_at",
+            "deleted_at",
+            postgresql_where=DELETED_ROWS,
+            sqlite_where=DELETED_ROWS,
+        ),
+        Index("ix_task_sprint_id", "sprint_id"),
+        # list_task_changes: 更新日時順（論理削除行も含む）
+        Index("ix_task_project_updated", "project_id", "updated_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     project_id: int = Field(foreign_key="project.id", ondelete="CASCADE", nullable=False)
     sprint_id: Optional[int] = Field(default=None, foreign_key="sprint.id")
@@ -123,3 +224,21 @@ class PointsHistory(SQLModel, table=True):
 
     # Relationships
     user: User = Relationship(back_populates="points_history")
+
+
+class ArchivedRecord(SQLModel, table=True):
+    """保持期間を過ぎて元のテーブルから移した論理削除行"""
+
+    __tablename__ = "archived_record"
+    __table_args__ = (
+        Index("ix_archived_record_source", "source_table", "record_id"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    source_table: str = Field(nullable=False)
+    record_id: int = Field(nullable=False)
+    data: dict = Field(sa_column=Column(JSON, nullable=False))  # 元の行の全カラム
+    deleted_at: datetime = Field(nullable=False)
+    archived_at: datetime = Field(
+        default_factory=datetime.utcnow, index=True, nullable=False
+    )
@@ -0,0 +1,124 @@
+"""
+実績の解除判定
+
+実績カタログ（必要ポイントの昇順）をプロセス内にキャッシュし、二分探索で
+現在のポイントで到達している実績だけを候補にする。解除済みかどうかは候補全体を
+1クエリで確認し、未解除分をまとめて登録する。
+
+カタログの無効化は TTL（ACHIEVEMENT_CATALOG_TTL_SECONDS）のみに頼る。実績はアプリからは
+書き込まれず、マイグレーション（別プロセス）でだけ追加・変更されるため、各ワーカーの
+キャッシュを直接破棄する手段がない。実績の追加・変更は最大で TTL の間反映が遅れる。
+
+以前に到達していたが未解除の実績（実績の追加前にポイントを得ていた場合など）も
+解除できるよう、候補は新たに越えたしきい値に限定しない。
+"""
+
+from bisect import bisect_right
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import insert
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.core.config import settings
+from app.models import Achievement, User, UserAchievement
+from app.utils.ttl_cache import TTLCache
+
+# (必要ポイント, 実績ID) を必要ポイントの昇順に並べたカタログ
+Catalog = list[tuple[int, int]]
+
+_CATALOG_KEY = "catalog"
+_catalog_cache: TTLCache[str, Catalog] = TTLCache(
+    maxsize=1, ttl=settings.ACHIEVEMENT_CATALOG_TTL_SECONDS
+)
+
+
+def invalidate_catalog() -> None:
+    """このプロセスの実績カタログのキャッシュを破棄（テストなど、同じプロセスで実績を変えたとき用）"""
+    _catalog_cache.clear()
+
+
+def _build_catalog(rows: Iterable[tuple[Any, int]]) -> Catalog:
+    catalog = sorted((points, achievement_id) for achievement_id, points in rows)
+    _catalog_cache.set(_CATALOG_KEY, catalog)
+    return catalog
+
+
+def _load_catalog(session: Session) -> Catalog:
+    catalog = _catalog_cache.get(_CATALOG_KEY)
+    if catalog is None:
+        rows = session.exec(select(Achievement.id, Achievement.points)).all()
+        catalog = _build_catalog(rows)
+    return catalog
+
+
+async def _load_catalog_async(session: AsyncSession) -> Catalog:
+    catalog = _catalog_cache.get(_CATALOG_KEY)
+    if catalog is None:
+        rows = (await session.exec(select(Achievement.id, Achievement.points))).all()
+        catalog = _build_catalog(rows)
+    return catalog
+
+
+def _reached(catalog: Catalog, total_points: int) -> list[int]:
+    """必要ポイントが total_points 以下の実績IDを返す"""
+    upper = bisect_right(catalog, (total_points, float("inf")))
+    return [achievement_id for _, achievement_id in catalog[:upper]]
+
+
+def _unlock_query(user: User, candidates: list[int]) -> SelectOfScalar[int]:
+    return select(UserAchievement.achievement_id).where(
+        UserAchievement.user_id == user.id,
+        col(UserAchievement.achievement_id).in_(candidates),
+    )
+
+
+def _new_unlocks(
+    user: User, candidates: list[int], unlocked: Iterable[int]
+) -> list[dict]:
+    unlocked = set(unlocked)
+    # unlocked_at はタイムゾーンなしの列（UTC）のため、naiveな値で渡す（asyncpgはawareを拒否する）
+    now = datetime.now(UTC).replace(tzinfo=None)
+    return [
+        {"user_id": user.id, "achievement_id": achievement_id, "unlocked_at": now}
+        for achievement_id in candidates
+        if achievement_id not in unlocked
+    ]
+
+
+def check_and_unlock(session: Session, user: User) -> list[int]:
+    """
+    到達した実績を解除する（コミットは呼び出し側で行う）
+
+    Args:
+        session: データベースセッション
+        user: ポイント更新後のユーザー
+
+    Returns:
+        新たに解除した実績のID
+    """
+    candidates = _reached(_load_catalog(session), user.total_points)
+    if not candidates:
+        return []
+    unlocked = session.exec(_unlock_query(user, candidates)).all()
+    new = _new_unlocks(user, candidates, unlocked)
+    if new:
+        # ORM経由だと1件ずつINSERTされるため、executemanyの一括INSERTにする
+        session.exec(insert(UserAchievement), params=new)
+    return [row["achievement_id"] for row in new]
+
+
+async def check_and_unlock_async(session: AsyncSession, user: User) -> list[int]:
+    """check_and_unlock の非同期セッション版"""
+    catalog = await _load_catalog_async(session)
+    candidates = _reached(catalog, user.total_points)
+    if not candidates:
+        return []
+    unlocked = (await session.exec(_unlock_query(user, candidates))).all()
+    new = _new_unlocks(user, candidates, unlocked)
+    if new:
+        await session.exec(insert(UserAchievement), params=new)
+    return [row["achievement_id"] for row in new]
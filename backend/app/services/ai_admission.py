@@ -0,0 +1,214 @@
+"""
+AI分解ジョブの受付制御（Redis）
+
+ジョブをキューに入れる前に、以下をLuaスクリプトで原子的に判定・記録する。
+
+- 重複: 同じプロジェクト・同じ要件（正規化後）・同じスプリントのジョブが実行中なら、
+  新しいジョブを作らずに既存のジョブIDを返す
+- 同時実行数: ユーザーごと・プロジェクトごとの実行中ジョブ数の上限
+- トークン予算: ユーザーごとの1日（UTC）あたりの消費トークン数の上限。受付時に
+  見積もり分を予約し、ジョブ終了時に実際の消費量で精算する
+
+実行中のジョブはジョブごとの期限（リース）付きで記録し、ワーカーの異常終了などで
+終了処理が行われなくても期限が来れば枠を解放する。
+Redis未接続・障害時は制限しない（ジョブは受け付ける）。
+"""
+
+import hashlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+from app.services.ai_cache import normalize
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ai_admission"
+
+# 戻り値: {結果, ジョブID, 受付前のプロジェクトの実行中ジョブ数}
+# 結果は admitted / duplicate / user_busy / project_busy / budget
+_ADMIT_SCRIPT = """
+local user_jobs, project_jobs, dedup, budget = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local job_id = ARGV[1]
+local now, lease = tonumber(ARGV[2]), tonumber(ARGV[3])
+local max_user, max_project = tonumber(ARGV[4]), tonumber(ARGV[5])
+local budget_limit, estimate = tonumber(ARGV[6]), tonumber(ARGV[7])
+local budget_ttl = tonumber(ARGV[8])
+
+local existing = redis.call('GET', dedup)
+if existing then
+    return {'duplicate', existing, 0}
+end
+
+-- 期限切れのリース（終了処理が行われなかったジョブ）を外す
+redis.call('ZREMRANGEBYSCORE', user_jobs, '-inf', now)
+redis.call('ZREMRANGEBYSCORE', project_jobs, '-inf', now)
+if max_user > 0 and redis.call('ZCARD', user_jobs) >= max_user then
+    return {'user_busy', '', 0}
+end
+local project_in_flight = redis.call('ZCARD', project_jobs)
+if max_project > 0 and project_in_flight >= max_project then
+    return {'project_busy', '', project_in_flight}
+end
+local used = tonumber(redis.call('GET', budget) or '0')
+if budget_limit > 0 and used + estimate > budget_limit then
+    return {'budget', '', project_in_flight}
+end
+
+redis.call('ZADD', user_jobs, now + lease, job_id)
+redis.call('EXPIRE', user_jobs, lease)
+redis.call('ZADD', project_jobs, now + lease, job_id)
+redis.call('EXPIRE', project_jobs, lease)
+redis.call('SET', dedup, job_id, 'EX', lease)
+redis.call('INCRBY', budget, estimate)
+redis.call('EXPIRE', budget, budget_ttl)
+return {'admitted', job_id, project_in_flight}
+"""
+
+# 実行中の記録を外し、予約したトークン数を実際の消費量で精算する
+_RELEASE_SCRIPT = """
+local user_jobs, project_jobs, dedup, budget = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+local job_id = ARGV[1]
+redis.call('ZREM', user_jobs, job_id)
+redis.call('ZREM', project_jobs, job_id)
+if redis.call('GET', dedup) == job_id then
+    redis.call('DEL', dedup)
+end
+local delta = tonumber(ARGV[2])
+if delta ~= 0 and redis.call('EXISTS', budget) == 1 then
+    redis.call('INCRBY', budget, delta)
+end
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class Admission:
+    """受付の判定結果"""
+
+    status: str  # admitted / duplicate / user_busy / project_busy / budget
+    job_id: str | None = None
+    project_in_flight: int = 0  # 受付前の同じプロジェクトの実行中ジョブ数
+
+    @property
+    def accepted(self) -> bool:
+        return self.status in ("admitted", "duplicate")
+
+
+@dataclass(frozen=True)
+class JobKeys:
+    """ジョブの受付・終了処理で使うキー一式"""
+
+    user_jobs: str
+    project_jobs: str
+    dedup: str
+    budget: str
+
+    def as_list(self) -> list[str]:
+        return [self.user_jobs, self.project_jobs, self.dedup, self.budget]
+
+
+def _budget_day(now: datetime) -> str:
+    return now.strftime("%Y%m%d")
+
+
+def job_keys(
+    user_id: int,
+    project_id: int,
+    prompt: str,
+    sprint_id: int | None,
+    budget_day: str | None = None,
+) -> JobKeys:
+    """
+    ジョブのキーを作成
+
+    Args:
+        budget_day: トークン予算の集計日（YYYYMMDD、UTC）。省略時は今日
+    """
+    material = json.dumps(
+        {"prompt": normalize(prompt), "sprint_id": sprint_id},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(material.encode("utf-8")).hexdigest()
+    day = budget_day or _budget_day(datetime.now(UTC))
+    return JobKeys(
+        user_jobs=f"{KEY_PREFIX}:jobs:user:{user_id}",
+        project_jobs=f"{KEY_PREFIX}:jobs:project:{project_id}",
+        dedup=f"{KEY_PREFIX}:dedup:{project_id}:{digest}",
+        budget=f"{KEY_PREFIX}:tokens:user:{user_id}:{day}",
+    )
+
+
+def seconds_until_budget_reset() -> int:
+    """トークン予算が回復する（UTCの翌日になる）までの秒数"""
+    now = datetime.now(UTC)
+    tomorrow = (now + timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return max(1, int((tomorrow - now).total_seconds()))
+
+
+async def admit(keys: JobKeys) -> Admission:
+    """
+    ジョブの受付を判定し、受け付けた場合は実行中として記録
+
+    Args:
+        keys: job_keys で作成したキー
+
+    Returns:
+        判定結果。受け付けた場合はキューに入れる際に使うジョブIDを含む
+        （Redis未接続・障害時は job_id=None で受け付ける）
+    """
+    client = get_redis_client()
+    if client is None:
+        return Admission("admitted")
+    job_id = str(uuid.uuid4())
+    lease = settings.AI_JOB_LEASE_SECONDS
+    try:
+        status, existing, project_in_flight = await client.eval(  # type: ignore[misc]
+            _ADMIT_SCRIPT,
+            4,
+            *keys.as_list(),
+            job_id,
+            int(time.time()),
+            lease,
+            settings.AI_MAX_JOBS_PER_USER,
+            settings.AI_MAX_JOBS_PER_PROJECT,
+            settings.AI_DAILY_TOKEN_BUDGET,
+            settings.AI_JOB_TOKEN_ESTIMATE,
+            # 集計日の翌日いっぱいまで残す（日付の境界をまたいで精算するため）
+            2 * 24 * 3600,
+        )
+    except RedisError as e:
+        logger.warning(f"AI job admission check failed: {e}")
+        return Admission("admitted")
+    return Admission(status, existing or None, int(project_in_flight))
+
+
+async def release(keys: JobKeys, job_id: str, tokens_used: int | None = None) -> None:
+    """
+    ジョブの終了（成功・失敗・キューへの投入失敗）を記録
+
+    Args:
+        keys: 受付時と同じキー（予算は受付日のキーで精算する）
+        job_id: ジョブID
+        tokens_used: 実際に消費したトークン数（Noneの場合は見積もりのまま）
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+    delta = 0 if tokens_used is None else tokens_used - settings.AI_JOB_TOKEN_ESTIMATE
+    try:
+        await client.eval(  # type: ignore[misc]
+            _RELEASE_SCRIPT, 4, *keys.as_list(), job_id, delta
+        )
+    except RedisError as e:
+        logger.warning(f"Failed to release AI job {job_id}: {e}")
@@ -0,0 +1,136 @@
+"""
+AIワークフローの段階ごとの結果キャッシュ（Redis）
+
+段階名・モデル名・プロンプトのバージョン・正規化した入力から求めたハッシュをキーにし、
+同じ入力の再実行（リトライ・デモ・別メンバーによる再投入など）ではLLMを呼ばずに結果を返す。
+エントリは最後に参照されてからTTLで期限切れになり、件数が AI_CACHE_MAX_ENTRIES を超えると最も古く参照された
+ものから削除する。Redis未接続・障害時はキャッシュを使わない（ワークフローは失敗させない）。
+"""
+
+import hashlib
+import json
+import logging
+import time
+import unicodedata
+from typing import Any
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ai_cache"
+# キャッシュ済みキーを最終参照時刻をスコアにして保持するZSET（件数上限の管理用）
+INDEX_KEY = f"{KEY_PREFIX}:index"
+
+# 値の保存・索引への登録・期限切れの掃除・上限超過分の削除を1往復でまとめて行う
+_SET_SCRIPT = """
+local key, index = KEYS[1], KEYS[2]
+local ttl, now, max_entries = tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+redis.call('SET', key, ARGV[1], 'EX', ttl)
+redis.call('ZADD', index, now, key)
+redis.call('ZREMRANGEBYSCORE', index, '-inf', now - ttl)
+local excess = redis.call('ZCARD', index) - max_entries
+if excess > 0 then
+    local evicted = redis.call('ZPOPMIN', index, excess)
+    for i = 1, #evicted, 2 do
+        redis.call('DEL', evicted[i])
+    end
+end
+return excess > 0 and excess or 0
+"""
+
+
+def _enabled() -> bool:
+    return settings.AI_CACHE_TTL_SECONDS > 0 and settings.AI_CACHE_MAX_ENTRIES > 0
+
+
+def normalize(value: Any) -> Any:
+    """
+    キャッシュキー用に入力を正規化
+
+    文字列はUnicode正規化（NFKC）したうえで連続する空白を1つにまとめ、前後の空白を除く。
+    辞書・リストは要素ごとに正規化する。
+    """
+    if isinstance(value, str):
+        return " ".join(unicodedata.normalize("NFKC", value).split())
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [normalize(item) for item in value]
+    return value
+
+
+def cache_key(stage: str, prompt_version: str, payload: Any) -> str:
+    """
+    段階・モデル・プロンプトのバージョン・入力からキャッシュキーを作成
+
+    Args:
+        stage: ワークフローの段階名（例: "epics"）
+        prompt_version: プロンプトテンプレートのバージョン
+        payload: 段階への入力（JSONに変換できる値）
+    """
+    material = json.dumps(
+        {
+            "model": settings.AI_MODEL,
+            "prompt_version": prompt_version,
+            "input": normalize(payload),
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    digest = hashlib.sha256(material.encode("utf-8")).hexdigest()
+    return f"{KEY_PREFIX}:{stage}:{digest}"
+
+
+async def get_cached(key: str) -> Any:
+    """
+    キャッシュ済みの結果を取得し、参照時刻と有効期限を更新
+
+    索引のスコア（最終参照時刻）と同じく、キーの有効期限も参照のたびに延ばす。
+    延ばさないと、よく参照されるエントリが索引には残ったまま登録からTTLで消えてしまう。
+
+    Returns:
+        キャッシュ済みの値（未登録・期限切れ・Redis未接続時はNone）
+    """
+    client = get_redis_client()
+    if client is None or not _enabled():
+        return None
+    try:
+        raw = await client.get(key)
+        if raw is None:
+            return None
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.expire(key, settings.AI_CACHE_TTL_SECONDS)
+            pipe.zadd(INDEX_KEY, {key: time.time()}, xx=True)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to read AI cache {key}: {e}")
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+async def set_cached(key: str, value: Any) -> None:
+    """結果をキャッシュに登録（上限を超えた分は古いものから削除）"""
+    client = get_redis_client()
+    if client is None or not _enabled():
+        return
+    try:
+        await client.eval(  # type: ignore[misc]
+            _SET_SCRIPT,
+            2,
+            key,
+            INDEX_KEY,
+            json.dumps(value, ensure_ascii=False),
+            settings.AI_CACHE_TTL_SECONDS,
+            time.time(),
+            settings.AI_CACHE_MAX_ENTRIES,
+        )
+    except RedisError as e:
+        logger.warning(f"Failed to write AI cache {key}: {e}")
@@ -0,0 +1,127 @@
+"""
+AIタスク分解結果の保存
+
+分解結果のスプリントを1回のINSERT（RETURNING id）でまとめて作成し、タスクも
+executemanyの一括INSERTで登録する。タスクの所属スプリントは、スプリント計画の
+タスクインデックスから事前に作った対応表で求める（同じタスクが複数のスプリントに
+含まれる場合は先に現れたスプリントに割り当てる）。
+"""
+
+from datetime import UTC, datetime
+
+from sqlalchemy import insert
+from sqlalchemy.sql.dml import ReturningInsert
+from sqlmodel import Session, col
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Sprint, Task
+
+
+def _sprint_assignments(sprints: list[dict]) -> dict[int, int]:
+    """タスクインデックス→スプリントの位置（sprints内の添字）の対応表を作成"""
+    assignments: dict[int, int] = {}
+    for position, sprint_data in enumerate(sprints):
+        for index in sprint_data.get("tasks", []):
+            assignments.setdefault(index, position)
+    return assignments
+
+
+def _sprint_insert(
+    project_id: int, sprints: list[dict], now: datetime
+) -> tuple[ReturningInsert[tuple[int | None]], list[dict]]:
+    rows = [
+        {
+            "project_id": project_id,
+            "name": sprint_data["name"],
+            "created_at": now,
+            "updated_at": now,
+        }
+        for sprint_data in sprints
+    ]
+    # 返されるIDの順序をパラメータの順序に揃える（スプリントの位置との対応に使う）
+    return insert(Sprint).returning(col(Sprint.id), sort_by_parameter_order=True), rows
+
+
+def _task_rows(
+    project_id: int,
+    tasks: list[dict],
+    assignments: dict[int, int],
+    sprint_ids: list[int],
+    sprint_id: int | None,
+    now: datetime,
+) -> list[dict]:
+    rows = []
+    for index, task_data in enumerate(tasks):
+        task_sprint_id = sprint_id
+        if not task_sprint_id and index in assignments:
+            task_sprint_id = sprint_ids[assignments[index]]
+        rows.append(
+            {
+                "project_id": project_id,
+                "sprint_id": task_sprint_id,
+                "title": task_data.get("title", ""),
+                "description": task_data.get("description", ""),
+                "priority": task_data.get("priority", 2),
+                "estimate": task_data.get("estimate", 8.0),
+                "status": "todo",
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+    return rows
+
+
+def _now() -> datetime:
+    # 日時の列はタイムゾーンなし（UTC）のため、naiveな値で渡す
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def save_decomposition(
+    session: Session, project_id: int, result: dict, sprint_id: int | None = None
+) -> list[int]:
+    """
+    分解結果のスプリントとタスクを登録する（コミットは呼び出し側で行う）
+
+    Args:
+        session: データベースセッション
+        project_id: 登録先のプロジェクトID
+        result: run_ai_decomposition の結果（"tasks" と "sprints" を使う）
+        sprint_id: 指定した場合、全タスクをこのスプリントに登録する
+
+    Returns:
+        作成したスプリントのID（result["sprints"] の順）
+    """
+    sprints = result.get("sprints", [])
+    tasks = result.get("tasks", [])
+    now = _now()
+
+    sprint_ids: list[int] = []
+    if sprints:
+        stmt, rows = _sprint_insert(project_id, sprints, now)
+        sprint_ids = list(session.exec(stmt, params=rows).scalars())
+    if tasks:
+        rows = _task_rows(
+            project_id, tasks, _sprint_assignments(sprints), sprint_ids, sprint_id, now
+        )
+        session.exec(insert(Task), params=rows)
+    return sprint_ids
+
+
+async def save_decomposition_async(
+    session: AsyncSession, project_id: int, result: dict, sprint_id: int | None = None
+) -> list[int]:
+    """save_decomposition の非同期セッション版"""
+    sprints = result.get("sprints", [])
+    tasks = result.get("tasks", [])
+    now = _now()
+
+    sprint_ids: list[int] = []
+    if sprints:
+        stmt, rows = _sprint_insert(project_id, sprints, now)
+        sprint_ids = list((await session.exec(stmt, params=rows)).scalars())
+    if tasks:
+        rows = _task_rows(
+            project_id, tasks, _sprint_assignments(sprints), sprint_ids, sprint_id, now
+        )
+        await session.exec(insert(Task), params=rows)
+    return sprint_ids
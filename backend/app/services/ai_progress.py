@@ -0,0 +1,138 @@
+"""
+AI分解ジョブの進捗イベント（Redis pub/sub）
+
+ワークフローの各段階の完了と途中結果（エピック・エピックごとのタスクなど）を
+ジョブごとのチャンネルに配信する。配信したイベントはジョブごとのリストにも残し、
+後から購読を始めたクライアント（再接続を含む）が取りこぼした分を再送できるようにする。
+イベントの連番はリスト上の位置（1始まり）で、SSEのイベントIDとして使う。
+ジョブを受け付けたユーザーも記録し、進捗の購読は本人だけに許可する。
+Redis未接続・障害時は配信しない（ジョブ自体は失敗させない）。
+"""
+
+import json
+import logging
+
+from redis.exceptions import RedisError
+
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# ジョブの終了を表すイベント（受信したらストリームを閉じる）
+TERMINAL_EVENTS = frozenset({"completed", "failed"})
+# イベント履歴の保持期間（Celeryの結果の保持期間に合わせる）
+EVENT_LOG_TTL_SECONDS = 3600
+
+# 履歴への追加と配信を原子的に行い、履歴上の連番を配信メッセージに付ける
+# （ジョブの所有者の記録も履歴と同じ期間だけ残す）
+_PUBLISH_SCRIPT = """
+local seq = redis.call('RPUSH', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+redis.call('PUBLISH', KEYS[2], seq .. ' ' .. ARGV[1])
+return seq
+"""
+
+
+def channel_name(job_id: str) -> str:
+    return f"ai_job:{job_id}:events"
+
+
+def log_key(job_id: str) -> str:
+    return f"ai_job:{job_id}:events:log"
+
+
+def owner_key(job_id: str) -> str:
+    return f"ai_job:{job_id}:owner"
+
+
+def parse_message(message: str) -> tuple[int, dict]:
+    """配信メッセージ（"連番 JSON"）を連番とイベントに分解"""
+    seq, payload = message.split(" ", 1)
+    return int(seq), json.loads(payload)
+
+
+async def publish_progress(job_id: str, event: str, data: dict) -> int | None:
+    """
+    ジョブの進捗イベントを配信
+
+    Args:
+        job_id: CeleryジョブID
+        event: イベント名（"epics", "epic_tasks", "tasks", "sprints", "completed", "failed"）
+        data: イベントの内容
+
+    Returns:
+        イベントの連番（Redis未接続・障害時はNone）
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+    payload = json.dumps({"event": event, "data": data}, ensure_ascii=False)
+    try:
+        seq = await client.eval(  # type: ignore[misc]
+            _PUBLISH_SCRIPT,
+            3,
+            log_key(job_id),
+            channel_name(job_id),
+            owner_key(job_id),
+            payload,
+            EVENT_LOG_TTL_SECONDS,
+        )
+    except RedisError as e:
+        logger.warning(f"Failed to publish progress for job {job_id}: {e}")
+        return None
+    return int(seq)
+
+
+async def record_job_owner(job_id: str, user_id: int) -> None:
+    """
+    ジョブを受け付けたユーザーを記録（ジョブの投入前に呼ぶ）
+
+    Args:
+        job_id: CeleryジョブID
+        user_id: ジョブを受け付けたユーザーID
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        await client.set(owner_key(job_id), user_id, ex=EVENT_LOG_TTL_SECONDS)
+    except RedisError as e:
+        logger.warning(f"Failed to record owner of job {job_id}: {e}")
+
+
+async def get_job_owner(job_id: str) -> int | None:
+    """
+    ジョブを受け付けたユーザーIDを取得
+
+    Returns:
+        ユーザーID（記録がない・期限切れ・Redis未接続時はNone）
+
+    Raises:
+        RedisError: Redisへの問い合わせに失敗した場合
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+    owner = await client.get(owner_key(job_id))
+    return int(owner) if owner is not None else None
+
+
+async def get_events(job_id: str, after: int = 0) -> list[tuple[int, dict]]:
+    """
+    配信済みのイベントを取得
+
+    Args:
+        job_id: CeleryジョブID
+        after: この連番より後のイベントだけを返す
+
+    Returns:
+        (連番, イベント) のリスト
+    """
+    client = get_redis_client()
+    if client is None:
+        return []
+    entries = await client.lrange(log_key(job_id), after, -1)  # type: ignore[misc]
+    return [
+        (after + offset + 1, json.loads(entry)) for offset, entry in enumerate(entries)
+    ]
@@ -3,13 +3,36 @@ AIタスク分解サービス
 LangGraph + OpenAI Structured Outputs を使用
 """
 
-from typing import TypedDict
-
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import Annotated, Any, TypedDict
+from weakref import WeakKeyDictionary
+
+import httpx
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Send
 from pydantic import BaseModel, Field
 
+from app.core.metrics import AI_STAGE_DURATION
+from app.services.ai_cache import cache_key, get_cached, set_cached
+from app.services.ai_progress import publish_progress
+
+logger = logging.getLogger(__name__)
+
+# プロンプトテンプレートのバージョン（段階ごとの結果キャッシュのキーに含める）
+# プロンプトや出力形式を変更したら上げ、古いキャッシュを使わないようにする
+PROMPT_VERSION = "1"
+
 # ============================================================
 # Pydantic Models for Structured Output
 # ============================================================
@@ -86,6 +109,17 @@ class SprintPlanList(BaseModel):
 # ============================================================
 
 
+def merge_epic_results(left: list[dict], right: list[dict]) -> list[dict]:
+    """
+    エピック単位の分解結果をepic_index順にまとめる
+
+    同じエピックの結果は後勝ちで1件にするため、状態全体を返すノードが
+    同じ結果を再度渡しても重複しない。
+    """
+    merged = {result["epic_index"]: result for result in left + right}
+    return [merged[index] for index in sorted(merged)]
+
+
 class WorkflowState(TypedDict):
     """LangGraphワークフローの状態定義"""
 
@@ -94,6 +128,15 @@ class WorkflowState(TypedDict):
     tasks: list[dict]
     sprints: list[dict]
     error: str | None
+    # エピックごとの並列分解の結果（{"epic_index", "tasks", "error"}）
+    epic_results: Annotated[list[dict], merge_epic_results]
+
+
+class EpicTaskState(TypedDict):
+    """エピック単位の分解ノードへの入力"""
+
+    epic_index: int
+    epic: dict
 
 
 # ============================================================
@@ -101,19 +144,86 @@ class WorkflowState(TypedDict):
 # ============================================================
 
 
-def get_llm():
-    """LLMインスタンスを取得（OpenAI互換API）"""
+# プロセス内で共有するLLMクライアント（キー: モデル・接続先の設定）
+# fork後の子プロセス（Celeryワーカー）で親の接続を使わないよう、PIDが変わったら作り直す
+_llm_registry: dict[tuple, ChatOpenAI] = {}
+# 非同期の接続はイベントループに紐づくため、ループごとに分けて保持する
+# （ループが破棄されるとエントリも消える）
+_loop_llm_registry: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, ChatOpenAI]] = (
+    WeakKeyDictionary()
+)
+_llm_registry_pid: int | None = None
+_llm_registry_lock = threading.Lock()
+
+
+def _build_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    """keep-alive接続を保持するHTTPクライアントを作成"""
     from app.core.config import settings
-    
-    return ChatOpenAI(
-        model=settings.AI_MODEL,
-        temperature=0,
-        openai_api_key=settings.OPENAI_API_KEY,
-        openai_api_base=settings.OPENAI_API_BASE,
-        model_kwargs={
-            "response_format": {"type": "json_object"}  # JSONモードを有効化
-        }
+
+    limits = httpx.Limits(
+        max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.AI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.AI_HTTP_KEEPALIVE_EXPIRY,
     )
+    timeout = httpx.Timeout(settings.AI_HTTP_TIMEOUT)
+    return (
+        httpx.Client(limits=limits, timeout=timeout),
+        httpx.AsyncClient(limits=limits, timeout=timeout),
+    )
+
+
+def get_llm() -> ChatOpenAI:
+    """
+    LLMインスタンスを取得（OpenAI互換API）
+
+    設定ごとにプロセス内で1つだけ生成し、全ノード・全リクエストで
+    HTTP接続プールを共有する（TLSハンドシェイクを毎回行わない）。
+    イベントループ上から呼ばれた場合は、そのループ専用のインスタンスを返す。
+    """
+    global _llm_registry_pid
+    from app.core.config import settings
+
+    key = (settings.AI_MODEL, settings.OPENAI_API_BASE, settings.OPENAI_API_KEY)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    with _llm_registry_lock:
+        if _llm_registry_pid != os.getpid():
+            _llm_registry.clear()
+            _loop_llm_registry.clear()
+            _llm_registry_pid = os.getpid()
+
+        registry = (
+            _llm_registry if loop is None else _loop_llm_registry.setdefault(loop, {})
+        )
+        llm = registry.get(key)
+        if llm is None:
+            http_client, http_async_client = _build_http_clients()
+            llm = ChatOpenAI(
+                model=settings.AI_MODEL,
+                temperature=0,
+                openai_api_key=settings.OPENAI_API_KEY,
+                openai_api_base=settings.OPENAI_API_BASE,
+                http_client=http_client,
+                http_async_client=http_async_client,
+                model_kwargs={
+                    "response_format": {"type": "json_object"}  # JSONモードを有効化
+                }
+            )
+            registry[key] = llm
+    return llm
+
+
+def reset_llm_clients() -> None:
+    """共有LLMクライアントを破棄し、同期側の接続を閉じる（設定変更時・テスト用）"""
+    with _llm_registry_lock:
+        for llm in _llm_registry.values():
+            if llm.http_client is not None:
+                llm.http_client.close()
+        _llm_registry.clear()
+        _loop_llm_registry.clear()
 
 
 # ============================================================
@@ -121,8 +231,15 @@ def get_llm():
 # ============================================================
 
 
-def extract_epics_node(state: WorkflowState) -> WorkflowState:
+async def extract_epics_node(state: WorkflowState) -> WorkflowState:
     """要件からエピック（大分類）を抽出 - JSONモード使用"""
+    key = cache_key("epics", PROMPT_VERSION, state["user_requirement"])
+    cached = await get_cached(key)
+    if cached is not None:
+        state["epics"] = cached
+        state["error"] = None
+        return state
+
     llm = get_llm()
 
     prompt = f"""
@@ -137,34 +254,25 @@ def extract_epics_node(state: WorkflowState) -> WorkflowState:
     """
 
     try:
-        response = llm.invoke([HumanMessage(content=prompt)])
-        result = EpicList.from_json(response.content)
+        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        result = EpicList.from_json(str(response.content))
         state["epics"] = [epic.model_dump() for epic in result.epics]
         state["error"] = None
+        await set_cached(key, state["epics"])
 
     except Exception as e:
-        import traceback
-        error_detail = traceback.format_exc()
-        print(f"EPIC ERROR: {error_detail}")
+        logger.exception("Failed to extract epics")
         state["error"] = f"エピック抽出エラー: {str(e)}"
         state["epics"] = []
 
     return state
 
 
-def decompose_tasks_node(state: WorkflowState) -> WorkflowState:
-    """エピックを詳細タスクに分解 - JSONモード使用"""
-    if not state["epics"]:
-        state["error"] = "エピックが抽出されていません"
-        return state
+def _decompose_prompt(epics: list[dict]) -> str:
+    """タスク分解用のプロンプトを作成"""
+    epics_json = json.dumps(epics, ensure_ascii=False, indent=2)
 
-    import json
-
-    llm = get_llm()
-
-    epics_json = json.dumps(state["epics"], ensure_ascii=False, indent=2)
-
-    prompt = f"""
+    return f"""
     以下のエピックを詳細なタスクに分解してください。
     各タスクには以下の情報を含めてください:
     - title: タスク名
@@ -180,26 +288,81 @@ def decompose_tasks_node(state: WorkflowState) -> WorkflowState:
     {epics_json}
     """
 
-    try:
-        response = llm.invoke([HumanMessage(content=prompt)])
-        result = TaskList.from_json(response.content)
-        state["tasks"] = [task.model_dump() for task in result.tasks]
-        state["error"] = None
 
-    except Exception as e:
-        state["error"] = f"タスク分解エラー: {str(e)}"
+def fan_out_epics(state: WorkflowState) -> str | list[Send]:
+    """エピックごとに分解ノードを並列実行する（エピックがなければ集約へ）"""
+    if not state["epics"]:
+        return "merge_tasks"
+    return [
+        Send("decompose_epic", {"epic_index": index, "epic": epic})
+        for index, epic in enumerate(state["epics"])
+    ]
+
+
+async def decompose_epic_node(state: EpicTaskState) -> dict:
+    """1つのエピックを詳細タスクに分解 - JSONモード使用"""
+    epic = state["epic"]
+    key = cache_key("epic_tasks", PROMPT_VERSION, epic)
+    tasks = await get_cached(key)
+    error = None
+
+    if tasks is None:
+        llm = get_llm()
+        prompt = _decompose_prompt([epic])
+        try:
+            response = await llm.ainvoke([HumanMessage(content=prompt)])
+            result = TaskList.from_json(str(response.content))
+            tasks = [task.model_dump() for task in result.tasks]
+        except Exception as e:
+            tasks = []
+            error = f"{epic.get('name', '')}: {str(e)}"
+
+        # エピック→タスクの対応はモデルの出力に頼らず入力側で固定する
+        for task in tasks:
+            task["epic"] = epic.get("name", task["epic"])
+        if error is None:
+            await set_cached(key, tasks)
+
+    return {
+        "epic_results": [
+            {"epic_index": state["epic_index"], "tasks": tasks, "error": error}
+        ]
+    }
+
+
+async def merge_tasks_node(state: WorkflowState) -> WorkflowState:
+    """エピックごとの分解結果をエピックの順序どおりに連結"""
+    if not state["epics"]:
+        state["error"] = "エピックが抽出されていません"
         state["tasks"] = []
+        return state
 
+    results = state["epic_results"]
+    errors = [result["error"] for result in results if result["error"]]
+    if errors:
+        # 一部のエピックだけのタスクでスプリント計画を作らないよう、全体を失敗にする
+        state["error"] = f"タスク分解エラー: {'; '.join(errors)}"
+        state["tasks"] = []
+        return state
+
+    state["tasks"] = [task for result in results for task in result["tasks"]]
+    state["error"] = None
     return state
 
 
-def plan_sprints_node(state: WorkflowState) -> WorkflowState:
+async def plan_sprints_node(state: WorkflowState) -> WorkflowState:
     """タスクをスプリントに割り振る - JSONモード使用"""
     if not state["tasks"]:
-        state["error"] = "タスクが分解されていません"
+        # 前段の失敗理由があればそれを残す
+        state["error"] = state["error"] or "タスクが分解されていません"
         return state
 
-    import json
+    key = cache_key("sprints", PROMPT_VERSION, state["tasks"])
+    cached = await get_cached(key)
+    if cached is not None:
+        state["sprints"] = cached
+        state["error"] = None
+        return state
 
     llm = get_llm()
 
@@ -223,10 +386,11 @@ def plan_sprints_node(state: WorkflowState) -> WorkflowState:
     """
 
     try:
-        response = llm.invoke([HumanMessage(content=prompt)])
-        result = SprintPlanList.from_json(response.content)
+        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        result = SprintPlanList.from_json(str(response.content))
         state["sprints"] = [sprint.model_dump() for sprint in result.sprints]
         state["error"] = None
+        await set_cached(key, state["sprints"])
 
     except Exception as e:
         state["error"] = f"スプリント計画エラー: {str(e)}"
@@ -235,53 +399,118 @@ def plan_sprints_node(state: WorkflowState) -> WorkflowState:
     return state
 
 
+# ============================================================
+# Progress Reporting
+# ============================================================
+
+
+def _progress_payload(node_name: str, state: dict, update: dict) -> tuple[str, dict]:
+    """ノードの出力から進捗イベント名と内容を作成"""
+    if node_name == "extract_epics":
+        return "epics", {"epics": update["epics"], "error": update["error"]}
+    if node_name == "decompose_epic":
+        result = update["epic_results"][0]
+        return "epic_tasks", {
+            "epic_index": result["epic_index"],
+            "epic": state["epic"].get("name"),
+            "tasks": result["tasks"],
+            "error": result["error"],
+        }
+    if node_name == "merge_tasks":
+        return "tasks", {"tasks": update["tasks"], "error": update["error"]}
+    return "sprints", {"sprints": update["sprints"], "error": update["error"]}
+
+
+def _with_progress(node_name: str, node: Callable[[Any], Awaitable[Any]]) -> Any:
+    """
+    ノードの所要時間を記録し、完了時に進捗イベントを配信するラッパー
+
+    ジョブIDは実行時の config["configurable"]["job_id"] で受け取り、
+    指定がない場合（同期エンドポイントなど）は配信しない。
+    """
+
+    async def run(state: Any, config: RunnableConfig) -> Any:
+        start = time.perf_counter()
+        try:
+            update = await node(state)
+        finally:
+            AI_STAGE_DURATION.labels(node_name).observe(time.perf_counter() - start)
+        job_id = config.get("configurable", {}).get("job_id")
+        if job_id:
+            event, data = _progress_payload(node_name, state, update)
+            await publish_progress(job_id, event, data)
+        return update
+
+    return run
+
+
 # ============================================================
 # Workflow Creation
 # ============================================================
 
 
-def create_ai_workflow() -> StateGraph:
+def create_ai_workflow() -> CompiledStateGraph:
     """
     AIタスク分解ワークフローを作成
-    3段階の処理: エピック抽出 → タスク分解 → スプリント計画
+    3段階の処理: エピック抽出 → タスク分解（エピックごとに並列） → スプリント計画
     """
     workflow = StateGraph(WorkflowState)
 
     # ノード定義
-    workflow.add_node("extract_epics", extract_epics_node)
-    workflow.add_node("decompose_tasks", decompose_tasks_node)
-    workflow.add_node("plan_sprints", plan_sprints_node)
+    workflow.add_node("extract_epics", _with_progress("extract_epics", extract_epics_node))
+    workflow.add_node("decompose_epic", _with_progress("decompose_epic", decompose_epic_node))
+    workflow.add_node("merge_tasks", _with_progress("merge_tasks", merge_tasks_node))
+    workflow.add_node("plan_sprints", _with_progress("plan_sprints", plan_sprints_node))
 
-    # エッジ設定
+    # エッジ設定（タスク分解はエピックごとに並列実行し、merge_tasksで集約する）
     workflow.set_entry_point("extract_epics")
-    workflow.add_edge("extract_epics", "decompose_tasks")
-    workflow.add_edge("decompose_tasks", "plan_sprints")
+    workflow.add_conditional_edges(
+        "extract_epics", fan_out_epics, ["decompose_epic", "merge_tasks"]
+    )
+    workflow.add_edge("decompose_epic", "merge_tasks")
+    workflow.add_edge("merge_tasks", "plan_sprints")
     workflow.add_edge("plan_sprints", END)
 
     return workflow.compile()
 
 
+# コンパイル済みワークフロー（プロセス内で1つだけ作成し、呼び出し間で共有する）
+_compiled_workflow: CompiledStateGraph | None = None
+
+
+def get_ai_workflow() -> CompiledStateGraph:
+    """コンパイル済みのAIタスク分解ワークフローを取得"""
+    global _compiled_workflow
+    if _compiled_workflow is None:
+        _compiled_workflow = create_ai_workflow()
+    return _compiled_workflow
+
+
 # ============================================================
 # Main Entry Point
 # ============================================================
 
 
-async def run_ai_decomposition(user_requirement: str) -> dict:
+async def run_ai_decomposition(user_requirement: str, job_id: str | None = None) -> dict:
     """
     AIワークフローを実行するメイン関数
 
     Args:
         user_requirement: ユーザーからの要件入力
+        job_id: 進捗イベントを配信するジョブID（省略時は配信しない）
 
     Returns:
         dict: {
             "epics": List[dict],  # 抽出されたエピック
             "tasks": List[dict],  # 分解されたタスク
             "sprints": List[dict],  # 計画されたスプリント
-            "error": Optional[str]  # エラーメッセージ
+            "error": Optional[str],  # エラーメッセージ
+            "token_usage": int  # 消費したトークン数の合計
         }
     """
-    workflow = create_ai_workflow()
+    from app.core.config import settings
+
+    workflow = get_ai_workflow()
 
     initial_state: WorkflowState = {
         "user_requirement": user_requirement,
@@ -289,13 +518,29 @@ async def run_ai_decomposition(user_requirement: str) -> dict:
         "tasks": [],
         "sprints": [],
         "error": None,
+        "epic_results": [],
     }
 
-    result = workflow.invoke(initial_state)
+    # LLM呼び出しごとのトークン数を集計する（キャッシュから返した段階は0）
+    usage = UsageMetadataCallbackHandler()
+
+    # エピックごとの分解は AI_DECOMPOSE_CONCURRENCY 件まで同時に実行する
+    result = await workflow.ainvoke(
+        initial_state,
+        config={
+            "max_concurrency": settings.AI_DECOMPOSE_CONCURRENCY,
+            "configurable": {"job_id": job_id},
+            "callbacks": [usage],
+        },
+    )
 
     return {
         "epics": result["epics"],
         "tasks": result["tasks"],
         "sprints": result["sprints"],
         "error": result["error"],
+        "token_usage": sum(
+            model_usage.get("total_tokens", 0)
+            for model_usage in usage.usage_metadata.values()
+        ),
     }
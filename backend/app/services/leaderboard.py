@@ -0,0 +1,163 @@
+"""
+ポイントランキング（Redis ZSET）
+
+ユーザーの累計ポイントをZSETのスコアとして保持し、上位N件の取得・順位の取得を
+O(log n) で行う。ポイント加算時にユーザー単位で更新し、欠損・不整合はrebuildで
+userテーブルから作り直す。Redis未接続・障害時はNoneを返し、呼び出し側でDBにフォールバックする。
+"""
+
+import logging
+
+from redis.exceptions import RedisError
+from sqlalchemy import event
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.redis import get_redis_client, get_sync_redis_client
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_KEY = "leaderboard:total_points"
+REBUILD_KEY = f"{LEADERBOARD_KEY}:rebuild"
+
+# 構築済みのランキング（と再構築中の一時キー）にだけスコアを書き込む。
+# 未構築のキーに1件だけ登録されて、不完全なランキングが返るのを防ぐ
+_UPDATE_SCRIPT = """
+local updated = 0
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('ZADD', key, ARGV[1], ARGV[2])
+        updated = 1
+    end
+end
+return updated
+"""
+
+
+async def update_score(user_id: int, total_points: int) -> None:
+    """
+    ユーザーの累計ポイントをランキングに反映
+
+    加算ではなく累計値で上書きするため、同じ更新が重複しても結果は変わらない。
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        await client.eval(  # type: ignore[misc]
+            _UPDATE_SCRIPT, 2, LEADERBOARD_KEY, REBUILD_KEY, total_points, user_id
+        )
+    except RedisError as e:
+        logger.warning(f"Failed to update leaderboard for user {user_id}: {e}")
+
+
+def update_score_after_commit(
+    session: Session, user_id: int, total_points: int
+) -> None:
+    """
+    同期セッションのコミット後にランキングを更新する（ロールバック時は反映しない）
+
+    Args:
+        session: 同期データベースセッション
+        user_id: ユーザーID
+        total_points: コミット後の累計ポイント
+    """
+
+    @event.listens_for(session, "after_commit", once=True)
+    def _update(_session: Session) -> None:
+        try:
+            get_sync_redis_client().eval(
+                _UPDATE_SCRIPT, 2, LEADERBOARD_KEY, REBUILD_KEY, total_points, user_id
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to update leaderboard for user {user_id}: {e}")
+
+
+async def get_top(limit: int) -> list[tuple[int, int]] | None:
+    """
+    上位ユーザーを取得
+
+    Returns:
+        (user_id, total_points) のリスト（ポイント降順）。ランキング未構築・Redis未接続時はNone
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        if not await client.exists(LEADERBOARD_KEY):
+            return None
+        entries = await client.zrevrange(LEADERBOARD_KEY, 0, limit - 1, withscores=True)
+    except RedisError as e:
+        logger.warning(f"Failed to read leaderboard: {e}")
+        return None
+    return [(int(member), int(score)) for member, score in entries]
+
+
+async def get_rank(total_points: int) -> int | None:
+    """
+    指定ポイントの順位を取得（1始まり、同点は同順位）
+
+    自分より多いポイントを持つユーザー数+1を順位とする。ZSETに未登録の
+    ユーザー（ポイント0など）でも順位を求められる。
+
+    Returns:
+        順位。ランキング未構築・Redis未接続時はNone
+    """
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        if not await client.exists(LEADERBOARD_KEY):
+            return None
+        higher = await client.zcount(LEADERBOARD_KEY, f"({total_points}", "+inf")
+    except RedisError as e:
+        logger.warning(f"Failed to read leaderboard rank: {e}")
+        return None
+    return int(higher) + 1
+
+
+async def rebuild(session: AsyncSession, batch_size: int = 1000) -> int:
+    """
+    userテーブルからランキングを作り直す
+
+    一時キーに書き込んでからRENAMEで置き換えるため、再構築中も古いランキングを参照できる。
+    再構築中のポイント更新は一時キーにも書き込まれる。
+
+    Args:
+        session: 非同期データベースセッション
+        batch_size: 1回のZADDで登録する件数
+
+    Returns:
+        登録したユーザー数
+    """
+    client = get_redis_client()
+    if client is None:
+        raise RuntimeError("Redis is not initialized")
+
+    await client.delete(REBUILD_KEY)
+
+    total = 0
+    last_id: int | None = 0
+    while True:
+        rows = (
+            await session.exec(
+                select(col(User.id), User.total_points)
+                .where(col(User.deleted_at).is_(None), col(User.id) > last_id)
+                .order_by(col(User.id))
+                .limit(batch_size)
+            )
+        ).all()
+        if not rows:
+            break
+        await client.zadd(
+            REBUILD_KEY, {str(user_id): points for user_id, points in rows}
+        )
+        total += len(rows)
+        last_id = rows[-1][0]
+
+    if total:
+        await client.rename(REBUILD_KEY, LEADERBOARD_KEY)
+    else:
+        await client.delete(LEADERBOARD_KEY)
+    return total
@@ -0,0 +1,220 @@
+"""
+保持期間を過ぎた論理削除行の定期削除
+
+user・project・sprint・task の論理削除行のうち、deleted_at が保持期間より古いものを
+archived_record へ移す（archive）か物理削除する（delete）。稼働中のテーブルには
+生きている行だけが残るようにし、インデックスの肥大化を防ぐ。
+
+- バッチ（batch_size 行）ごとにコミットし、ロックを長く持たない。対象行は
+  FOR UPDATE SKIP LOCKED で取得し、同時に復元された行は処理しない
+- バッチ間で待ち、1回の実行でのバッチ数にも上限を設ける。残りは次回の実行で処理する
+- 子のテーブル（task → sprint → project → user の順）から処理し、まだ他の行から
+  参照されている親は対象にしない（ON DELETE CASCADE でアーカイブ前の行を消さないため）
+- user の削除で連鎖して消える UserAchievement・PointsHistory の行は、archive では
+  user と同じバッチで archived_record へ移してから削除する
+- ドライランでは対象の件数を数えるだけで変更しない
+"""
+
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
+
+from sqlalchemy import delete, exists, func, insert
+from sqlmodel import Session, col, select
+
+from app.core.metrics import PURGE_BATCH_DURATION, PURGE_PENDING_ROWS, PURGED_ROWS
+from app.models import (
+    ArchivedRecord,
+    PointsHistory,
+    Project,
+    Sprint,
+    Task,
+    User,
+    UserAchievement,
+)
+
+logger = logging.getLogger(__name__)
+
+MODES = ("archive", "delete")
+
+# 処理順（子のテーブルから）
+MODELS = (Task, Sprint, Project, User)
+
+SoftDeleteModel = type[Task] | type[Sprint] | type[Project] | type[User]
+
+# 親の削除で ON DELETE CASCADE により消える子のテーブルと、親を指す列の名前
+CASCADE_CHILDREN: dict[SoftDeleteModel, tuple[tuple[Any, str], ...]] = {
+    User: ((UserAchievement, "user_id"), (PointsHistory, "user_id")),
+}
+
+
+@dataclass
+class PurgeStats:
+    """テーブルごとの処理結果"""
+
+    table: str
+    eligible: int = 0  # 実行開始時点の対象行数
+    purged: int = 0
+    batches: int = 0
+    pending: int = 0  # 実行終了時点で残っている対象行数
+
+
+def _conditions(model: SoftDeleteModel, cutoff: datetime) -> list:
+    """保持期間を過ぎ、他の行から参照されていない論理削除行の条件"""
+    conditions = [col(model.deleted_at).is_not(None), col(model.deleted_at) < cutoff]
+    if model is Sprint:
+        conditions.append(~exists().where(col(Task.sprint_id) == Sprint.id))
+    elif model is Project:
+        conditions.append(~exists().where(col(Sprint.project_id) == Project.id))
+        conditions.append(~exists().where(col(Task.project_id) == Project.id))
+    elif model is User:
+        conditions.append(~exists().where(col(Project.owner_id) == User.id))
+    return conditions
+
+
+def _count(session: Session, model: SoftDeleteModel, conditions: list) -> int:
+    return session.exec(
+        select(func.count()).select_from(model).where(*conditions)
+    ).one()
+
+
+def _archived(row: Any, deleted_at: datetime, now: datetime) -> dict[str, Any]:
+    """archived_record に入れる1行分の値"""
+    return {
+        "source_table": row.__tablename__,
+        "record_id": row.id,
+        "data": row.model_dump(mode="json"),
+        "deleted_at": deleted_at,
+        "archived_at": now,
+    }
+
+
+def _purge_batch(
+    session: Session,
+    model: SoftDeleteModel,
+    conditions: list,
+    mode: str,
+    batch_size: int,
+    now: datetime,
+) -> int:
+    """1バッチ分を処理してコミットし、処理した行数を返す"""
+    columns = model if mode == "archive" else col(model.id)
+    query = (
+        select(columns)
+        .where(*conditions)
+        .order_by(col(model.id))
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    # archive ではモデルの行、delete ではIDの列
+    rows: Sequence[Any] = session.exec(query).all()
+    if not rows:
+        return 0
+    if mode == "archive":
+        ids = [row.id for row in rows]
+        archived = [_archived(row, row.deleted_at, now) for row in rows]
+        # 連鎖して消える子の行も、親の deleted_at で一緒に移す
+        deleted_at = {row.id: row.deleted_at for row in rows}
+        children: list[Any] = []
+        for child, parent_column in CASCADE_CHILDREN.get(model, ()):
+            child_rows = session.exec(
+                select(child).where(col(getattr(child, parent_column)).in_(ids))
+            ).all()
+            archived += [
+                _archived(row, deleted_at[getattr(row, parent_column)], now)
+                for row in child_rows
+            ]
+            children += child_rows
+        session.exec(insert(ArchivedRecord), params=archived)
+    else:
+        ids = list(rows)
+    session.exec(
+        delete(model)
+        .where(col(model.id).in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    if mode == "archive":
+        # 削除した行をセッションに残さない
+        for row in [*rows, *children]:
+            session.expunge(row)
+    session.commit()
+    return len(ids)
+
+
+def purge_soft_deleted(
+    session: Session,
+    *,
+    retention_days: int,
+    mode: str = "archive",
+    batch_size: int = 500,
+    max_batches: int = 200,
+    sleep_seconds: float = 0.0,
+    dry_run: bool = False,
+    now: datetime | None = None,
+) -> list[PurgeStats]:
+    """
+    保持期間を過ぎた論理削除行をアーカイブまたは物理削除
+
+    Args:
+        session: データベースセッション（バッチごとにコミットする）
+        retention_days: 論理削除してから残しておく日数
+        mode: "archive"（archived_record へ移す）または "delete"（物理削除）
+        batch_size: 1トランザクションで処理する行数
+        max_batches: テーブルごとのバッチ数の上限
+        sleep_seconds: バッチ間の待ち時間
+        dry_run: True の場合は対象の件数を数えるだけで変更しない
+        now: 基準時刻（naiveなUTC。省略時は現在時刻）
+
+    Returns:
+        テーブルごとの処理結果（処理順）
+
+    Raises:
+        ValueError: mode が不正な場合
+    """
+    if mode not in MODES:
+        raise ValueError(f"Invalid purge mode: {mode!r}")
+    now = now or datetime.now(UTC).replace(tzinfo=None)
+    cutoff = now - timedelta(days=retention_days)
+    action = "archived" if mode == "archive" else "deleted"
+
+    results: list[PurgeStats] = []
+    for model in MODELS:
+        table = cast(str, model.__tablename__)
+        conditions = _conditions(model, cutoff)
+        stats = PurgeStats(table, eligible=_count(session, model, conditions))
+        results.append(stats)
+        if dry_run:
+            stats.pending = stats.eligible
+            PURGE_PENDING_ROWS.labels(table).set(stats.pending)
+            continue
+
+        while stats.eligible and stats.batches < max_batches:
+            if stats.batches and sleep_seconds > 0:
+                time.sleep(sleep_seconds)
+            start = time.perf_counter()
+            purged = _purge_batch(session, model, conditions, mode, batch_size, now)
+            PURGE_BATCH_DURATION.labels(table).observe(time.perf_counter() - start)
+            if not purged:
+                break
+            stats.batches += 1
+            stats.purged += purged
+            PURGED_ROWS.labels(table, action).inc(purged)
+            if purged < batch_size:
+                break
+
+        stats.pending = _count(session, model, conditions) if stats.eligible else 0
+        PURGE_PENDING_ROWS.labels(table).set(stats.pending)
+        logger.info(
+            "Purged soft-deleted rows",
+            extra={
+                "table": table,
+                "mode": mode,
+                "purged": stats.purged,
+                "batches": stats.batches,
+                "pending": stats.pending,
+            },
+        )
+    return results
@@ -0,0 +1,230 @@
+"""
+タスクの一括作成・更新・削除
+
+プロジェクト内のタスク・スプリントの存在確認を1回のSELECTで行い、変更は項目数に
+よらず少数の文で適用する。
+
+- 作成: executemanyのINSERT（RETURNINGで作成したタスクを受け取る）
+- 更新: 同じ変更内容の項目は1回の UPDATE ... WHERE id IN (...) にまとめ、
+  項目ごとに内容が異なるものは主キー指定の一括UPDATE（executemany）で適用する
+- 削除: 1回の UPDATE（ソフトデリート）
+
+存在しない・重複したIDなどの項目はエラーとして結果に含め、他の項目は適用する。
+コミットは呼び出し側で行う（全項目を1トランザクションで反映する）。
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy import insert, update
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Sprint, Task
+
+
+@dataclass
+class BatchItemResult:
+    """一括操作の項目ごとの結果"""
+
+    index: int  # リクエスト内の位置
+    id: int | None = None
+    task: Task | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _now() -> datetime:
+    # 日時の列はタイムゾーンなし（UTC）のため、naiveな値で渡す
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+async def _active_ids(
+    session: AsyncSession,
+    model: type[Task] | type[Sprint],
+    project_id: int,
+    ids: Iterable[int],
+) -> set[int]:
+    """プロジェクト内で削除されていないIDだけを返す"""
+    wanted = set(ids)
+    if not wanted:
+        return set()
+    query = select(col(model.id)).where(
+        model.project_id == project_id,
+        col(model.id).in_(wanted),
+        col(model.deleted_at).is_(None),
+    )
+    # 主キーはNULLにならないが、列の型（int | None）に合わせて除外する
+    return {
+        row_id for row_id in (await session.exec(query)).all() if row_id is not None
+    }
+
+
+async def _load_tasks(
+    session: AsyncSession, ids: list[int | None]
+) -> dict[int | None, Task]:
+    if not ids:
+        return {}
+    query = (
+        select(Task)
+        .where(col(Task.id).in_(ids))
+        .execution_options(populate_existing=True)
+    )
+    return {task.id: task for task in (await session.exec(query)).all()}
+
+
+def _check_ids(ids: list[int], existing: set[int]) -> list[str | None]:
+    """IDごとのエラー（存在しない・リクエスト内で重複）を返す"""
+    seen: set[int] = set()
+    errors: list[str | None] = []
+    for task_id in ids:
+        if task_id in seen:
+            errors.append("Duplicate task id")
+        elif task_id not in existing:
+            errors.append("Task not found")
+        else:
+            errors.append(None)
+        seen.add(task_id)
+    return errors
+
+
+async def _check_sprints(
+    session: AsyncSession, project_id: int, items: list[dict]
+) -> set[int]:
+    return await _active_ids(
+        session,
+        Sprint,
+        project_id,
+        (item["sprint_id"] for item in items if item.get("sprint_id") is not None),
+    )
+
+
+async def create_tasks(
+    session: AsyncSession, project_id: int, items: list[dict]
+) -> list[BatchItemResult]:
+    """
+    タスクを一括作成
+
+    Args:
+        session: 非同期データベースセッション
+        project_id: プロジェクトID（アクセス権限は確認済みであること）
+        items: 作成するタスクの値（TaskCreate.model_dump()）
+
+    Returns:
+        項目ごとの結果（items の順）
+    """
+    sprint_ids = await _check_sprints(session, project_id, items)
+    now = _now()
+    results: list[BatchItemResult] = []
+    rows: list[dict] = []
+    for index, item in enumerate(items):
+        result = BatchItemResult(index)
+        if item.get("sprint_id") is not None and item["sprint_id"] not in sprint_ids:
+            result.error = "Sprint not found"
+        else:
+            rows.append(
+                {**item, "project_id": project_id, "created_at": now, "updated_at": now}
+            )
+        results.append(result)
+
+    if rows:
+        # 作成したタスクの順序をパラメータの順序に揃える（項目との対応に使う）
+        stmt = insert(Task).returning(Task, sort_by_parameter_order=True)
+        created = iter((await session.exec(stmt, params=rows)).scalars().all())
+        for result in results:
+            if result.ok:
+                result.task = next(created)
+                result.id = result.task.id
+    return results
+
+
+async def update_tasks(
+    session: AsyncSession, project_id: int, items: list[dict]
+) -> list[BatchItemResult]:
+    """
+    タスクを一括更新
+
+    Args:
+        session: 非同期データベースセッション
+        project_id: プロジェクトID（アクセス権限は確認済みであること）
+        items: "id" と変更する値（指定した項目のみ）
+
+    Returns:
+        項目ごとの結果（items の順）
+    """
+    ids = [item["id"] for item in items]
+    errors = _check_ids(ids, await _active_ids(session, Task, project_id, ids))
+    sprint_ids = await _check_sprints(session, project_id, items)
+
+    # 変更内容が同じ項目をまとめる
+    groups: dict[tuple, list[int]] = {}
+    results: list[BatchItemResult] = []
+    for index, item in enumerate(items):
+        values = {key: value for key, value in item.items() if key != "id"}
+        error = errors[index]
+        sprint_id = values.get("sprint_id")
+        if error is None and sprint_id is not None and sprint_id not in sprint_ids:
+            error = "Sprint not found"
+        results.append(BatchItemResult(index, id=item["id"], error=error))
+        if error is None:
+            groups.setdefault(tuple(sorted(values.items())), []).append(item["id"])
+
+    now = _now()
+    by_primary_key: list[dict] = []
+    for changes, task_ids in groups.items():
+        if len(task_ids) == 1:
+            by_primary_key.append(
+                {"id": task_ids[0], **dict(changes), "updated_at": now}
+            )
+            continue
+        stmt = (
+            update(Task)
+            .where(col(Task.id).in_(task_ids))
+            .values(**dict(changes), updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        await session.exec(stmt)
+    if by_primary_key:
+        await session.exec(update(Task), params=by_primary_key)
+
+    tasks = await _load_tasks(session, [r.id for r in results if r.ok])
+    for result in results:
+        if result.ok:
+            result.task = tasks[result.id]
+    return results
+
+
+async def delete_tasks(
+    session: AsyncSession, project_id: int, ids: list[int]
+) -> list[BatchItemResult]:
+    """
+    タスクを一括削除（ソフトデリート）
+
+    Args:
+        session: 非同期データベースセッション
+        project_id: プロジェクトID（アクセス権限は確認済みであること）
+        ids: 削除するタスクのID
+
+    Returns:
+        項目ごとの結果（ids の順）
+    """
+    errors = _check_ids(ids, await _active_ids(session, Task, project_id, ids))
+    results = [
+        BatchItemResult(index, id=task_id, error=error)
+        for index, (task_id, error) in enumerate(zip(ids, errors, strict=True))
+    ]
+    deleted = [result.id for result in results if result.ok]
+    if deleted:
+        now = _now()
+        stmt = (
+            update(Task)
+            .where(col(Task.id).in_(deleted))
+            .values(deleted_at=now, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        await session.exec(stmt)
+    return results
@@ -3,18 +3,33 @@ Celery タスク定義
 """
 
 import logging
+import time
 
 from celery.result import AsyncResult
 
 from app.celery_app import celery_app
+from app.core.metrics import AI_JOB_DURATION
+from app.services.ai_admission import job_keys, release
+from app.services.ai_persistence import save_decomposition
+from app.services.ai_progress import publish_progress
 from app.services.ai_service import run_ai_decomposition
+from app.tasks.event_loop import run_async
+from app.tasks.queues import record_wait
+from app.utils.cache_version import bump_version
 
 logger = logging.getLogger(__name__)
 
 
 @celery_app.task(bind=True, name="ai.decompose_tasks")
 def decompose_tasks_async(
-    self, project_id: int, user_requirement: str, sprint_id: int | None = None
+    self,
+    project_id: int,
+    user_requirement: str,
+    sprint_id: int | None = None,
+    user_id: int | None = None,
+    budget_day: str | None = None,
+    queue: str | None = None,
+    enqueued_at: float | None = None,
 ):
     """
     非同期でAIタスク分解を実行
@@ -23,81 +38,79 @@ def decompose_tasks_async(
         project_id: プロジェクトID
         user_requirement: ユーザーからの要件入力
         sprint_id: タスクを追加するスプリントID（任意）
+        user_id: ジョブを受け付けたユーザーID（受付制御の終了処理に使う）
+        budget_day: 受付時にトークン予算を予約した日（YYYYMMDD）
+        queue: 投入先のキュー名（待ち時間の計測に使う）
+        enqueued_at: キューに投入した時刻（UNIX時刻）
 
     Returns:
         dict: 分解結果
     """
-    import asyncio
-
     logger.info(f"Starting AI decomposition for project {project_id}")
+    if queue and enqueued_at is not None:
+        run_async(record_wait(queue, enqueued_at))
 
     # タスク状態を更新
     self.update_state(
         state="PROCESSING", meta={"project_id": project_id, "progress": 0}
     )
 
+    tokens_used = None
+    job_status = "failed"
+    start = time.perf_counter()
     try:
-        # 非同期関数を同期的に実行
-        result = asyncio.run(run_ai_decomposition(user_requirement))
+        # ワーカーの永続ループで実行し、LLMクライアントの接続をタスク間で使い回す
+        # 各段階の完了と途中結果はジョブIDのチャンネルに配信される
+        result = run_async(
+            run_ai_decomposition(user_requirement, job_id=self.request.id)
+        )
+        tokens_used = result.get("token_usage")
 
         if result.get("error"):
             self.update_state(state="FAILED", meta={"error": result["error"]})
+            run_async(
+                publish_progress(self.request.id, "failed", {"error": result["error"]})
+            )
             return {"status": "failed", "error": result["error"]}
 
-        # 結果をDBに保存
+        # 結果をDBに保存（スプリント・タスクとも一括INSERT）
         from app.db.session import get_session_context
-        from app.models import Sprint, Task
 
         with get_session_context() as session:
-            # スプリントを作成
-            sprint_map = {}
-            for sprint_data in result.get("sprints", []):
-                sprint = Sprint(
-                    project_id=project_id,
-                    name=sprint_data["name"],
-                )
-                session.add(sprint)
-                session.flush()
-                sprint_map[sprint_data["name"]] = sprint.id
-
-            # タスクを作成
-            for idx, task_data in enumerate(result.get("tasks", [])):
-                # スプリントIDを決定
-                task_sprint_id = sprint_id
-                if not task_sprint_id:
-                    for sprint_data in result.get("sprints", []):
-                        if idx in sprint_data.get("tasks", []):
-                            task_sprint_id = sprint_map.get(sprint_data["name"])
-                            break
-
-                task = Task(
-                    project_id=project_id,
-                    sprint_id=task_sprint_id,
-                    title=task_data.get("title", ""),
-                    description=task_data.get("description", ""),
-                    priority=task_data.get("priority", 2),
-                    estimate=task_data.get("estimate", 8.0),
-                    status="todo",
-                )
-                session.add(task)
-
+            save_decomposition(session, project_id, result, sprint_id)
             session.commit()
+        run_async(bump_version("project", project_id))
 
         logger.info(f"AI decomposition completed for project {project_id}")
 
-        return {
+        summary = {
             "status": "completed",
             "project_id": project_id,
             "epics": result.get("epics", []),
             "tasks_count": len(result.get("tasks", [])),
             "sprints_count": len(result.get("sprints", [])),
         }
+        run_async(publish_progress(self.request.id, "completed", summary))
+        job_status = "completed"
+        return summary
 
     except Exception as e:
         logger.error(f"AI decomposition failed: {str(e)}")
         self.update_state(state="FAILED", meta={"error": str(e)})
+        run_async(publish_progress(self.request.id, "failed", {"error": str(e)}))
         return {"status": "failed", "error": str(e)}
 
+    finally:
+        AI_JOB_DURATION.labels(queue or "unknown", job_status).observe(
+            time.perf_counter() - start
+        )
+        if user_id is not None:
+            # 同時実行枠を解放し、予約したトークン数を実際の消費量で精算する
+            keys = job_keys(
+                user_id, project_id, user_requirement, sprint_id, budget_day
+            )
+            run_async(release(keys, self.request.id, tokens_used))
+
 
 def get_task_status(task_id: str) -> dict:
     """
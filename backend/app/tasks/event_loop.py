@@ -0,0 +1,99 @@
+"""
+Celeryワーカーで使う永続的なイベントループ
+
+タスクごとに asyncio.run を呼ぶとループの生成・破棄が毎回発生し、ループに紐づく
+HTTPクライアント（LLMへのkeep-alive接続）も使い捨てになる。ワーカープロセス（スレッド）ごとに
+1つのループを保持して使い回し、プロセス終了時にまとめて後片付けする。
+
+ループを作成するときにそのループ専用の非同期Redisクライアントも用意するため、
+preforkの子プロセスに限らず、solo・threadsプールやeager実行でもRedisを使う機能
+（結果キャッシュ・受付制御の解放・進捗の配信）が有効になる。
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+from collections.abc import Coroutine
+from typing import Any
+
+from celery.signals import worker_process_shutdown, worker_shutdown
+
+from app.core.redis import close_loop_redis, init_loop_redis
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_loops: list[asyncio.AbstractEventLoop] = []
+_loops_lock = threading.Lock()
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    現在のスレッド用のイベントループを返す（未作成・閉じている場合は作成）
+
+    preforkでフォークされた子プロセスでは、親から引き継いだループを使わずに作り直す。
+    """
+    loop = getattr(_local, "loop", None)
+    if loop is None or loop.is_closed() or _local.pid != os.getpid():
+        loop = asyncio.new_event_loop()
+        init_loop_redis(loop)
+        _local.loop = loop
+        _local.pid = os.getpid()
+        with _loops_lock:
+            _loops.append(loop)
+    return loop
+
+
+def run_async[R](coro: Coroutine[Any, Any, R]) -> R:
+    """
+    ワーカーの永続ループでコルーチンを完了まで実行
+
+    ソフトタイムリミットなどで中断された場合は、タスクをキャンセルして終了まで
+    待ってから例外を送出する。ループは使い回すため、残ったタスクが次の実行中に
+    再開されないようにする（asyncio.run が残りのタスクをキャンセルするのと同様）。
+
+    Args:
+        coro: 実行するコルーチン
+
+    Returns:
+        コルーチンの戻り値
+    """
+    loop = get_worker_loop()
+    task = loop.create_task(coro)
+    try:
+        return loop.run_until_complete(task)
+    except BaseException:
+        if not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                loop.run_until_complete(task)
+        raise
+
+
+def close_worker_loops() -> None:
+    """このプロセスで作成したループを後片付けして閉じる"""
+    with _loops_lock:
+        loops = [loop for loop in _loops if not loop.is_closed()]
+        _loops.clear()
+    for loop in loops:
+        if loop.is_running():
+            continue
+        try:
+            loop.run_until_complete(close_loop_redis())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.run_until_complete(loop.shutdown_default_executor())
+        except Exception as e:
+            logger.warning(f"Failed to shut down worker event loop: {e}")
+        finally:
+            loop.close()
+    _local.__dict__.clear()
+
+
+# preforkの子プロセスの終了時（worker_process_shutdown）と、solo・threadsプールの
+# ワーカー終了時（worker_shutdown）に後片付けする
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _on_worker_shutdown(**kwargs: Any) -> None:
+    close_worker_loops()
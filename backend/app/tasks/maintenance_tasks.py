@@ -0,0 +1,60 @@
+"""
+定期メンテナンスのCeleryタスク（Celery beatから実行）
+"""
+
+import logging
+
+from app.celery_app import celery_app
+from app.core.config import settings
+from app.services.soft_delete_purge import purge_soft_deleted
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(
+    name="maintenance.purge_soft_deleted",
+    # バッチ間で待つため通常のタスクより長く、次回の実行までに終わる上限にする
+    soft_time_limit=50 * 60,
+    time_limit=55 * 60,
+)
+def purge_soft_deleted_rows(dry_run: bool | None = None) -> dict:
+    """
+    保持期間を過ぎた論理削除行をアーカイブまたは物理削除
+
+    途中で中断してもバッチごとにコミット済みのため、残りは次回の実行で処理される。
+
+    Args:
+        dry_run: 対象の件数を数えるだけにするか（省略時は PURGE_DRY_RUN）
+
+    Returns:
+        dict: テーブルごとの対象行数・処理行数
+    """
+    if settings.PURGE_RETENTION_DAYS <= 0:
+        return {"status": "disabled"}
+    if dry_run is None:
+        dry_run = settings.PURGE_DRY_RUN
+
+    from app.db.session import get_session_context
+
+    with get_session_context() as session:
+        results = purge_soft_deleted(
+            session,
+            retention_days=settings.PURGE_RETENTION_DAYS,
+            mode=settings.PURGE_MODE,
+            batch_size=settings.PURGE_BATCH_SIZE,
+            max_batches=settings.PURGE_MAX_BATCHES,
+            sleep_seconds=settings.PURGE_BATCH_SLEEP_SECONDS,
+            dry_run=dry_run,
+        )
+    logger.info(
+        "Soft-deleted row purge finished",
+        extra={"dry_run": dry_run, "purged": sum(r.purged for r in results)},
+    )
+    return {
+        "status": "dry_run" if dry_run else "completed",
+        "mode": settings.PURGE_MODE,
+        "tables": {
+            r.table: {"eligible": r.eligible, "purged": r.purged, "pending": r.pending}
+            for r in results
+        },
+    }
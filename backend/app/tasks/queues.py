@@ -0,0 +1,145 @@
+"""
+AIワーカーのキュー構成と待ち状況の計測
+
+キューは2つに分ける。
+
+- ai.interactive: 画面から開始したタスク分解（ユーザーが結果を待っている）
+- ai.bulk: 一括の再分解などのバックグラウンド処理
+
+どちらのキューでも、プロジェクト（テナント）ごとに実行中・待機中のジョブ数に応じて
+優先度を下げる（1件目は0、2件目は1…）。Redisブローカーは優先度ごとのリストから
+優先度の高い順に取り出すため、1つのプロジェクトがまとめて投入しても、
+他のプロジェクトの1件目が先に処理される（プロジェクト間のラウンドロビンに近い動作）。
+
+キューの深さ（ブローカーのリスト長）と、投入から実行開始までの待ち時間を
+オートスケーリングの判断材料として公開する。
+"""
+
+import logging
+import time
+
+import redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE_QUEUE = "ai.interactive"
+BULK_QUEUE = "ai.bulk"
+QUEUES = (INTERACTIVE_QUEUE, BULK_QUEUE)
+
+# Redisブローカーの優先度（0が最優先）。優先度ごとに "キュー名:優先度" のリストが作られる
+PRIORITY_STEPS = list(range(10))
+PRIORITY_SEP = ":"
+
+# 待ち時間の統計を計算する直近のサンプル数
+WAIT_SAMPLES = 1000
+
+_broker_client: redis.Redis | None = None
+
+
+def queue_for(background: bool) -> str:
+    """ジョブの種類から投入先のキューを決める"""
+    return BULK_QUEUE if background else INTERACTIVE_QUEUE
+
+
+def fair_priority(in_flight: int) -> int:
+    """
+    同じプロジェクトの実行中・待機中のジョブ数から優先度を決める
+
+    Args:
+        in_flight: 投入前の時点での同じプロジェクトのジョブ数
+    """
+    return min(max(in_flight, 0), PRIORITY_STEPS[-1])
+
+
+def _priority_list(queue: str, priority: int) -> str:
+    return queue if priority == 0 else f"{queue}{PRIORITY_SEP}{priority}"
+
+
+def _get_broker_client() -> redis.Redis:
+    global _broker_client
+    if _broker_client is None:
+        _broker_client = redis.from_url(settings.CELERY_BROKER_URL)
+    return _broker_client
+
+
+def queue_depths() -> dict[str, int] | None:
+    """
+    キューごとの待機中のメッセージ数（ブローカーのリスト長の合計）
+
+    Returns:
+        キュー名→件数（ブローカーに接続できない場合はNone）
+    """
+    client = _get_broker_client()
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            for queue in QUEUES:
+                for priority in PRIORITY_STEPS:
+                    pipe.llen(_priority_list(queue, priority))
+            lengths = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to read queue depths: {e}")
+        return None
+    steps = len(PRIORITY_STEPS)
+    return {
+        queue: sum(lengths[i * steps : (i + 1) * steps])
+        for i, queue in enumerate(QUEUES)
+    }
+
+
+def _wait_key(queue: str) -> str:
+    return f"ai_queue:wait:{queue}"
+
+
+async def record_wait(queue: str, enqueued_at: float) -> None:
+    """
+    投入から実行開始までの待ち時間を記録（ワーカーでタスクの開始時に呼ぶ）
+
+    Args:
+        queue: キュー名
+        enqueued_at: 投入時刻（UNIX時刻）
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+    wait_ms = max(0, int((time.time() - enqueued_at) * 1000))
+    key = _wait_key(queue)
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.lpush(key, wait_ms)
+            pipe.ltrim(key, 0, WAIT_SAMPLES - 1)
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to record queue wait for {queue}: {e}")
+
+
+def _percentile(samples: list[int], ratio: float) -> int:
+    return samples[min(len(samples) - 1, int(len(samples) * ratio))]
+
+
+async def wait_stats(queue: str) -> dict:
+    """
+    直近 WAIT_SAMPLES 件の待ち時間の統計（ミリ秒）
+
+    Returns:
+        samples, p50_ms, p95_ms, max_ms（Redis未接続・サンプルなしの場合は0）
+    """
+    client = get_redis_client()
+    samples: list[int] = []
+    if client is not None:
+        try:
+            values = await client.lrange(_wait_key(queue), 0, -1)  # type: ignore[misc]
+            samples = sorted(int(v) for v in values)
+        except RedisError as e:
+            logger.warning(f"Failed to read queue wait for {queue}: {e}")
+    if not samples:
+        return {"samples": 0, "p50_ms": 0, "p95_ms": 0, "max_ms": 0}
+    return {
+        "samples": len(samples),
+        "p50_ms": _percentile(samples, 0.5),
+        "p95_ms": _percentile(samples, 0.95),
+        "max_ms": samples[-1],
+    }
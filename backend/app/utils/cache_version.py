@@ -0,0 +1,127 @@
+"""
+キャッシュ無効化用のバージョンカウンタ
+
+書き込みのたびにスコープ（プロジェクト単位・オーナー単位など）のバージョンを進める。
+キャッシュキーにバージョンを含めることで、古いキーを探して削除せずに無効化できる。
+Redis未接続・障害時は何もしない（キャッシュを使わない）。
+
+バージョンを進められなかった場合（書き込み後のRedis障害）は、古いバージョンのまま
+古いETag・キャッシュが使われ続けないよう、このプロセスではそのスコープの
+バージョンを返さず、次に読み書きするときに改めて進める。
+"""
+
+import asyncio
+import logging
+import time
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.redis import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+# Redisのデータが消えるたびに変わる値。カウンタが0からやり直しても、
+# クライアントが持っている以前のバージョン（ETag）と一致しないようにする
+_EPOCH_KEY = "version:epoch"
+
+_BUMP_ATTEMPTS = 3
+_BUMP_RETRY_SECONDS = 0.05
+
+# バージョンを進められなかったスコープ（進め直すまでバージョンを返さない）
+_unsettled: set[tuple[str, int]] = set()
+
+
+def _version_key(scope: str, scope_id: int) -> str:
+    return f"version:{scope}:{scope_id}"
+
+
+async def _is_unsettled(client: aioredis.Redis, scope: str, scope_id: int) -> bool:
+    """進められなかったバージョンを進め直し、まだ残っているスコープか返す"""
+    for unsettled in list(_unsettled):
+        try:
+            await client.incr(_version_key(*unsettled))
+        except RedisError as e:
+            logger.warning(f"Failed to bump cache version {unsettled}: {e}")
+            break
+        _unsettled.discard(unsettled)
+    return (scope, scope_id) in _unsettled
+
+
+async def get_version(scope: str, scope_id: int) -> int | None:
+    """
+    スコープの現在のバージョンを取得
+
+    Args:
+        scope: スコープ名（例: "project", "owner"）
+        scope_id: スコープのID
+
+    Returns:
+        バージョン番号（Redis未接続時・バージョンを進められていない場合はNone）
+    """
+    client = get_redis_client()
+    if client is None or await _is_unsettled(client, scope, scope_id):
+        return None
+    try:
+        value = await client.get(_version_key(scope, scope_id))
+    except RedisError as e:
+        logger.warning(f"Failed to read cache version {scope}:{scope_id}: {e}")
+        return None
+    return int(value) if value is not None else 0
+
+
+async def get_version_tag(scope: str, scope_id: int) -> str | None:
+    """
+    クライアントに渡す値（ETagなど）に使うバージョン文字列を取得
+
+    カウンタの値にエポックを組み合わせるため、Redisのデータが失われた後も
+    以前に渡した値とは一致しない。
+
+    Args:
+        scope: スコープ名（例: "project", "owner"）
+        scope_id: スコープのID
+
+    Returns:
+        "エポック.バージョン" 形式の文字列（Redis未接続・障害時、バージョンを
+        進められていない場合はNone）
+    """
+    client = get_redis_client()
+    if client is None or await _is_unsettled(client, scope, scope_id):
+        return None
+    try:
+        epoch, version = await client.mget(_EPOCH_KEY, _version_key(scope, scope_id))
+        if epoch is None:
+            await client.set(_EPOCH_KEY, time.time_ns(), nx=True)
+            epoch = await client.get(_EPOCH_KEY)
+    except RedisError as e:
+        logger.warning(f"Failed to read cache version {scope}:{scope_id}: {e}")
+        return None
+    return f"{epoch}.{version or 0}"
+
+
+async def bump_version(scope: str, scope_id: int) -> None:
+    """
+    スコープのバージョンを進め、関連するキャッシュを無効化する
+
+    失敗した場合は少し待って再試行し、それでも失敗した場合は進め直すまで
+    このプロセスではスコープのバージョンを返さない。
+
+    Args:
+        scope: スコープ名（例: "project", "owner"）
+        scope_id: スコープのID
+    """
+    client = get_redis_client()
+    if client is None:
+        return
+    for attempt in range(_BUMP_ATTEMPTS):
+        if attempt:
+            await asyncio.sleep(_BUMP_RETRY_SECONDS * attempt)
+        try:
+            await client.incr(_version_key(scope, scope_id))
+        except RedisError as e:
+            logger.warning(f"Failed to bump cache version {scope}:{scope_id}: {e}")
+            continue
+        _unsettled.discard((scope, scope_id))
+        return
+    _unsettled.add((scope, scope_id))
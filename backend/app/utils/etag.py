@@ -0,0 +1,78 @@
+"""
+条件付きGET（ETag / If-None-Match）
+
+書き込みのたびに進むスコープのバージョン（cache_version）から弱いETagを作り、
+クライアントが前回のETagを If-None-Match で送ってきた場合は、一覧の取得や
+シリアライズを行わずに 304 Not Modified を返す。
+
+バージョンはデータの読み込みより前に取得すること。読み込みと書き込みが
+前後しても、古いバージョンに新しいデータを対応させるだけ（次回は再取得になる）で、
+更新前のデータを新しいETagで返すことはない。
+Redis未接続・障害時はETagを付けない（常に200を返す）。
+"""
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+from app.utils.cache_version import get_version_tag
+
+
+async def resource_etag(request: Request, scope: tuple[str, int]) -> str | None:
+    """
+    リクエストされたリソースのETagを作成
+
+    同じスコープの異なるリソース（プロジェクト詳細・タスク一覧など）やクエリ
+    パラメータ（ページ・フィルター）はETagが異なる。
+
+    Args:
+        request: リクエスト
+        scope: 書き込み時にバージョンを進めるスコープ（例: ("project", project_id)）
+
+    Returns:
+        弱いETag（Redis未接続時はNone）
+    """
+    version = await get_version_tag(*scope)
+    if version is None:
+        return None
+    query = sorted(request.query_params.multi_items())
+    digest = hashlib.sha256(f"{request.url.path}|{query}|{version}".encode())
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match のいずれかのETagと一致するか（弱い比較）"""
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def not_modified(
+    request: Request, response: Response, etag: str | None
+) -> Response | None:
+    """
+    If-None-Match がETagと一致すれば304のレスポンスを返す
+
+    一致しない場合は通常のレスポンスにETagを付けて None を返す。
+    アクセス権限の確認は呼び出し前に済ませておくこと。
+
+    Args:
+        request: リクエスト
+        response: ルートのレスポンス（ヘッダーの設定に使う）
+        etag: resource_etag の戻り値
+
+    Returns:
+        304のレスポンス、または None
+    """
+    if etag is None:
+        return None
+    # 毎回再検証させる（認証付きのためブラウザのみにキャッシュさせる）
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
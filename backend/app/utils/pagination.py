@@ -1,36 +1,265 @@
 """ページネーションユーティリティ関数"""
 
+import base64
+import hashlib
+import json
+import logging
 import math
-from typing import TypeVar
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from typing import Any, Literal
+
+from redis.exceptions import RedisError
+from sqlalchemy import DateTime, and_, or_, text
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
 from app.api.schemas import PaginatedResponse
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.core.redis import get_redis_client
+from app.utils.cache_version import get_version
+
+logger = logging.getLogger(__name__)
+
+# 総件数の取得方法
+# exact: COUNT(*) を毎回実行
+# cached: COUNT(*) の結果をRedisにキャッシュ（書き込み時にバージョンで無効化）
+# estimated: PostgreSQLのプランナー推定値（COUNTを実行しない）
+CountStrategy = Literal["exact", "cached", "estimated"]
+
+# (カラム, 降順かどうか) の組。先頭から順にソートキーとして使う
+SortKey = tuple[Any, bool]
+
+
+def encode_cursor(sort_keys: Sequence[SortKey], item: Any) -> str:
+    """
+    アイテムのソートキー値から不透明なカーソル文字列を生成
+
+    Args:
+        sort_keys: ソートキー一覧
+        item: ページ末尾のアイテム
+
+    Returns:
+        URLセーフなBase64エンコード済みカーソル
+    """
+    values = [getattr(item, column.key) for column, _ in sort_keys]
+    payload = {
+        "k": [column.key for column, _ in sort_keys],
+        # 日時はISO形式の文字列にする（decode_cursorでカラムの型に戻す）
+        "v": [v.isoformat() if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(sort_keys: Sequence[SortKey], cursor: str) -> list:
+    """
+    カーソル文字列をソートキー値に復元
+
+    Args:
+        sort_keys: ソートキー一覧（カーソル生成時と同じである必要がある）
+        cursor: encode_cursorで生成したカーソル
+
+    Returns:
+        ソートキー値のリスト
+
+    Raises:
+        ValidationException: カーソルが不正、またはソート順が一致しない場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        keys, values = payload["k"], payload["v"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValidationException("Invalid cursor") from e
 
-T = TypeVar("T")
+    if keys != [column.key for column, _ in sort_keys] or len(values) != len(keys):
+        raise ValidationException("Cursor does not match the requested sort order")
+    try:
+        return [
+            _from_cursor_value(column, value)
+            for (column, _), value in zip(sort_keys, values, strict=True)
+        ]
+    except (ValueError, TypeError) as e:
+        raise ValidationException("Invalid cursor") from e
 
 
-def create_paginated_response(
-    items: list[T], total: int, page: int, page_size: int
+def _from_cursor_value(column: Any, value: Any) -> Any:
+    if value is not None and isinstance(column.type, DateTime):
+        parsed = datetime.fromisoformat(value)
+        # 日時の列はタイムゾーンなし（UTC）のため、改ざんされたカーソルの
+        # タイムゾーン付きの値もnaiveなUTCに揃える（naiveな値と比較できるように）
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(UTC).replace(tzinfo=None)
+        return parsed
+    return value
+
+
+def apply_keyset[Q: SelectOfScalar[Any]](
+    query: Q, sort_keys: Sequence[SortKey], cursor: str | None = None
+) -> Q:
+    """
+    ソート順を適用し、カーソル指定時はその位置以降に絞り込む（キーセットページネーション）
+
+    OFFSETを使わないため、深いページでも先頭ページと同じコストで取得できる。
+
+    Args:
+        query: SQLModel selectクエリ
+        sort_keys: ソートキー一覧（最後のキーは一意である必要がある）
+        cursor: 前ページのnext_cursor
+
+    Returns:
+        ソート・絞り込み済みのクエリ
+    """
+    query = query.order_by(
+        *(column.desc() if desc else column.asc() for column, desc in sort_keys)
+    )
+    if cursor is None:
+        return query
+
+    values = decode_cursor(sort_keys, cursor)
+    # (a, b) > (x, y) を昇順・降順混在に対応した形に展開
+    # a > x OR (a = x AND b > y)
+    conditions = []
+    for i, (column, desc) in enumerate(sort_keys):
+        equals = [c == v for (c, _), v in zip(sort_keys[:i], values[:i], strict=True)]
+        beyond = column < values[i] if desc else column > values[i]
+        conditions.append(and_(*equals, beyond))
+    return query.where(or_(*conditions))
+
+
+async def _exact_count(session: AsyncSession, base_query: SelectOfScalar[Any]) -> int:
+    count_query = select(func.count()).select_from(base_query.subquery())
+    return (await session.exec(count_query)).one()
+
+
+async def _estimated_count(
+    session: AsyncSession, base_query: SelectOfScalar[Any]
+) -> int | None:
+    """EXPLAINのPlan Rowsから件数を推定（PostgreSQL以外はNone）"""
+    if session.bind.dialect.name != "postgresql":
+        return None
+    compiled = base_query.compile(
+        dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def _cached_count(
+    session: AsyncSession, base_query: SelectOfScalar[Any], cache_scope: tuple[str, int]
+) -> int:
+    """COUNT(*) の結果をスコープのバージョン付きキーでキャッシュ"""
+    client = get_redis_client()
+    version = await get_version(*cache_scope)
+    if client is None or version is None:
+        return await _exact_count(session, base_query)
+
+    compiled = base_query.compile()
+    fingerprint = hashlib.sha256(
+        f"{compiled}|{sorted(compiled.params.items())}".encode()
+    ).hexdigest()[:32]
+    scope, scope_id = cache_scope
+    key = f"count:{scope}:{scope_id}:v{version}:{fingerprint}"
+
+    try:
+        cached = await client.get(key)
+        if cached is not None:
+            return int(cached)
+    except RedisError as e:
+        logger.warning(f"Failed to read count cache: {e}")
+
+    total = await _exact_count(session, base_query)
+    try:
+        await client.set(key, total, ex=settings.COUNT_CACHE_TTL_SECONDS)
+    except RedisError as e:
+        logger.warning(f"Failed to write count cache: {e}")
+    return total
+
+
+async def count_total(
+    session: AsyncSession,
+    base_query: SelectOfScalar[Any],
+    strategy: CountStrategy = "exact",
+    cache_scope: tuple[str, int] | None = None,
+) -> tuple[int, bool]:
+    """
+    ページネーション用の総件数を取得
+
+    Args:
+        session: 非同期データベースセッション
+        base_query: フィルタ適用済み・ページネーション適用前のクエリ
+        strategy: 件数の取得方法
+        cache_scope: cached時の無効化スコープ（例: ("project", project_id)）
+
+    Returns:
+        (総件数, 推定値かどうか)。推定できない環境ではexactにフォールバックする
+    """
+    if strategy == "estimated":
+        estimate = await _estimated_count(session, base_query)
+        if estimate is not None:
+            return estimate, True
+    elif strategy == "cached" and cache_scope is not None:
+        return await _cached_count(session, base_query, cache_scope), False
+    return await _exact_count(session, base_query), False
+
+
+def create_paginated_response[T](
+    items: list[T],
+    total: int,
+    page: int,
+    page_size: int,
+    *,
+    sort_keys: Sequence[SortKey] | None = None,
+    cursor: str | None = None,
+    total_estimated: bool = False,
 ) -> PaginatedResponse[T]:
     """
     ページネーションメタ情報付きレスポンスを作成
 
+    sort_keysを指定すると次ページ用のnext_cursorを付与する。
+    cursorを指定した場合（カーソルモード）は、itemsをpage_size + 1件取得しておくこと。
+    超過分の有無で次ページの存在を判定する。
+
     Args:
         items: アイテム一覧
         total: 総件数
         page: 現在のページ（1始まり）
         page_size: ページサイズ
+        sort_keys: ソートキー一覧（next_cursorの生成に使用）
+        cursor: リクエストで指定されたカーソル（カーソルモード時）
+        total_estimated: totalが推定値かどうか（count_totalの戻り値）
 
     Returns:
         PaginatedResponse: ページネーション情報付きレスポンス
     """
     total_pages = math.ceil(total / page_size) if page_size > 0 else 0
 
+    if cursor is not None:
+        has_next = len(items) > page_size
+        items = list(items[:page_size])
+        has_prev = True
+    else:
+        has_next = (page * page_size) < total
+        has_prev = page > 1
+
+    next_cursor = None
+    if sort_keys is not None and has_next and items:
+        next_cursor = encode_cursor(sort_keys, items[-1])
+
     return PaginatedResponse(
         items=items,
         total=total,
         page=page,
         page_size=page_size,
         total_pages=total_pages,
-        has_next=(page * page_size) < total,
-        has_prev=page > 1,
+        has_next=has_next,
+        has_prev=has_prev,
+        next_cursor=next_cursor,
+        total_estimated=total_estimated,
     )
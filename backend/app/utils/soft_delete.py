@@ -1,15 +1,37 @@
 """
 ソフトデリート機能のユーティリティ関数
+
+プロジェクト・スプリントの削除は配下（スプリント・タスク）にも連鎖させる。
+行をPythonに読み込まず、project_id / sprint_id 単位のUPDATE数回で1トランザクションに
+まとめて行う。連鎖で削除した行には親と同じ deleted_at を付け、復元時はその時刻の行
+だけを戻す（連鎖より前に個別に削除されていた行は削除されたまま）。
 """
 
+from dataclasses import dataclass
 from datetime import UTC, datetime
 from typing import TypeVar
 
-from sqlmodel import Session, SQLModel, select
+from sqlalchemy import Update, update
+from sqlmodel import Session, SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Project, Sprint, Task
 
 T = TypeVar("T", bound=SQLModel)
 
 
+def _now() -> datetime:
+    # 日時の列はタイムゾーンなし（UTC）のため、naiveな値で渡す
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def _mark(item: SQLModel, deleted_at: datetime | None) -> None:
+    item.deleted_at = deleted_at
+    # 差分同期（更新日時順の取得）で削除・復元も変更として検出できるようにする
+    if hasattr(item, "updated_at"):
+        item.updated_at = deleted_at or _now()
+
+
 def soft_delete(session: Session, item: SQLModel) -> None:
     """
     ソフトデリートを実行
@@ -19,7 +41,7 @@ def soft_delete(session: Session, item: SQLModel) -> None:
         item: 削除するオブジェクト
     """
     if hasattr(item, "deleted_at"):
-        item.deleted_at = datetime.now(UTC)
+        _mark(item, _now())
         session.add(item)
         session.commit()
     else:
@@ -28,6 +50,24 @@ def soft_delete(session: Session, item: SQLModel) -> None:
         )
 
 
+async def soft_delete_async(session: AsyncSession, item: SQLModel) -> None:
+    """
+    ソフトデリートを実行（非同期セッション版）
+
+    Args:
+        session: 非同期データベースセッション
+        item: 削除するオブジェクト
+    """
+    if hasattr(item, "deleted_at"):
+        _mark(item, _now())
+        session.add(item)
+        await session.commit()
+    else:
+        raise AttributeError(
+            f"Model {type(item).__name__} does not support soft delete"
+        )
+
+
 def restore_item(session: Session, item: SQLModel) -> None:
     """
     ソフトデリートされたアイテムを復元
@@ -37,7 +77,7 @@ def restore_item(session: Session, item: SQLModel) -> None:
         item: 復元するオブジェクト
     """
     if hasattr(item, "deleted_at"):
-        item.deleted_at = None
+        _mark(item, None)
         session.add(item)
         session.commit()
     else:
@@ -84,3 +124,184 @@ def get_deleted_items(
         select(model).where(model.deleted_at.isnot(None)).offset(offset).limit(limit)
     )
     return session.exec(query).all()
+
+
+@dataclass
+class CascadeResult:
+    """連鎖削除・復元で更新した行数"""
+
+    projects: int = 0
+    sprints: int = 0
+    tasks: int = 0
+
+
+async def _execute(session: AsyncSession, stmt: Update) -> int:
+    result = await session.exec(stmt.execution_options(synchronize_session=False))
+    return result.rowcount
+
+
+async def _commit(session: AsyncSession, result: CascadeResult) -> CascadeResult:
+    # 一括UPDATEはセッションに読み込み済みのオブジェクトに反映されない。
+    # 返却に使うオブジェクトは呼び出し側で refresh する
+    await session.commit()
+    return result
+
+
+async def soft_delete_project_async(
+    session: AsyncSession, project_id: int
+) -> CascadeResult:
+    """
+    プロジェクトと配下のスプリント・タスクをソフトデリート
+
+    Args:
+        session: 非同期データベースセッション
+        project_id: 削除するプロジェクトのID
+
+    Returns:
+        削除した行数（削除済みの行は数えない）
+    """
+    now = _now()
+    values = {"deleted_at": now, "updated_at": now}
+    result = CascadeResult()
+    result.tasks = await _execute(
+        session,
+        update(Task)
+        .where(col(Task.project_id) == project_id, col(Task.deleted_at).is_(None))
+        .values(values),
+    )
+    result.sprints = await _execute(
+        session,
+        update(Sprint)
+        .where(col(Sprint.project_id) == project_id, col(Sprint.deleted_at).is_(None))
+        .values(values),
+    )
+    result.projects = await _execute(
+        session,
+        update(Project)
+        .where(col(Project.id) == project_id, col(Project.deleted_at).is_(None))
+        .values(values),
+    )
+    return await _commit(session, result)
+
+
+async def restore_project_async(
+    session: AsyncSession, project_id: int
+) -> CascadeResult:
+    """
+    ソフトデリートしたプロジェクトと、同時に削除された配下のスプリント・タスクを復元
+
+    Args:
+        session: 非同期データベースセッション
+        project_id: 復元するプロジェクトのID
+
+    Returns:
+        復元した行数
+    """
+    deleted_at = (
+        select(Project.deleted_at).where(Project.id == project_id).scalar_subquery()
+    )
+    values = {"deleted_at": None, "updated_at": _now()}
+    result = CascadeResult()
+    result.tasks = await _execute(
+        session,
+        update(Task)
+        .where(col(Task.project_id) == project_id, col(Task.deleted_at) == deleted_at)
+        .values(values),
+    )
+    result.sprints = await _execute(
+        session,
+        update(Sprint)
+        .where(
+            col(Sprint.project_id) == project_id, col(Sprint.deleted_at) == deleted_at
+        )
+        .values(values),
+    )
+    result.projects = await _execute(
+        session,
+        update(Project)
+        .where(col(Project.id) == project_id, col(Project.deleted_at).is_not(None))
+        .values(values),
+    )
+    return await _commit(session, result)
+
+
+async def soft_delete_sprint_async(
+    session: AsyncSession, project_id: int, sprint_id: int
+) -> CascadeResult:
+    """
+    スプリントと所属するタスクをソフトデリート
+
+    Args:
+        session: 非同期データベースセッション
+        project_id: スプリントのプロジェクトID
+        sprint_id: 削除するスプリントのID
+
+    Returns:
+        削除した行数
+    """
+    now = _now()
+    values = {"deleted_at": now, "updated_at": now}
+    result = CascadeResult()
+    result.tasks = await _execute(
+        session,
+        update(Task)
+        .where(
+            col(Task.project_id) == project_id,
+            col(Task.sprint_id) == sprint_id,
+            col(Task.deleted_at).is_(None),
+        )
+        .values(values),
+    )
+    result.sprints = await _execute(
+        session,
+        update(Sprint)
+        .where(
+            col(Sprint.id) == sprint_id,
+            col(Sprint.project_id) == project_id,
+            col(Sprint.deleted_at).is_(None),
+        )
+        .values(values),
+    )
+    return await _commit(session, result)
+
+
+async def restore_sprint_async(
+    session: AsyncSession, project_id: int, sprint_id: int
+) -> CascadeResult:
+    """
+    ソフトデリートしたスプリントと、同時に削除された所属タスクを復元
+
+    Args:
+        session: 非同期データベースセッション
+        project_id: スプリントのプロジェクトID
+        sprint_id: 復元するスプリントのID
+
+    Returns:
+        復元した行数
+    """
+    deleted_at = (
+        select(Sprint.deleted_at).where(Sprint.id == sprint_id).scalar_subquery()
+    )
+    values = {"deleted_at": None, "updated_at": _now()}
+    result = CascadeResult()
+    result.tasks = await _execute(
+        session,
+        update(Task)
+        .where(
+            col(Task.project_id) == project_id,
+            col(Task.sprint_id) == sprint_id,
+            col(Task.deleted_at) == deleted_at,
+        )
+        .values(values),
+    )
+    result.sprints = await _execute(
+        session,
+        update(Sprint)
+        .where(
+            col(Sprint.id) == sprint_id,
+            col(Sprint.project_id) == project_id,
+            col(Sprint.deleted_at).is_not(None),
+        )
+        .values(values),
+    )
+    return await _commit(session, result)
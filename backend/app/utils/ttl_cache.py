@@ -0,0 +1,72 @@
+"""
+プロセス内のTTL付きLRUキャッシュ
+
+エントリごとに有効期限を持ち、上限件数を超えると最も古く参照されたものから削除する。
+同期エンドポイント（スレッドプール）と非同期エンドポイントの両方から使うためロックで保護する。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache[K, V]:
+    """上限件数とエントリごとの有効期限を持つLRUキャッシュ"""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        """
+        Args:
+            maxsize: 最大エントリ数（0以下でキャッシュ無効）
+            ttl: デフォルトの有効期間（秒）。Noneの場合はset時に指定する
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and (self.ttl is None or self.ttl > 0)
+
+    def get(self, key: K) -> V | None:
+        """有効期限内の値を返す（期限切れ・未登録はNone）"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, deadline = entry
+            if deadline <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """
+        値を登録
+
+        Args:
+            key: キー
+            value: 値
+            ttl: 有効期間（秒）。省略時はデフォルトの有効期間を使う
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if not self.enabled or ttl is None or ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """エントリを削除（明示的な無効化）"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,222 @@
+"""
+AIワークフローのクライアント再利用効果を計測するベンチマーク
+
+ローカルにOpenAI互換のスタブサーバーを起動し、run_ai_decomposition を
+以下の3通りで繰り返し実行して1回あたりのレイテンシと新規接続数を比較する。
+
+- no-pool: ノードごとにChatOpenAIとHTTPクライアントを新規作成し、グラフも毎回コンパイル
+- per-node: ノードごとにChatOpenAIを新規作成し、グラフも毎回コンパイル（変更前の実装）
+- shared: プロセス内で共有するクライアントとコンパイル済みグラフ（現在の実装）
+
+スタブは新規接続の受け付け時に --connect-delay-ms だけ待ち、TCP/TLSハンドシェイクの
+往復を模擬する。
+
+使い方:
+    uv run python scripts/bench_llm_client.py
+    uv run python scripts/bench_llm_client.py --runs 50 --connect-delay-ms 60
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings  # noqa: E402
+from app.services import ai_service  # noqa: E402
+from app.tasks.event_loop import run_async  # noqa: E402
+
+EPICS = {"epics": [{"name": "認証", "description": "ログイン機能"}]}
+TASKS = {
+    "tasks": [
+        {
+            "title": f"タスク{i}",
+            "description": "",
+            "priority": 2,
+            "estimate": 4.0,
+            "epic": "認証",
+        }
+        for i in range(5)
+    ]
+}
+SPRINTS = {
+    "sprints": [{"name": "Sprint 1", "tasks": [0, 1, 2, 3, 4], "total_estimate": 20.0}]
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """chat/completions だけを返すOpenAI互換スタブ"""
+
+    protocol_version = "HTTP/1.1"  # keep-aliveを有効にする
+    disable_nagle_algorithm = True
+    connect_delay = 0.0
+    response_delay = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+        time.sleep(self.connect_delay)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        # プロンプトの出力形式の指定から、どの段階の呼び出しかを判定する
+        if '"sprints"' in prompt:
+            content = SPRINTS
+        elif '"tasks"' in prompt:
+            content = TASKS
+        else:
+            content = EPICS
+        time.sleep(self.response_delay)
+
+        payload = json.dumps(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {
+                            "role": "assistant",
+                            "content": json.dumps(content, ensure_ascii=False),
+                        },
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 1,
+                    "completion_tokens": 1,
+                    "total_tokens": 2,
+                },
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _legacy_llm(http_async_client: httpx.AsyncClient | None = None):
+    """変更前の get_llm（呼び出しごとにChatOpenAIを生成）"""
+    return ChatOpenAI(
+        model=settings.AI_MODEL,
+        temperature=0,
+        openai_api_key=settings.OPENAI_API_KEY,
+        openai_api_base=settings.OPENAI_API_BASE,
+        http_async_client=http_async_client,
+        model_kwargs={"response_format": {"type": "json_object"}},
+    )
+
+
+def _no_pool_llm():
+    return _legacy_llm(http_async_client=httpx.AsyncClient())
+
+
+def _compile_every_time():
+    return ai_service.create_ai_workflow()
+
+
+def run_mode(mode: str, runs: int) -> dict:
+    """指定モードで runs 回実行し、レイテンシと新規接続数を返す"""
+    ai_service.reset_llm_clients()
+    ai_service._compiled_workflow = None
+    patches = []
+    if mode in ("no-pool", "per-node"):
+        factory = _no_pool_llm if mode == "no-pool" else _legacy_llm
+        patches = [
+            patch.object(ai_service, "get_llm", factory),
+            patch.object(ai_service, "get_ai_workflow", _compile_every_time),
+        ]
+    for p in patches:
+        p.start()
+    try:
+        # 初回（クライアント生成・グラフのコンパイル・接続確立）は別に計測する
+        start = time.perf_counter()
+        result = run_async(ai_service.run_ai_decomposition("ログイン機能"))
+        first = (time.perf_counter() - start) * 1000
+        if result["error"]:
+            raise RuntimeError(result["error"])
+
+        connections_before = StubHandler.connections
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            run_async(ai_service.run_ai_decomposition("ログイン機能"))
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        for p in patches:
+            p.stop()
+
+    timings.sort()
+    return {
+        "first": first,
+        "mean": statistics.mean(timings),
+        "p50": timings[len(timings) // 2],
+        "p95": timings[int(len(timings) * 0.95) - 1],
+        "connections": (StubHandler.connections - connections_before) / runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument(
+        "--connect-delay-ms",
+        type=float,
+        default=30.0,
+        help="新規接続ごとの待ち時間（TCP/TLSハンドシェイクの模擬）",
+    )
+    parser.add_argument(
+        "--response-delay-ms",
+        type=float,
+        default=0.0,
+        help="リクエストごとの応答待ち時間（モデルの推論時間の模擬）",
+    )
+    args = parser.parse_args()
+
+    StubHandler.connect_delay = args.connect_delay_ms / 1000
+    StubHandler.response_delay = args.response_delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    settings.OPENAI_API_BASE = f"http://127.0.0.1:{server.server_port}/v1"
+    settings.OPENAI_API_KEY = "stub"
+    print(
+        f"Stub server on {settings.OPENAI_API_BASE} "
+        f"(connect delay {args.connect_delay_ms}ms, runs {args.runs})\n"
+    )
+
+    print(
+        f"{'mode':<10}{'first ms':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'conns/run':>11}"
+    )
+    for mode in ("no-pool", "per-node", "shared"):
+        r = run_mode(mode, args.runs)
+        print(
+            f"{mode:<10}{r['first']:>10.1f}{r['mean']:>10.1f}{r['p50']:>10.1f}"
+            f"{r['p95']:>10.1f}{r['connections']:>11.2f}"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+一覧クエリのインデックス効果を計測するベンチマーク
+
+専用スキーマ index_bench に task / sprint / project を作成して大量データを投入し、
+ルーターが発行するクエリの実行計画と実行時間を、モデルで定義した
+部分インデックスの作成前後で比較する。終了時にスキーマは削除する。
+
+使い方:
+    DATABASE_URL=postgresql://... uv run python scripts/bench_task_indexes.py
+    DATABASE_URL=postgresql://... uv run python scripts/bench_task_indexes.py \\
+        --tasks 1000000 --projects 1000 --show-plans
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings  # noqa: E402
+from app.models import Project, Sprint, Task  # noqa: E402
+
+SCHEMA = "index_bench"
+SPRINTS_PER_PROJECT = 10
+
+# ルーターが発行するクエリ
+# :hot は最大プロジェクト、:small は平均的な規模のプロジェクト、:cursor はキーセットの深い位置
+QUERIES = {
+    "list_tasks page 1 (typical)": """
+        SELECT * FROM task WHERE project_id = :small AND deleted_at IS NULL
+        ORDER BY id LIMIT 20
+    """,
+    "list_tasks status (typical)": """
+        SELECT * FROM task WHERE project_id = :small AND deleted_at IS NULL
+        AND status = 'doing' ORDER BY id LIMIT 20
+    """,
+    "list_tasks page 1": """
+        SELECT * FROM task WHERE project_id = :hot AND deleted_at IS NULL
+        ORDER BY id LIMIT 20
+    """,
+    "list_tasks deep offset": """
+        SELECT * FROM task WHERE project_id = :hot AND deleted_at IS NULL
+        ORDER BY id LIMIT 20 OFFSET :deep_offset
+    """,
+    "list_tasks deep cursor": """
+        SELECT * FROM task WHERE project_id = :hot AND deleted_at IS NULL
+        AND id > :cursor ORDER BY id LIMIT 21
+    """,
+    "list_tasks sort=priority": """
+        SELECT * FROM task WHERE project_id = :hot AND deleted_at IS NULL
+        ORDER BY priority DESC, id LIMIT 20
+    """,
+    "list_tasks status=doing": """
+        SELECT * FROM task WHERE project_id = :hot AND deleted_at IS NULL
+        AND status = 'doing' ORDER BY id LIMIT 20
+    """,
+    "list_tasks sprint_id": """
+        SELECT * FROM task WHERE project_id = :hot AND deleted_at IS NULL
+        AND sprint_id = :sprint ORDER BY id LIMIT 20
+    """,
+    "list_tasks count": """
+        SELECT count(*) FROM task WHERE project_id = :hot AND deleted_at IS NULL
+    """,
+    "list_tasks_mcp": """
+        SELECT * FROM task WHERE project_id = :small
+    """,
+    "list_sprints": """
+        SELECT * FROM sprint WHERE project_id = :hot AND deleted_at IS NULL
+    """,
+    "list_projects": """
+        SELECT * FROM project WHERE owner_id = :owner AND deleted_at IS NULL
+        ORDER BY id LIMIT 20
+    """,
+}
+
+
+def seed(conn, tasks: int, projects: int) -> None:
+    """ベンチマーク用のテーブルとデータを作成"""
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"SET search_path TO {SCHEMA}"))
+    conn.execute(
+        text("""
+        CREATE TABLE project (
+            id serial PRIMARY KEY, name varchar NOT NULL, description varchar,
+            owner_id integer NOT NULL, created_at timestamp NOT NULL,
+            updated_at timestamp NOT NULL, deleted_at timestamp
+        );
+        CREATE TABLE sprint (
+            id serial PRIMARY KEY, project_id integer NOT NULL, name varchar NOT NULL,
+            start_date timestamp, end_date timestamp, created_at timestamp NOT NULL,
+            updated_at timestamp NOT NULL, deleted_at timestamp
+        );
+        CREATE TABLE task (
+            id serial PRIMARY KEY, project_id integer NOT NULL, sprint_id integer,
+            title varchar NOT NULL, description varchar, status varchar NOT NULL,
+            priority integer NOT NULL, start_date timestamp, end_date timestamp,
+            estimate double precision, created_at timestamp NOT NULL,
+            updated_at timestamp NOT NULL, deleted_at timestamp
+        );
+    """)
+    )
+    # 100プロジェクトごとに1オーナー、5%を論理削除
+    conn.execute(
+        text("""
+        INSERT INTO project (name, owner_id, created_at, updated_at, deleted_at)
+        SELECT 'Project ' || g, 1 + g / 100, now(), now(),
+               CASE WHEN g % 20 = 0 THEN now() END
+        FROM generate_series(1, :projects) g
+    """),
+        {"projects": projects},
+    )
+    conn.execute(
+        text("""
+        INSERT INTO sprint (project_id, name, created_at, updated_at)
+        SELECT p, 'Sprint ' || s, now(), now()
+        FROM generate_series(1, :projects) p,
+             generate_series(1, :per_project) s
+    """),
+        {"projects": projects, "per_project": SPRINTS_PER_PROJECT},
+    )
+    # 10%をプロジェクト1（ホットプロジェクト）に集中させ、残りは均等に分散。約6%を論理削除
+    conn.execute(
+        text("""
+        INSERT INTO task (project_id, sprint_id, title, status, priority,
+                          created_at, updated_at, deleted_at)
+        SELECT pid, (pid - 1) * :per_project + 1 + g % :per_project,
+               'Task ' || g,
+               (ARRAY['todo', 'doing', 'done'])[1 + g % 3],
+               1 + (g / 7) % 3, now(), now(),
+               CASE WHEN g % 17 = 0 THEN now() END
+        FROM (
+            SELECT g, CASE WHEN g % 10 = 0 THEN 1
+                           ELSE 2 + g % (:projects - 1) END AS pid
+            FROM generate_series(1, :tasks) g
+        ) t
+    """),
+        {"tasks": tasks, "projects": projects, "per_project": SPRINTS_PER_PROJECT},
+    )
+    conn.execute(text("ANALYZE"))
+
+
+def create_indexes(conn) -> list[str]:
+    """モデルで定義したインデックスを作成（search_pathによりベンチ用スキーマに作られる）"""
+    names = []
+    for model in (Project, Sprint, Task):
+        for index in sorted(model.__table__.indexes, key=lambda i: i.name):
+            ddl = CreateIndex(index).compile(dialect=postgresql.dialect())
+            conn.execute(text(str(ddl)))
+            names.append(index.name)
+    conn.execute(text("ANALYZE"))
+    return names
+
+
+def measure(conn, params: dict, repeat: int) -> dict:
+    """各クエリのEXPLAIN ANALYZE結果（中央値の実行時間と計画）を取得"""
+    results = {}
+    for name, sql in QUERIES.items():
+        timings = []
+        plan = None
+        for _ in range(repeat):
+            row = conn.execute(
+                text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params
+            ).scalar_one()
+            report = row if isinstance(row, list) else json.loads(row)
+            timings.append(report[0]["Execution Time"])
+            plan = report[0]["Plan"]
+        text_plan = conn.execute(text(f"EXPLAIN {sql}"), params).scalars().all()
+        results[name] = {
+            "ms": statistics.median(timings),
+            "node": _describe(plan),
+            "plan": text_plan,
+        }
+    return results
+
+
+def _describe(plan: dict) -> str:
+    """計画の中で最初に現れるスキャンノードを要約"""
+    stack = [plan]
+    while stack:
+        node = stack.pop(0)
+        if "Scan" in node["Node Type"]:
+            index = node.get("Index Name")
+            return f"{node['Node Type']} ({index})" if index else node["Node Type"]
+        stack.extend(node.get("Plans", []))
+    return plan["Node Type"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--projects", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--show-plans", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="スキーマを削除しない")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        print(f"Seeding {args.tasks:,} tasks across {args.projects:,} projects...")
+        seed(conn, args.tasks, args.projects)
+
+        hot_tasks = conn.execute(
+            text(
+                "SELECT count(*) FROM task WHERE project_id = 1 AND deleted_at IS NULL"
+            )
+        ).scalar_one()
+        params = {
+            "hot": 1,
+            "small": 2,
+            "owner": 1,
+            "sprint": 1,
+            "deep_offset": hot_tasks // 2,
+            "cursor": conn.execute(
+                text(
+                    "SELECT id FROM task WHERE project_id = 1 AND deleted_at IS NULL "
+                    "ORDER BY id OFFSET :o LIMIT 1"
+                ),
+                {"o": hot_tasks // 2},
+            ).scalar_one(),
+        }
+        print(f"Hot project has {hot_tasks:,} active tasks\n")
+
+        before = measure(conn, params, args.repeat)
+        created = create_indexes(conn)
+        print(f"Created indexes: {', '.join(created)}\n")
+        after = measure(conn, params, args.repeat)
+
+        width = max(len(name) for name in QUERIES)
+        print(
+            f"{'query':<{width}}  {'before ms':>10}  {'after ms':>10}  {'speedup':>8}"
+        )
+        for name in QUERIES:
+            b, a = before[name]["ms"], after[name]["ms"]
+            speedup = b / a if a else float("inf")
+            print(f"{name:<{width}}  {b:>10.2f}  {a:>10.2f}  {speedup:>7.1f}x")
+            print(f"{'':<{width}}    {before[name]['node']} -> {after[name]['node']}")
+
+        if args.show_plans:
+            for name in QUERIES:
+                print(f"\n== {name} (before) ==")
+                print("\n".join(before[name]["plan"]))
+                print(f"== {name} (after) ==")
+                print("\n".join(after[name]["plan"]))
+
+        if not args.keep:
+            conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
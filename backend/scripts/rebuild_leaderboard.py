@@ -0,0 +1,33 @@
+"""
+ポイントランキング（Redis ZSET）をuserテーブルから再構築する
+
+初回導入時や、Redisのデータ消失・不整合が疑われる場合に実行する。
+
+使い方:
+    uv run python scripts/rebuild_leaderboard.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.redis import close_redis, init_redis  # noqa: E402
+from app.db.session import async_engine, async_session_factory  # noqa: E402
+from app.services import leaderboard  # noqa: E402
+
+
+async def main() -> None:
+    await init_redis()
+    try:
+        async with async_session_factory() as session:
+            total = await leaderboard.rebuild(session)
+        print(f"Rebuilt leaderboard with {total:,} users")
+    finally:
+        await close_redis()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
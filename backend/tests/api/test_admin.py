@@ -1,10 +1,14 @@
 """管理者APIのテスト。"""
 
+import asyncio
+
+import fakeredis
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
-from app.core.security import hash_password
+from app.core.security import create_access_token, hash_password
 from app.models import Project, User
+from app.tasks import queues
 
 
 def test_list_users(client: TestClient, admin_auth_headers: dict, session: Session):
@@ -77,6 +81,22 @@ def test_list_all_projects_forbidden_for_normal_user(
     assert response.status_code == 403
 
 
+def test_get_password_hasher_stats(client: TestClient, admin_auth_headers: dict):
+    """管理者: パスワードハッシュ用エグゼキューターの統計を取得"""
+    client.post(
+        "/api/auth/login",
+        json={"email": "admin-test@example.com", "password": "testpassword123"},
+    )
+
+    response = client.get("/api/admin/password-hasher", headers=admin_auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["completed"] >= 1
+    assert data["queued"] == 0
+    assert data["workers"] >= 1
+
+
 def test_make_user_admin(
     client: TestClient, admin_auth_headers: dict, session: Session
 ):
@@ -104,6 +124,61 @@ def test_make_user_admin(
     assert target_user.role == "admin"
 
 
+def test_make_user_admin_takes_effect_immediately(
+    client: TestClient, admin_auth_headers: dict, session: Session
+):
+    """昇格・剥奪はキャッシュ済みのユーザーにも即座に反映される"""
+    target_user = User(
+        email="cached@example.com",
+        password_hash=hash_password("password123"),
+        role="user",
+    )
+    session.add(target_user)
+    session.commit()
+    session.refresh(target_user)
+    token = create_access_token(subject=target_user.id, email=target_user.email)
+    target_headers = {"Authorization": f"Bearer {token}"}
+
+    # 一般ユーザーとしてキャッシュされる
+    assert client.get("/api/admin/users", headers=target_headers).status_code == 403
+
+    client.post(
+        f"/api/admin/users/{target_user.id}/make-admin", headers=admin_auth_headers
+    )
+    assert client.get("/api/admin/users", headers=target_headers).status_code == 200
+
+    client.post(
+        f"/api/admin/users/{target_user.id}/revoke-admin", headers=admin_auth_headers
+    )
+    assert client.get("/api/admin/users", headers=target_headers).status_code == 403
+
+
+def test_revoked_admin_is_rejected_despite_cached_row(
+    client: TestClient, session: Session
+):
+    """他のワーカーで剥奪された（このプロセスのキャッシュが残っている）場合も拒否する"""
+    target_user = User(
+        email="stale-admin@example.com",
+        password_hash=hash_password("password123"),
+        role="admin",
+    )
+    session.add(target_user)
+    session.commit()
+    session.refresh(target_user)
+    token = create_access_token(subject=target_user.id, email=target_user.email)
+    target_headers = {"Authorization": f"Bearer {token}"}
+
+    # 管理者としてキャッシュされる
+    assert client.get("/api/admin/users", headers=target_headers).status_code == 200
+
+    # キャッシュを無効化せずにDBだけを更新する
+    target_user.role = "user"
+    session.add(target_user)
+    session.commit()
+
+    assert client.get("/api/admin/users", headers=target_headers).status_code == 403
+
+
 def test_make_user_admin_not_found(client: TestClient, admin_auth_headers: dict):
     """存在しないユーザーの管理者昇格"""
     response = client.post(
@@ -218,3 +293,43 @@ def test_revoke_user_admin_forbidden_for_normal_user(
     )
 
     assert response.status_code == 403
+
+
+def test_get_db_pool_stats(client: TestClient, admin_auth_headers: dict):
+    """管理者: DBコネクションプール統計を取得"""
+    response = client.get("/api/admin/db-pool", headers=admin_auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["pool"] for p in data] == ["sync", "async"]
+    assert all(p["waits"] >= 0 and p["checkouts"] >= 0 for p in data)
+
+
+def test_get_db_pool_stats_forbidden_for_normal_user(
+    client: TestClient, auth_headers: dict
+):
+    """一般ユーザーはプール統計にアクセスできない"""
+    response = client.get("/api/admin/db-pool", headers=auth_headers)
+
+    assert response.status_code == 403
+
+
+def test_get_ai_queue_stats(
+    client: TestClient, admin_auth_headers: dict, redis_client, monkeypatch
+):
+    """管理者: AIワーカーのキューの深さと待ち時間を取得"""
+    broker = fakeredis.FakeRedis()
+    broker.rpush("ai.interactive", "m1")
+    broker.rpush("ai.interactive:3", "m2")
+    monkeypatch.setattr(queues, "_broker_client", broker)
+    asyncio.run(redis_client.lpush("ai_queue:wait:ai.bulk", 120, 80))
+
+    response = client.get("/api/admin/ai-queues", headers=admin_auth_headers)
+
+    assert response.status_code == 200
+    stats = {s["queue"]: s for s in response.json()}
+    assert stats["ai.interactive"]["depth"] == 2
+    assert stats["ai.interactive"]["wait_samples"] == 0
+    assert stats["ai.bulk"]["depth"] == 0
+    assert stats["ai.bulk"]["wait_samples"] == 2
+    assert stats["ai.bulk"]["wait_ms_max"] == 120
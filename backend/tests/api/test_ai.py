@@ -1,12 +1,18 @@
 """AI APIのテスト。"""
 
-from unittest.mock import MagicMock, patch
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 
+from app.core.config import settings
 from app.core.security import hash_password
-from app.models import Project, User
+from app.models import Project, Sprint, Task, User
+from app.services.ai_progress import get_job_owner, publish_progress, record_job_owner
 
 
 def _create_project_for_auth_user(session: Session) -> Project:
@@ -34,7 +40,7 @@ def test_start_decomposition(
     # Celeryタスクのモック
     mock_task = MagicMock()
     mock_task.id = "test-job-id-123"
-    mock_decompose.delay.return_value = mock_task
+    mock_decompose.apply_async.return_value = mock_task
 
     response = client.post(
         f"/api/projects/{project.id}/ai/decompose",
@@ -49,11 +55,13 @@ def test_start_decomposition(
     assert "message" in data
 
     # Celeryタスクが正しい引数で呼ばれたことを検証
-    mock_decompose.delay.assert_called_once_with(
-        project_id=project.id,
-        user_requirement="ユーザー認証機能を実装してください",
-        sprint_id=None,
-    )
+    kwargs = mock_decompose.apply_async.call_args.kwargs["kwargs"]
+    assert kwargs["project_id"] == project.id
+    assert kwargs["user_requirement"] == "ユーザー認証機能を実装してください"
+    assert kwargs["sprint_id"] is None
+    assert kwargs["user_id"] == project.owner_id
+    assert kwargs["queue"] == "ai.interactive"
+    assert mock_decompose.apply_async.call_args.kwargs["queue"] == "ai.interactive"
 
 
 @patch("app.api.routers.ai.decompose_tasks_async")
@@ -68,7 +76,7 @@ def test_start_decomposition_with_sprint_id(
 
     mock_task = MagicMock()
     mock_task.id = "test-job-id-456"
-    mock_decompose.delay.return_value = mock_task
+    mock_decompose.apply_async.return_value = mock_task
 
     response = client.post(
         f"/api/projects/{project.id}/ai/decompose",
@@ -77,11 +85,9 @@ def test_start_decomposition_with_sprint_id(
     )
 
     assert response.status_code == 202
-    mock_decompose.delay.assert_called_once_with(
-        project_id=project.id,
-        user_requirement="タスク分解",
-        sprint_id=42,
-    )
+    kwargs = mock_decompose.apply_async.call_args.kwargs["kwargs"]
+    assert kwargs["user_requirement"] == "タスク分解"
+    assert kwargs["sprint_id"] == 42
 
 
 def test_start_decomposition_unauthorized(client: TestClient):
@@ -124,7 +130,7 @@ def test_start_decomposition_forbidden_project(
 
     assert response.status_code == 403
     # Celeryタスクが呼ばれていないことを検証
-    mock_decompose.delay.assert_not_called()
+    mock_decompose.apply_async.assert_not_called()
 
 
 def test_start_decomposition_project_not_found(
@@ -216,3 +222,358 @@ def test_get_decomposition_status_unauthorized(client: TestClient):
     response = client.get("/api/ai/jobs/test-job-id")
 
     assert response.status_code in (401, 403)
+
+
+@patch("app.services.ai_service.run_ai_decomposition", new_callable=AsyncMock)
+def test_decompose_sync_saves_tasks(
+    mock_run: AsyncMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+):
+    """同期分解エンドポイントがスプリントとタスクを保存するテスト"""
+    project = _create_project_for_auth_user(session)
+    mock_run.return_value = {
+        "epics": [{"name": "認証", "description": ""}],
+        "tasks": [
+            {"title": "ログイン画面", "priority": 1, "estimate": 4.0},
+            {"title": "ログインAPI", "priority": 2, "estimate": 8.0},
+        ],
+        "sprints": [{"name": "Sprint 1", "tasks": [0, 1], "total_estimate": 12.0}],
+        "error": None,
+    }
+
+    response = client.post(
+        f"/api/projects/{project.id}/ai/decompose-sync",
+        json={"prompt": "ログイン機能"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()["tasks"]] == [
+        "ログイン画面",
+        "ログインAPI",
+    ]
+    sprint = session.exec(select(Sprint).where(Sprint.project_id == project.id)).one()
+    tasks = session.exec(select(Task).where(Task.project_id == project.id)).all()
+    assert len(tasks) == 2
+    assert all(task.sprint_id == sprint.id for task in tasks)
+
+
+@patch("app.services.ai_service.run_ai_decomposition", new_callable=AsyncMock)
+@patch("app.api.routers.ai.decompose_tasks_async")
+def test_decompose_sync_applies_job_admission(
+    mock_decompose: MagicMock,
+    mock_run: AsyncMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+    monkeypatch,
+):
+    """同期エンドポイントも同時実行数の上限を守り、終了時に枠を解放する"""
+    monkeypatch.setattr(settings, "AI_MAX_JOBS_PER_USER", 1)
+    project = _create_project_for_auth_user(session)
+    mock_run.return_value = {"tasks": [], "sprints": [], "error": None}
+    mock_decompose.apply_async.side_effect = lambda kwargs, task_id, **_: MagicMock(
+        id=task_id
+    )
+    url = f"/api/projects/{project.id}/ai/decompose-sync"
+
+    response = client.post(url, json={"prompt": "要件A"}, headers=auth_headers)
+    assert response.status_code == 200
+    # 終了時に枠を解放しているため、続けて受け付けられる
+    response = client.post(url, json={"prompt": "要件B"}, headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.post(
+        f"/api/projects/{project.id}/ai/decompose",
+        json={"prompt": "要件C"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 202
+    response = client.post(url, json={"prompt": "要件D"}, headers=auth_headers)
+    assert response.status_code == 429
+    assert mock_run.await_count == 2
+
+
+def _record_owner(session: Session, job_id: str, email: str = "auth-test@example.com"):
+    user = session.exec(select(User).where(User.email == email)).one()
+    asyncio.run(record_job_owner(job_id, user.id))
+
+
+def _publish(job_id: str, *events: tuple[str, dict]) -> None:
+    async def publish():
+        for event, data in events:
+            await publish_progress(job_id, event, data)
+
+    asyncio.run(publish())
+
+
+def _parse_sse(body: str) -> list[dict]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "event" in fields:
+            events.append(
+                {
+                    "id": fields.get("id"),
+                    "event": fields["event"],
+                    "data": json.loads(fields["data"]),
+                }
+            )
+    return events
+
+
+@patch("app.api.routers.ai.get_task_status")
+def test_stream_events_replays_published_events(
+    mock_get_status: MagicMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+):
+    """配信済みの進捗イベントを順に送り、終了イベントでストリームを閉じる"""
+    _record_owner(session, "job-1")
+    _publish(
+        "job-1",
+        ("epics", {"epics": [{"name": "認証"}], "error": None}),
+        ("epic_tasks", {"epic_index": 0, "epic": "認証", "tasks": [{"title": "A"}]}),
+        ("completed", {"status": "completed", "tasks_count": 1}),
+    )
+
+    response = client.get("/api/ai/jobs/job-1/events", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(response.text)
+    assert [e["event"] for e in events] == ["epics", "epic_tasks", "completed"]
+    assert [e["id"] for e in events] == ["1", "2", "3"]
+    assert events[1]["data"]["tasks"] == [{"title": "A"}]
+    mock_get_status.assert_not_called()
+
+
+@patch("app.api.routers.ai.get_task_status")
+def test_stream_events_resumes_after_last_event_id(
+    mock_get_status: MagicMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+):
+    """Last-Event-ID 以降のイベントだけを送る"""
+    _record_owner(session, "job-2")
+    _publish(
+        "job-2",
+        ("epics", {"epics": [], "error": None}),
+        ("tasks", {"tasks": [], "error": None}),
+        ("failed", {"error": "boom"}),
+    )
+
+    response = client.get(
+        "/api/ai/jobs/job-2/events",
+        headers={**auth_headers, "Last-Event-ID": "1"},
+    )
+
+    events = _parse_sse(response.text)
+    assert [e["event"] for e in events] == ["tasks", "failed"]
+
+
+@patch("app.api.routers.ai.get_task_status")
+def test_stream_events_receives_live_events(
+    mock_get_status: MagicMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+):
+    """購読開始後に配信されたイベントを受け取る"""
+    _record_owner(session, "job-3")
+    mock_get_status.return_value = {"status": "PROCESSING", "message": ""}
+
+    def publish_later():
+        time.sleep(0.3)
+        _publish(
+            "job-3",
+            ("sprints", {"sprints": [{"name": "Sprint 1"}], "error": None}),
+            ("completed", {"status": "completed"}),
+        )
+
+    publisher = threading.Thread(target=publish_later)
+    publisher.start()
+    response = client.get("/api/ai/jobs/job-3/events", headers=auth_headers)
+    publisher.join()
+
+    events = _parse_sse(response.text)
+    assert [e["event"] for e in events] == ["sprints", "completed"]
+
+
+@patch("app.api.routers.ai.get_task_status")
+def test_stream_events_for_finished_job_without_events(
+    mock_get_status: MagicMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+):
+    """進捗イベントが残っていない終了済みジョブは結果を終了イベントとして返す"""
+    _record_owner(session, "job-4")
+    mock_get_status.return_value = {
+        "status": "SUCCESS",
+        "message": "タスクが完了しました",
+        "result": {"status": "completed", "tasks_count": 5},
+    }
+
+    response = client.get("/api/ai/jobs/job-4/events", headers=auth_headers)
+
+    events = _parse_sse(response.text)
+    assert [e["event"] for e in events] == ["completed"]
+    assert events[0]["data"]["tasks_count"] == 5
+
+
+def test_stream_events_without_redis(client: TestClient, auth_headers: dict):
+    """Redis未接続時は503を返す"""
+    response = client.get("/api/ai/jobs/job-5/events", headers=auth_headers)
+    assert response.status_code == 503
+
+
+@patch("app.api.routers.ai.get_task_status")
+def test_stream_events_of_another_users_job(
+    mock_get_status: MagicMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+):
+    """他のユーザーのジョブ・不明なジョブの進捗は購読できない（404）"""
+    other = User(
+        email="other-ai@example.com",
+        password_hash=hash_password("testpassword123"),
+    )
+    session.add(other)
+    session.commit()
+    _record_owner(session, "job-6", email="other-ai@example.com")
+    _publish("job-6", ("epics", {"epics": [{"name": "秘密"}], "error": None}))
+
+    for job_id in ("job-6", "unknown-job"):
+        response = client.get(f"/api/ai/jobs/{job_id}/events", headers=auth_headers)
+        assert response.status_code == 404
+    mock_get_status.assert_not_called()
+
+
+@patch("app.api.routers.ai.decompose_tasks_async")
+def test_start_decomposition_records_job_owner(
+    mock_decompose: MagicMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+):
+    """受け付けたジョブには投入前に所有者が記録される"""
+    project = _create_project_for_auth_user(session)
+    mock_decompose.apply_async.side_effect = lambda kwargs, task_id, **_: MagicMock(
+        id=task_id
+    )
+
+    response = client.post(
+        f"/api/projects/{project.id}/ai/decompose",
+        json={"prompt": "ログイン機能"},
+        headers=auth_headers,
+    )
+
+    job_id = response.json()["job_id"]
+    assert asyncio.run(get_job_owner(job_id)) == project.owner_id
+
+
+@patch("app.api.routers.ai.decompose_tasks_async")
+def test_start_decomposition_deduplicates_in_flight_job(
+    mock_decompose: MagicMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+):
+    """実行中の同じ要件のジョブがあれば、新しいジョブを作らずそのIDを返す"""
+    project = _create_project_for_auth_user(session)
+    mock_decompose.apply_async.side_effect = lambda kwargs, task_id, **_: MagicMock(
+        id=task_id
+    )
+
+    responses = [
+        client.post(
+            f"/api/projects/{project.id}/ai/decompose",
+            json={"prompt": "ログイン機能"},
+            headers=auth_headers,
+        )
+        for _ in range(2)
+    ]
+
+    assert [r.status_code for r in responses] == [202, 202]
+    assert responses[0].json()["job_id"] == responses[1].json()["job_id"]
+    mock_decompose.apply_async.assert_called_once()
+
+
+@patch("app.api.routers.ai.decompose_tasks_async")
+def test_start_decomposition_rejects_over_concurrency(
+    mock_decompose: MagicMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+    monkeypatch,
+):
+    """同時実行数の上限を超えるジョブは429で断る"""
+    monkeypatch.setattr(settings, "AI_MAX_JOBS_PER_USER", 1)
+    project = _create_project_for_auth_user(session)
+    mock_decompose.apply_async.side_effect = lambda kwargs, task_id, **_: MagicMock(
+        id=task_id
+    )
+
+    statuses = [
+        client.post(
+            f"/api/projects/{project.id}/ai/decompose",
+            json={"prompt": prompt},
+            headers=auth_headers,
+        )
+        for prompt in ("要件A", "要件B")
+    ]
+
+    assert statuses[0].status_code == 202
+    assert statuses[1].status_code == 429
+    assert "Retry-After" in statuses[1].headers
+    assert mock_decompose.apply_async.call_count == 1
+
+
+@patch("app.api.routers.ai.decompose_tasks_async")
+def test_start_decomposition_lowers_priority_per_project(
+    mock_decompose: MagicMock,
+    client: TestClient,
+    auth_headers: dict,
+    session: Session,
+    redis_client,
+    monkeypatch,
+):
+    """同じプロジェクトの実行中ジョブが多いほど低い優先度でキューに入れる"""
+    monkeypatch.setattr(settings, "AI_MAX_JOBS_PER_USER", 5)
+    project = _create_project_for_auth_user(session)
+    mock_decompose.apply_async.side_effect = lambda kwargs, task_id, **_: MagicMock(
+        id=task_id
+    )
+
+    for prompt, background in (("要件A", False), ("要件B", True)):
+        response = client.post(
+            f"/api/projects/{project.id}/ai/decompose",
+            json={"prompt": prompt, "background": background},
+            headers=auth_headers,
+        )
+        assert response.status_code == 202
+
+    calls = [c.kwargs for c in mock_decompose.apply_async.call_args_list]
+    assert [(c["queue"], c["priority"]) for c in calls] == [
+        ("ai.interactive", 0),
+        ("ai.bulk", 1),
+    ]
+    assert calls[1]["kwargs"]["queue"] == "ai.bulk"
+    assert calls[1]["kwargs"]["enqueued_at"] <= time.time()
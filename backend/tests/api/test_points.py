@@ -1,10 +1,13 @@
 """ポイント・実績システムAPIのテスト。"""
 
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
-from app.core.security import hash_password
+from app.api.dependencies import _user_cache
+from app.core.security import create_access_token, hash_password
 from app.models import Achievement, User
 
 
@@ -81,6 +84,29 @@ def test_get_my_points_empty(client: TestClient, user_with_points: User):
     assert data["points_history"] == []
 
 
+def test_points_are_read_fresh_despite_user_cache(
+    client: TestClient, session: Session, user_with_points: User
+):
+    """他のワーカーで加算されたポイントも、キャッシュに関係なく反映される。"""
+    token = create_access_token(
+        subject=user_with_points.id, email=user_with_points.email
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/points/me", headers=headers).json()["total_points"] == 150
+    cached = _user_cache.get(user_with_points.id)
+    assert cached is not None
+    assert "password_hash" not in cached
+
+    # キャッシュを無効化しない別プロセスでの加算を想定
+    user_with_points.total_points = 400
+    session.add(user_with_points)
+    session.commit()
+
+    assert client.get("/api/points/me", headers=headers).json()["total_points"] == 400
+    rank = client.get("/api/points/leaderboard/me", headers=headers).json()
+    assert rank["total_points"] == 400
+
+
 def test_add_points(client: TestClient, user_with_points: User):
     """ポイント追加のテスト。"""
     # ログイン
@@ -210,6 +236,13 @@ def test_get_leaderboard(client: TestClient, session: Session):
     assert data[1]["total_points"] >= data[2]["total_points"]  # type: ignore[index]
 
 
+def test_get_leaderboard_rejects_out_of_range_limit(client: TestClient):
+    """limit は1〜100の範囲に制限される"""
+    for limit in (0, 101, -1):
+        response = client.get(f"/api/points/leaderboard?limit={limit}")
+        assert response.status_code == 422
+
+
 def test_points_history_ordering(client: TestClient, user_with_points: User):
     """ポイント履歴の順序テスト（最新順）。"""
     # ログイン
@@ -252,3 +285,87 @@ def test_unauthenticated_points_access(client: TestClient):
 
     response = client.post("/api/points/me/add", json={"points": 10, "reason": "test"})
     assert response.status_code in (401, 403)
+
+
+def _rebuild_leaderboard(database_url: str) -> int:
+    """テスト用DBからランキングを再構築するヘルパー。"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from app.db.session import to_async_database_url
+    from app.services import leaderboard
+
+    async def run():
+        engine = create_async_engine(to_async_database_url(database_url))
+        async with AsyncSession(engine) as async_session:
+            total = await leaderboard.rebuild(async_session)
+        await engine.dispose()
+        return total
+
+    return asyncio.run(run())
+
+
+def test_leaderboard_from_redis(
+    client: TestClient, session: Session, database_url: str, redis_client
+):
+    """再構築後はRedisのランキングから取得し、ポイント加算が反映される。"""
+    users = []
+    for email, points in [("top@example.com", 300), ("mid@example.com", 200)]:
+        user = User(
+            email=email,
+            password_hash=hash_password("testpassword123"),
+            role="user",
+            total_points=points,
+        )
+        session.add(user)
+        users.append(user)
+    session.commit()
+
+    assert _rebuild_leaderboard(database_url) == 2
+
+    # DBを直接変更しても、再構築済みのランキングが使われる
+    users[0].email = "renamed@example.com"
+    session.add(users[0])
+    session.commit()
+
+    headers = {
+        "Authorization": "Bearer "
+        + create_access_token(subject=users[1].id, email=users[1].email)
+    }
+    response = client.post(
+        "/api/points/me/add",
+        json={"points": 150, "reason": "逆転", "task_id": None},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    data = client.get("/api/points/leaderboard?limit=10").json()
+    assert [(u["email"], u["total_points"]) for u in data] == [
+        ("mid@example.com", 350),
+        ("renamed@example.com", 300),
+    ]
+
+    rank = client.get("/api/points/leaderboard/me", headers=headers).json()
+    assert rank == {"user_id": users[1].id, "total_points": 350, "rank": 1}
+
+
+def test_leaderboard_not_created_by_partial_update(
+    client: TestClient, user_with_points: User, redis_client
+):
+    """未構築のランキングはポイント加算で作られず、DBから集計される。"""
+    headers = {
+        "Authorization": "Bearer "
+        + create_access_token(subject=user_with_points.id, email=user_with_points.email)
+    }
+    client.post(
+        "/api/points/me/add",
+        json={"points": 10, "reason": "追加", "task_id": None},
+        headers=headers,
+    )
+
+    assert asyncio.run(redis_client.exists("leaderboard:total_points")) == 0
+    data = client.get("/api/points/leaderboard").json()
+    assert data[0]["total_points"] == 160
+
+    rank = client.get("/api/points/leaderboard/me", headers=headers).json()
+    assert rank["rank"] == 1
@@ -2,11 +2,13 @@
 プロジェクトAPIのテスト
 """
 
+from datetime import datetime
+
 from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 
 from app.core.security import hash_password
-from app.models import Project, User
+from app.models import Project, Sprint, Task, User
 
 
 def _get_auth_user(session: Session) -> User:
@@ -85,6 +87,40 @@ def test_list_projects_pagination(client: TestClient, auth_headers: dict):
     assert len(data["items"]) <= 1
 
 
+def test_list_projects_cursor_pagination(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """next_cursorを辿って全プロジェクトを重複なく取得できる"""
+    user = _get_auth_user(session)
+    for i in range(5):
+        session.add(Project(name=f"Cursor Project {i}", owner_id=user.id))
+    session.commit()
+
+    response = client.get("/api/projects?page_size=2", headers=auth_headers)
+    data = response.json()
+    seen = [p["id"] for p in data["items"]]
+    while data["next_cursor"]:
+        response = client.get(
+            f"/api/projects?page_size=2&cursor={data['next_cursor']}",
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["has_prev"] is True
+        seen.extend(p["id"] for p in data["items"])
+
+    assert seen == sorted(seen)
+    assert len(seen) == 5
+    assert data["has_next"] is False
+
+
+def test_list_projects_invalid_cursor(client: TestClient, auth_headers: dict):
+    """不正なカーソルは422"""
+    response = client.get("/api/projects?cursor=not-a-cursor", headers=auth_headers)
+
+    assert response.status_code == 422
+
+
 def test_get_project(client: TestClient, auth_headers: dict, session: Session):
     """プロジェクト詳細取得"""
     user = _get_auth_user(session)
@@ -102,6 +138,36 @@ def test_get_project(client: TestClient, auth_headers: dict, session: Session):
     assert data["id"] == project.id
 
 
+def test_get_project_conditional_get(
+    client: TestClient, auth_headers: dict, session: Session, redis_client
+):
+    """変更がなければ304。ETagが一致しても他ユーザーのプロジェクトは拒否"""
+    user = _get_auth_user(session)
+    project = Project(name="ETag Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+
+    url = f"/api/projects/{project.id}"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    other_user = User(
+        email="other-etag@example.com",
+        password_hash=hash_password("password123"),
+        role="user",
+    )
+    session.add(other_user)
+    session.commit()
+    project.owner_id = other_user.id
+    session.add(project)
+    session.commit()
+
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 403
+
+
 def test_get_project_not_found(client: TestClient, auth_headers: dict):
     """存在しないプロジェクト取得"""
     response = client.get("/api/projects/99999", headers=auth_headers)
@@ -150,6 +216,68 @@ def test_delete_project(client: TestClient, auth_headers: dict, session: Session
     assert response.status_code == 404
 
 
+def test_delete_project_cascades_and_restore(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """配下のスプリント・タスクも削除され、復元で一緒に戻る"""
+    user = _get_auth_user(session)
+    project = Project(name="Cascade Test", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    sprint = Sprint(name="Cascade Sprint", project_id=project.id)
+    session.add(sprint)
+    session.commit()
+    session.refresh(sprint)
+    in_sprint = Task(title="In Sprint", project_id=project.id, sprint_id=sprint.id)
+    backlog = Task(title="Backlog", project_id=project.id)
+    # 先に個別に削除していたタスクは復元しない
+    removed_at = datetime(2024, 1, 1)
+    removed = Task(title="Removed", project_id=project.id, deleted_at=removed_at)
+    session.add_all([in_sprint, backlog, removed])
+    session.commit()
+
+    response = client.delete(f"/api/projects/{project.id}", headers=auth_headers)
+    assert response.status_code == 204
+
+    session.expire_all()
+    assert project.deleted_at is not None
+    assert sprint.deleted_at == project.deleted_at
+    assert in_sprint.deleted_at == project.deleted_at
+    assert backlog.deleted_at == project.deleted_at
+    assert removed.deleted_at == removed_at
+
+    response = client.post(f"/api/projects/{project.id}/restore", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["name"] == "Cascade Test"
+
+    session.expire_all()
+    assert project.deleted_at is None
+    assert sprint.deleted_at is None
+    assert in_sprint.deleted_at is None
+    assert backlog.deleted_at is None
+    assert removed.deleted_at == removed_at
+
+    response = client.get(f"/mcp/tasks/{project.id}", headers=auth_headers)
+    assert response.status_code == 200
+    assert {task["title"] for task in response.json()} == {"In Sprint", "Backlog"}
+
+
+def test_restore_project_not_deleted(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """削除されていないプロジェクトは復元できない"""
+    user = _get_auth_user(session)
+    project = Project(name="Active Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+
+    response = client.post(f"/api/projects/{project.id}/restore", headers=auth_headers)
+
+    assert response.status_code == 404
+
+
 def test_delete_project_not_found(client: TestClient, auth_headers: dict):
     """存在しないプロジェクト削除"""
     response = client.delete("/api/projects/99999", headers=auth_headers)
@@ -4,7 +4,7 @@ from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 
 from app.core.security import hash_password
-from app.models import Project, Sprint, User
+from app.models import Project, Sprint, Task, User
 
 
 def _create_project_for_auth_user(session: Session) -> Project:
@@ -189,6 +189,30 @@ def test_update_sprint(client: TestClient, auth_headers: dict, session: Session)
     assert data["name"] == "Updated Sprint"
 
 
+def test_list_sprints_etag_changes_on_update(
+    client: TestClient, auth_headers: dict, session: Session, redis_client
+):
+    """スプリントの更新で一覧のETagが変わる"""
+    project = _create_project_for_auth_user(session)
+    sprint = Sprint(name="Before", project_id=project.id)
+    session.add(sprint)
+    session.commit()
+    session.refresh(sprint)
+
+    url = f"/api/projects/{project.id}/sprints"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+    assert (
+        client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code
+        == 304
+    )
+
+    client.put(f"{url}/{sprint.id}", json={"name": "After"}, headers=auth_headers)
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == "After"
+
+
 def test_update_sprint_not_found(
     client: TestClient, auth_headers: dict, session: Session
 ):
@@ -258,6 +282,49 @@ def test_delete_sprint(client: TestClient, auth_headers: dict, session: Session)
     assert deleted.deleted_at is not None
 
 
+def test_delete_sprint_cascades_and_restore(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """スプリントの削除で所属タスクも削除され、復元で一緒に戻る"""
+    project = _create_project_for_auth_user(session)
+    sprint = Sprint(name="Cascade Sprint", project_id=project.id)
+    session.add(sprint)
+    session.commit()
+    session.refresh(sprint)
+    in_sprint = Task(title="In Sprint", project_id=project.id, sprint_id=sprint.id)
+    backlog = Task(title="Backlog", project_id=project.id)
+    session.add_all([in_sprint, backlog])
+    session.commit()
+
+    response = client.delete(
+        f"/api/projects/{project.id}/sprints/{sprint.id}", headers=auth_headers
+    )
+    assert response.status_code == 204
+
+    session.expire_all()
+    assert sprint.deleted_at is not None
+    assert in_sprint.deleted_at == sprint.deleted_at
+    assert backlog.deleted_at is None
+
+    response = client.post(
+        f"/api/projects/{project.id}/sprints/{sprint.id}/restore",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == "Cascade Sprint"
+
+    session.expire_all()
+    assert sprint.deleted_at is None
+    assert in_sprint.deleted_at is None
+
+    # 削除されていないスプリントは復元できない
+    response = client.post(
+        f"/api/projects/{project.id}/sprints/{sprint.id}/restore",
+        headers=auth_headers,
+    )
+    assert response.status_code == 404
+
+
 def test_delete_sprint_not_found(
     client: TestClient, auth_headers: dict, session: Session
 ):
@@ -2,11 +2,16 @@
 タスクAPIのテスト
 """
 
+import base64
+import json
+from datetime import UTC, datetime, timedelta, timezone
+
 from fastapi.testclient import TestClient
+from redis.exceptions import RedisError
 from sqlmodel import Session, select
 
 from app.core.security import hash_password
-from app.models import Project, Task, User
+from app.models import Project, Sprint, Task, User
 
 
 def _get_auth_user(session: Session) -> User:
@@ -94,6 +99,216 @@ def test_list_tasks_with_filter(
     assert all(t["status"] == "todo" for t in data["items"])
 
 
+def test_list_tasks_cursor_pagination_by_priority(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """優先度順のキーセットページネーション"""
+    user = _get_auth_user(session)
+
+    project = Project(name="Cursor Tasks Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+
+    for i, priority in enumerate([1, 3, 2, 3, 1, 2]):
+        session.add(Task(title=f"Task {i}", project_id=project.id, priority=priority))
+    session.commit()
+
+    url = f"/api/projects/{project.id}/tasks?sort=priority&page_size=4"
+    response = client.get(url, headers=auth_headers)
+    first = response.json()
+    assert first["has_next"] is True
+    assert first["next_cursor"] is not None
+
+    response = client.get(f"{url}&cursor={first['next_cursor']}", headers=auth_headers)
+    assert response.status_code == 200
+    second = response.json()
+    assert second["has_next"] is False
+    assert second["next_cursor"] is None
+
+    items = first["items"] + second["items"]
+    keys = [(-t["priority"], t["id"]) for t in items]
+    assert keys == sorted(keys)
+    assert len({t["id"] for t in items}) == 6
+
+
+def test_list_tasks_cursor_sort_mismatch(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """別のソート順で発行されたカーソルは拒否"""
+    user = _get_auth_user(session)
+
+    project = Project(name="Cursor Mismatch Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    for i in range(3):
+        session.add(Task(title=f"Task {i}", project_id=project.id))
+    session.commit()
+
+    response = client.get(
+        f"/api/projects/{project.id}/tasks?page_size=1", headers=auth_headers
+    )
+    cursor = response.json()["next_cursor"]
+
+    response = client.get(
+        f"/api/projects/{project.id}/tasks?sort=priority&cursor={cursor}",
+        headers=auth_headers,
+    )
+    assert response.status_code == 422
+
+
+def test_list_tasks_cached_count_invalidated_on_write(
+    client: TestClient, auth_headers: dict, session: Session, redis_client
+):
+    """キャッシュされた総件数はタスク作成で無効化される"""
+    user = _get_auth_user(session)
+
+    project = Project(name="Cached Count Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    session.add(Task(title="Task 1", project_id=project.id))
+    session.commit()
+
+    url = f"/api/projects/{project.id}/tasks?count=cached"
+    assert client.get(url, headers=auth_headers).json()["total"] == 1
+
+    # API外での書き込みはキャッシュに反映されない
+    session.add(Task(title="Task 2", project_id=project.id))
+    session.commit()
+    assert client.get(url, headers=auth_headers).json()["total"] == 1
+
+    # APIでの書き込みでバージョンが進み、再計算される
+    client.post(
+        f"/api/projects/{project.id}/tasks",
+        json={"title": "Task 3"},
+        headers=auth_headers,
+    )
+    data = client.get(url, headers=auth_headers).json()
+    assert data["total"] == 3
+    assert data["total_estimated"] is False
+
+
+def test_list_tasks_conditional_get(
+    client: TestClient, auth_headers: dict, session: Session, redis_client
+):
+    """変更がなければ304、書き込み後は新しいETagで200を返す"""
+    user = _get_auth_user(session)
+
+    project = Project(name="ETag Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    session.add(Task(title="Task 1", project_id=project.id))
+    session.commit()
+
+    url = f"/api/projects/{project.id}/tasks"
+    first = client.get(url, headers=auth_headers)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    # クエリパラメータが異なれば別のETag
+    response = client.get(
+        f"{url}?status=todo", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+    client.post(url, json={"title": "Task 2"}, headers=auth_headers)
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+    assert response.headers["etag"] != etag
+
+
+def test_list_tasks_conditional_get_after_failed_bump(
+    client: TestClient, auth_headers: dict, session: Session, redis_client, monkeypatch
+):
+    """書き込み後にバージョンを進められなかった場合も、古いETagで304を返さない"""
+    user = _get_auth_user(session)
+
+    project = Project(name="Failed Bump Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+
+    url = f"/api/projects/{project.id}/tasks"
+    etag = client.get(url, headers=auth_headers).headers["etag"]
+
+    outage = {"active": True}
+    incr = redis_client.incr
+
+    async def flaky_incr(*args, **kwargs):
+        if outage["active"]:
+            raise RedisError("Connection lost")
+        return await incr(*args, **kwargs)
+
+    monkeypatch.setattr(redis_client, "incr", flaky_incr)
+    monkeypatch.setattr("app.utils.cache_version._unsettled", set())
+    monkeypatch.setattr("app.utils.cache_version._BUMP_RETRY_SECONDS", 0)
+
+    response = client.post(url, json={"title": "Task 1"}, headers=auth_headers)
+    assert response.status_code == 201
+
+    # 進め直せるまではETagを付けない
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+
+    # 復旧後は次の読み込みでバージョンを進め、新しいETagを返す
+    outage["active"] = False
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+    assert response.headers["etag"] != etag
+
+
+def test_list_tasks_without_redis_has_no_etag(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """Redis未接続時はETagを付けず、常に200を返す"""
+    user = _get_auth_user(session)
+
+    project = Project(name="No ETag Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+
+    response = client.get(
+        f"/api/projects/{project.id}/tasks",
+        headers={**auth_headers, "If-None-Match": "*"},
+    )
+
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+
+
+def test_list_tasks_estimated_count_falls_back_to_exact(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """PostgreSQL以外では推定件数の代わりに正確な件数を返す"""
+    user = _get_auth_user(session)
+
+    project = Project(name="Estimated Count Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    session.add(Task(title="Task 1", project_id=project.id))
+    session.commit()
+
+    response = client.get(
+        f"/api/projects/{project.id}/tasks?count=estimated", headers=auth_headers
+    )
+    data = response.json()
+    assert data["total"] == 1
+    assert data["total_estimated"] is False
+
+
 def test_update_task(client: TestClient, auth_headers: dict, session: Session):
     """タスク更新"""
     user = _get_auth_user(session)
@@ -178,3 +393,285 @@ def test_create_task_forbidden_project(
     )
 
     assert response.status_code == 403
+
+
+def _create_project_with_tasks(session: Session, count: int) -> tuple[Project, list]:
+    user = _get_auth_user(session)
+    project = Project(name="Batch Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    tasks = [Task(title=f"Task {i}", project_id=project.id) for i in range(count)]
+    session.add_all(tasks)
+    session.commit()
+    for task in tasks:
+        session.refresh(task)
+    return project, tasks
+
+
+def test_create_tasks_batch(client: TestClient, auth_headers: dict, session: Session):
+    """タスク一括作成: 不正なスプリントを指定した項目だけエラーになる"""
+    project, _ = _create_project_with_tasks(session, 0)
+    sprint = Sprint(name="Sprint 1", project_id=project.id)
+    session.add(sprint)
+    session.commit()
+    session.refresh(sprint)
+
+    response = client.post(
+        f"/api/projects/{project.id}/tasks:batch",
+        json={
+            "items": [
+                {"title": "A", "sprint_id": sprint.id},
+                {"title": "B", "sprint_id": 999999},
+                {"title": "C", "priority": 3},
+            ]
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (2, 1)
+    results = data["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert results[0]["task"]["sprint_id"] == sprint.id
+    assert results[1]["error"] == "Sprint not found"
+    assert results[1]["task"] is None
+    assert results[2]["task"]["title"] == "C"
+    assert results[2]["task"]["priority"] == 3
+    titles = session.exec(select(Task.title).where(Task.project_id == project.id))
+    assert sorted(titles.all()) == ["A", "C"]
+
+
+def test_update_tasks_batch(client: TestClient, auth_headers: dict, session: Session):
+    """タスク一括更新: 同じ変更・項目ごとの変更をまとめて適用する"""
+    project, tasks = _create_project_with_tasks(session, 4)
+    _, other_tasks = _create_project_with_tasks(session, 1)
+
+    response = client.patch(
+        f"/api/projects/{project.id}/tasks:batch",
+        json={
+            "items": [
+                {"id": tasks[0].id, "status": "done"},
+                {"id": tasks[1].id, "status": "done"},
+                {"id": tasks[2].id, "priority": 5},
+                {"id": tasks[2].id, "priority": 1},
+                {"id": other_tasks[0].id, "status": "done"},
+            ]
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (3, 2)
+    assert [r["error"] for r in data["results"]] == [
+        None,
+        None,
+        None,
+        "Duplicate task id",
+        "Task not found",
+    ]
+    assert data["results"][2]["task"]["priority"] == 5
+    session.expire_all()
+    assert [session.get(Task, t.id).status for t in tasks] == [
+        "done",
+        "done",
+        "todo",
+        "todo",
+    ]
+    assert session.get(Task, tasks[2].id).priority == 5
+    assert session.get(Task, other_tasks[0].id).status == "todo"
+
+
+def test_update_tasks_batch_validates_status(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    project, tasks = _create_project_with_tasks(session, 1)
+
+    response = client.patch(
+        f"/api/projects/{project.id}/tasks:batch",
+        json={"items": [{"id": tasks[0].id, "status": "archived"}]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 422
+
+
+def test_delete_tasks_batch(client: TestClient, auth_headers: dict, session: Session):
+    """タスク一括削除: 削除済み・存在しないIDはエラーになる"""
+    project, tasks = _create_project_with_tasks(session, 3)
+
+    response = client.request(
+        "DELETE",
+        f"/api/projects/{project.id}/tasks:batch",
+        json={"ids": [tasks[0].id, tasks[1].id, 999999]},
+        headers=auth_headers,
+    )
+    again = client.request(
+        "DELETE",
+        f"/api/projects/{project.id}/tasks:batch",
+        json={"ids": [tasks[0].id]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert (response.json()["succeeded"], response.json()["failed"]) == (2, 1)
+    assert again.json()["results"][0]["error"] == "Task not found"
+    listed = client.get(f"/api/projects/{project.id}/tasks", headers=auth_headers)
+    assert [t["id"] for t in listed.json()["items"]] == [tasks[2].id]
+
+
+def test_tasks_batch_forbidden_project(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """他ユーザーのプロジェクトへの一括操作は拒否"""
+    other_user = User(
+        email="other_batch@example.com",
+        password_hash=hash_password("password123"),
+        role="user",
+    )
+    session.add(other_user)
+    session.commit()
+    project = Project(name="Other Batch Project", owner_id=other_user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+
+    response = client.post(
+        f"/api/projects/{project.id}/tasks:batch",
+        json={"items": [{"title": "Hacked"}]},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 403
+
+
+def test_list_task_changes_incremental_sync(
+    client: TestClient, auth_headers: dict, session: Session, monkeypatch
+):
+    """初回は全件、以降はカーソル以降の作成・更新・削除だけを返す"""
+    monkeypatch.setattr("app.core.config.settings.SYNC_SETTLE_SECONDS", 0)
+    user = _get_auth_user(session)
+    project = Project(name="Sync Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    earlier = datetime.utcnow() - timedelta(minutes=5)
+    tasks = [
+        Task(title=f"Task {i}", project_id=project.id, updated_at=earlier)
+        for i in range(3)
+    ]
+    session.add_all(tasks)
+    session.commit()
+
+    url = f"/api/projects/{project.id}/tasks/changes"
+    first = client.get(url, params={"limit": 2}, headers=auth_headers).json()
+    assert [t["title"] for t in first["updated"]] == ["Task 0", "Task 1"]
+    assert first["has_more"] is True
+    second = client.get(
+        url, params={"since": first["next_cursor"]}, headers=auth_headers
+    ).json()
+    assert [t["title"] for t in second["updated"]] == ["Task 2"]
+    assert second["has_more"] is False
+
+    # 変更がなければ空
+    cursor = second["next_cursor"]
+    response = client.get(url, params={"since": cursor}, headers=auth_headers)
+    assert response.json()["updated"] == []
+    cursor = response.json()["next_cursor"]
+
+    client.put(
+        f"/api/tasks/{tasks[0].id}", json={"title": "Renamed"}, headers=auth_headers
+    )
+    client.delete(f"/api/tasks/{tasks[1].id}", headers=auth_headers)
+    client.post(
+        f"/api/projects/{project.id}/tasks", json={"title": "New"}, headers=auth_headers
+    )
+
+    changes = client.get(url, params={"since": cursor}, headers=auth_headers).json()
+    assert [t["title"] for t in changes["updated"]] == ["Renamed", "New"]
+    assert changes["deleted_ids"] == [tasks[1].id]
+
+
+def test_list_task_changes_holds_back_unsettled_changes(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """確定待ちの時間内の変更は次回に回す"""
+    user = _get_auth_user(session)
+    project = Project(name="Settle Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    session.add(Task(title="Just Now", project_id=project.id))
+    session.commit()
+
+    response = client.get(
+        f"/api/projects/{project.id}/tasks/changes", headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == []
+
+
+def test_list_task_changes_rejects_expired_cursor(
+    client: TestClient, auth_headers: dict, session: Session, monkeypatch
+):
+    """保持期間より前に発行したカーソルは410（初回の同期からやり直す）"""
+    monkeypatch.setattr("app.core.config.settings.PURGE_RETENTION_DAYS", 30)
+    user = _get_auth_user(session)
+    project = Project(name="Expired Sync Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    # 長く更新されていないタスクでも、発行したばかりのカーソルは有効
+    session.add(
+        Task(
+            title="Old",
+            project_id=project.id,
+            updated_at=datetime.utcnow() - timedelta(days=40),
+        )
+    )
+    session.commit()
+
+    url = f"/api/projects/{project.id}/tasks/changes"
+    cursor = client.get(url, headers=auth_headers).json()["next_cursor"]
+    response = client.get(url, params={"since": cursor}, headers=auth_headers)
+    assert response.status_code == 200
+
+    keyset, _, issued = cursor.rpartition(".")
+    expired = f"{keyset}.{int(issued) - 40 * 24 * 60 * 60}"
+    response = client.get(url, params={"since": expired}, headers=auth_headers)
+    assert response.status_code == 410
+
+    response = client.get(url, params={"since": "broken"}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+def test_list_task_changes_accepts_cursor_with_timezone(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """タイムゾーン付きの日時に書き換えたカーソルはUTCに揃えて扱う（500にしない）"""
+    user = _get_auth_user(session)
+    project = Project(name="Tampered Sync Project", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    updated_at = datetime.utcnow() - timedelta(days=1)
+    session.add(Task(title="Old", project_id=project.id, updated_at=updated_at))
+    session.commit()
+
+    url = f"/api/projects/{project.id}/tasks/changes"
+    cursor = client.get(url, headers=auth_headers).json()["next_cursor"]
+    keyset, _, issued = cursor.rpartition(".")
+    payload = json.loads(base64.urlsafe_b64decode(keyset + "=" * (-len(keyset) % 4)))
+    # Oldの3時間前を+09:00で表す（タイムゾーンを捨てるとOldより後になる）
+    position = (updated_at - timedelta(hours=3)).replace(tzinfo=UTC)
+    payload["v"][0] = position.astimezone(timezone(timedelta(hours=9))).isoformat()
+    tampered = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    response = client.get(
+        url, params={"since": f"{tampered}.{issued}"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert [t["title"] for t in response.json()["updated"]] == ["Old"]
@@ -1,12 +1,17 @@
+import fakeredis
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, SQLModel, create_engine
-from sqlmodel.pool import StaticPool
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import create_access_token, hash_password
-from app.db.session import get_session
+from app.api.dependencies import clear_user_cache
+from app.core.security import clear_token_cache, create_access_token, hash_password
+from app.db.session import get_async_session, get_session, to_async_database_url
 from app.main import app
 from app.models import User
+from app.services.achievements import invalidate_catalog
 from tests.factories import (
     ProjectFactory,
     SprintFactory,
@@ -15,12 +20,29 @@ from tests.factories import (
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """テストごとにDBが異なるため、プロセス内のキャッシュを毎回破棄する。"""
+    clear_token_cache()
+    clear_user_cache()
+    invalidate_catalog()
+    yield
+    clear_token_cache()
+    clear_user_cache()
+    invalidate_catalog()
+
+
+@pytest.fixture(name="database_url")
+def database_url_fixture(tmp_path) -> str:
+    # 同期・非同期の両エンジンから同じDBを参照するためファイルDBを使う
+    return f"sqlite:///{tmp_path / 'test.db'}"
+
+
 @pytest.fixture(name="session")
-def session_fixture():
+def session_fixture(database_url: str):
     engine = create_engine(
-        "sqlite:///:memory:",
+        database_url,
         connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
     )
     SQLModel.metadata.create_all(engine)
     with Session(engine) as session:
@@ -35,19 +57,40 @@ def session_fixture():
         ProjectFactory._meta.sqlalchemy_session = None
         SprintFactory._meta.sqlalchemy_session = None
         TaskFactory._meta.sqlalchemy_session = None
+    engine.dispose()
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+def client_fixture(session: Session, database_url: str):
+    # TestClientはリクエストごとにイベントループを作るため接続はプールしない
+    async_engine = create_async_engine(
+        to_async_database_url(database_url), poolclass=NullPool
+    )
+
     def get_session_override():
         return session
 
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as async_session:
+            yield async_session
+        # 非同期側の書き込みを同期セッションから参照できるようにする
+        session.expire_all()
+
     app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_async_session] = get_async_session_override
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def redis_client(monkeypatch):
+    """インメモリRedis（fakeredis）を app.core.redis に差し込むフィクスチャ。"""
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr("app.core.redis.redis_client", client)
+    return client
+
+
 @pytest.fixture
 def user(session: Session) -> User:
     """通常ユーザーフィクスチャ。"""
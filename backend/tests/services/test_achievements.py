@@ -0,0 +1,82 @@
+"""実績解除判定のテスト。"""
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.models import Achievement, User, UserAchievement
+from app.services.achievements import check_and_unlock, invalidate_catalog
+
+
+def _add_achievements(session: Session, thresholds: list[int]) -> None:
+    for points in thresholds:
+        session.add(
+            Achievement(key=f"p{points}", name=f"P{points}", title="", points=points)
+        )
+    session.commit()
+
+
+def _count_queries(session: Session) -> list[str]:
+    statements: list[str] = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+def test_unlocks_reached_achievements_in_one_lookup(session: Session):
+    """到達済みの実績を1回の照会と1回の登録で解除する"""
+    _add_achievements(session, list(range(10, 2010, 10)))
+    user = User(email="a@example.com", password_hash="x", total_points=0)
+    session.add(user)
+    session.commit()
+    assert check_and_unlock(session, user) == []  # カタログを読み込む
+
+    user.total_points = 125
+    statements = _count_queries(session)
+    unlocked = check_and_unlock(session, user)
+    session.commit()
+
+    assert len(unlocked) == 12
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    inserts = [s for s in statements if s.lstrip().upper().startswith("INSERT")]
+    assert len(selects) == 1
+    assert len(inserts) == 1
+
+
+def test_does_not_unlock_twice(session: Session):
+    """解除済みの実績は再登録しない"""
+    _add_achievements(session, [50, 100])
+    user = User(email="b@example.com", password_hash="x", total_points=120)
+    session.add(user)
+    session.commit()
+
+    assert len(check_and_unlock(session, user)) == 2
+    session.commit()
+    assert check_and_unlock(session, user) == []
+
+
+def test_catalog_invalidation(session: Session):
+    """カタログ無効化後は追加された実績も判定対象になる"""
+    _add_achievements(session, [50])
+    user = User(email="c@example.com", password_hash="x", total_points=80)
+    session.add(user)
+    session.commit()
+    check_and_unlock(session, user)
+    session.commit()
+
+    _add_achievements(session, [70])
+    assert check_and_unlock(session, user) == []
+
+    invalidate_catalog()
+    unlocked = check_and_unlock(session, user)
+    session.commit()
+
+    assert len(unlocked) == 1
+    keys = session.exec(
+        select(Achievement.key)
+        .join(UserAchievement)
+        .where(UserAchievement.user_id == user.id)
+    ).all()
+    assert sorted(keys) == ["p50", "p70"]
@@ -0,0 +1,109 @@
+"""AI分解ジョブの受付制御のテスト。"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_admission import admit, job_keys, release
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "AI_MAX_JOBS_PER_USER", 2)
+    monkeypatch.setattr(settings, "AI_MAX_JOBS_PER_PROJECT", 3)
+    monkeypatch.setattr(settings, "AI_DAILY_TOKEN_BUDGET", 100_000)
+    monkeypatch.setattr(settings, "AI_JOB_TOKEN_ESTIMATE", 10_000)
+
+
+def test_duplicate_request_returns_existing_job(redis_client, limits):
+    """実行中の同じ要件（空白の違いは無視）には既存のジョブIDを返す"""
+
+    async def scenario():
+        first = await admit(job_keys(1, 10, "ログイン機能", None))
+        second = await admit(job_keys(2, 10, " ログイン機能\n", None))
+        other_sprint = await admit(job_keys(1, 10, "ログイン機能", 5))
+        return first, second, other_sprint
+
+    first, second, other_sprint = asyncio.run(scenario())
+
+    assert first.status == "admitted"
+    assert first.job_id
+    assert second.status == "duplicate"
+    assert second.job_id == first.job_id
+    assert other_sprint.status == "admitted"
+    assert other_sprint.job_id != first.job_id
+
+
+def test_concurrency_caps(redis_client, limits):
+    """ユーザー・プロジェクトごとの同時実行数を超えると断り、終了すると枠が空く"""
+
+    async def scenario():
+        user_keys = [job_keys(1, 10 + i, f"要件{i}", None) for i in range(3)]
+        results = [await admit(keys) for keys in user_keys]
+        await release(user_keys[0], results[0].job_id)
+        results.append(await admit(user_keys[2]))
+
+        project_results = [
+            await admit(job_keys(100 + i, 50, f"要件{i}", None)) for i in range(4)
+        ]
+        return results, project_results
+
+    results, project_results = asyncio.run(scenario())
+
+    assert [r.status for r in results] == [
+        "admitted",
+        "admitted",
+        "user_busy",
+        "admitted",
+    ]
+    assert [r.status for r in project_results] == [
+        "admitted",
+        "admitted",
+        "admitted",
+        "project_busy",
+    ]
+
+
+def test_expired_lease_frees_slot(redis_client, limits):
+    """終了処理が行われなかったジョブも期限が来れば枠を解放する"""
+
+    async def scenario():
+        keys = job_keys(1, 10, "要件A", None)
+        first = await admit(keys)
+        await admit(job_keys(1, 11, "要件B", None))
+        # ワーカーの異常終了を模擬して、1件目のリースを期限切れにする
+        await redis_client.zadd(keys.user_jobs, {first.job_id: 0})
+        return await admit(job_keys(1, 12, "要件C", None))
+
+    assert asyncio.run(scenario()).status == "admitted"
+
+
+def test_token_budget_is_settled_with_actual_usage(redis_client, limits, monkeypatch):
+    """見積もりで予約し、終了時に実際の消費量で精算する"""
+    monkeypatch.setattr(settings, "AI_DAILY_TOKEN_BUDGET", 25_000)
+    monkeypatch.setattr(settings, "AI_MAX_JOBS_PER_USER", 5)
+
+    async def scenario():
+        keys = [job_keys(1, 10 + i, f"要件{i}", None) for i in range(3)]
+        first = await admit(keys[0])
+        second = await admit(keys[1])
+        over = await admit(keys[2])
+        await release(keys[0], first.job_id, tokens_used=3_000)
+        await release(keys[1], second.job_id, tokens_used=4_000)
+        used = int(await redis_client.get(keys[0].budget))
+        retried = await admit(keys[2])
+        return over, used, retried
+
+    over, used, retried = asyncio.run(scenario())
+
+    assert over.status == "budget"
+    assert used == 7_000
+    assert retried.status == "admitted"
+
+
+def test_admits_without_redis(limits):
+    """Redis未接続時は制限しない"""
+    admission = asyncio.run(admit(job_keys(1, 10, "要件", None)))
+    assert admission.accepted
+    assert admission.job_id is None
@@ -0,0 +1,141 @@
+"""AIワークフローの結果キャッシュのテスト。"""
+
+import asyncio
+import json
+from unittest.mock import MagicMock, patch
+
+from app.core.config import settings
+from app.services.ai_cache import INDEX_KEY, cache_key, get_cached, set_cached
+from app.services.ai_service import run_ai_decomposition
+
+
+def test_cache_key_normalizes_input():
+    """空白・全角半角の違いだけの入力は同じキーになる"""
+    key = cache_key("epics", "1", "ログイン機能を\n  作る")
+    assert cache_key("epics", "1", "  ログイン機能を 作る ") == key
+    assert cache_key("epics", "1", "ログイン機能を　作る") == key
+    assert cache_key("epics", "1", "ログアウト機能を作る") != key
+
+
+def test_cache_key_includes_model_and_prompt_version(monkeypatch):
+    """モデル・プロンプトのバージョン・段階が変わるとキーも変わる"""
+    key = cache_key("epics", "1", "要件")
+    assert cache_key("epics", "2", "要件") != key
+    assert cache_key("sprints", "1", "要件") != key
+    monkeypatch.setattr(settings, "AI_MODEL", "other-model")
+    assert cache_key("epics", "1", "要件") != key
+
+
+def test_set_and_get(redis_client):
+    """登録した値をTTL付きで取得できる"""
+
+    async def scenario():
+        key = cache_key("epics", "1", "要件")
+        assert await get_cached(key) is None
+        await set_cached(key, [{"name": "認証", "description": "ログイン"}])
+        assert await get_cached(key) == [{"name": "認証", "description": "ログイン"}]
+        assert 0 < await redis_client.ttl(key) <= settings.AI_CACHE_TTL_SECONDS
+
+    asyncio.run(scenario())
+
+
+def test_get_extends_ttl(redis_client):
+    """参照するとキーの有効期限も最終参照から数え直す"""
+
+    async def scenario():
+        key = cache_key("epics", "1", "要件")
+        await set_cached(key, ["a"])
+        await redis_client.expire(key, 5)
+
+        assert await get_cached(key) == ["a"]
+        assert await redis_client.ttl(key) > 5
+
+    asyncio.run(scenario())
+
+
+def test_evicts_least_recently_used(redis_client, monkeypatch):
+    """上限を超えると最も古く参照されたエントリから削除する"""
+    monkeypatch.setattr(settings, "AI_CACHE_MAX_ENTRIES", 2)
+    keys = [cache_key("epics", "1", f"要件{i}") for i in range(3)]
+
+    async def scenario():
+        await set_cached(keys[0], ["a"])
+        await set_cached(keys[1], ["b"])
+        await asyncio.sleep(0.01)
+        # 参照したエントリは削除対象から外れる
+        assert await get_cached(keys[0]) == ["a"]
+        await asyncio.sleep(0.01)
+        await set_cached(keys[2], ["c"])
+
+        assert await get_cached(keys[1]) is None
+        assert await get_cached(keys[0]) == ["a"]
+        assert await get_cached(keys[2]) == ["c"]
+        assert await redis_client.zcard(INDEX_KEY) == 2
+
+    asyncio.run(scenario())
+
+
+def test_disabled_without_redis():
+    """Redis未接続時はキャッシュを使わない"""
+
+    async def scenario():
+        key = cache_key("epics", "1", "要件")
+        await set_cached(key, ["a"])
+        assert await get_cached(key) is None
+
+    asyncio.run(scenario())
+
+
+def _response(content):
+    response = MagicMock()
+    response.content = json.dumps(content, ensure_ascii=False)
+    return response
+
+
+async def _ainvoke(messages):
+    prompt = messages[0].content
+    if '"sprints"' in prompt:
+        return _response(
+            {"sprints": [{"name": "Sprint 1", "tasks": [0], "total_estimate": 4.0}]}
+        )
+    if '"epics"' in prompt:
+        return _response({"epics": [{"name": "認証", "description": ""}]})
+    return _response({"tasks": [{"title": "ログイン画面", "epic": "認証"}]})
+
+
+@patch("app.services.ai_service.get_llm")
+def test_repeated_decomposition_skips_llm(mock_get_llm, redis_client):
+    """同じ要件の再実行ではLLMを呼ばずに同じ結果を返す"""
+    mock_llm = MagicMock()
+    mock_llm.ainvoke.side_effect = _ainvoke
+    mock_get_llm.return_value = mock_llm
+
+    async def scenario():
+        first = await run_ai_decomposition("ログイン機能")
+        calls = mock_llm.ainvoke.call_count
+        second = await run_ai_decomposition(" ログイン機能\n")
+        return first, calls, second
+
+    first, calls, second = asyncio.run(scenario())
+
+    assert first["error"] is None
+    assert calls == 3
+    assert mock_llm.ainvoke.call_count == calls
+    assert second == first
+
+
+@patch("app.services.ai_service.get_llm")
+def test_failed_stage_is_not_cached(mock_get_llm, redis_client):
+    """失敗した段階の結果はキャッシュしない"""
+    mock_llm = MagicMock()
+    mock_llm.ainvoke.side_effect = Exception("API Error")
+    mock_get_llm.return_value = mock_llm
+
+    async def scenario():
+        result = await run_ai_decomposition("ログイン機能")
+        return result, await redis_client.zcard(INDEX_KEY)
+
+    result, cached = asyncio.run(scenario())
+
+    assert result["error"] is not None
+    assert cached == 0
@@ -0,0 +1,99 @@
+"""AIタスク分解結果の保存のテスト。"""
+
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.models import Project, Sprint, Task, User
+from app.services.ai_persistence import save_decomposition
+
+
+def _project(session: Session) -> Project:
+    user = User(email="ai-persist@example.com", password_hash="x")
+    session.add(user)
+    session.commit()
+    project = Project(name="AI Persist", owner_id=user.id)
+    session.add(project)
+    session.commit()
+    return project
+
+
+def _result(task_count: int, sprint_size: int) -> dict:
+    return {
+        "tasks": [
+            {"title": f"Task {i}", "priority": 1, "estimate": 2.0}
+            for i in range(task_count)
+        ],
+        "sprints": [
+            {
+                "name": f"Sprint {n + 1}",
+                "tasks": list(range(start, start + sprint_size)),
+            }
+            for n, start in enumerate(range(0, task_count, sprint_size))
+        ],
+    }
+
+
+def test_saves_sprints_and_tasks_in_few_statements(session: Session):
+    """500タスク・10スプリントを数回のINSERTで登録し、所属スプリントを対応付ける"""
+    project = _project(session)
+    statements: list[str] = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    sprint_ids = save_decomposition(session, project.id, _result(500, 50))
+    session.commit()
+
+    task_inserts = [s for s in statements if s.lstrip().startswith("INSERT INTO task")]
+    sprint_inserts = [
+        s for s in statements if s.lstrip().startswith("INSERT INTO sprint")
+    ]
+    assert len(task_inserts) == 1
+    # PostgreSQLでは1文。SQLiteはRETURNINGの順序を保証できないため1行ずつになる
+    expected = 1 if session.get_bind().dialect.name == "postgresql" else 10
+    assert len(sprint_inserts) == expected
+    assert len(sprint_ids) == 10
+
+    sprints = session.exec(select(Sprint).order_by(Sprint.id)).all()
+    assert [s.id for s in sprints] == sprint_ids
+    assert [s.name for s in sprints] == [f"Sprint {n + 1}" for n in range(10)]
+    tasks = session.exec(select(Task).order_by(Task.id)).all()
+    assert len(tasks) == 500
+    assert tasks[0].sprint_id == sprint_ids[0]
+    assert tasks[499].sprint_id == sprint_ids[9]
+    assert all(task.status == "todo" and task.created_at for task in tasks)
+
+
+def test_first_sprint_wins_and_unplanned_tasks_have_no_sprint(session: Session):
+    """複数のスプリントに含まれるタスクは先のスプリント、計画外のタスクはスプリントなし"""
+    project = _project(session)
+    result = {
+        "tasks": [{"title": "A"}, {"title": "B"}, {"title": "C"}],
+        "sprints": [
+            {"name": "Sprint 1", "tasks": [0]},
+            {"name": "Sprint 1", "tasks": [0, 1]},
+        ],
+    }
+
+    sprint_ids = save_decomposition(session, project.id, result)
+    session.commit()
+
+    tasks = session.exec(select(Task).order_by(Task.id)).all()
+    assert [t.sprint_id for t in tasks] == [sprint_ids[0], sprint_ids[1], None]
+    assert tasks[0].estimate == 8.0
+
+
+def test_explicit_sprint_id_overrides_plan(session: Session):
+    """sprint_id を指定すると全タスクをそのスプリントに登録する"""
+    project = _project(session)
+    target = Sprint(project_id=project.id, name="Existing")
+    session.add(target)
+    session.commit()
+
+    save_decomposition(session, project.id, _result(4, 2), sprint_id=target.id)
+    session.commit()
+
+    tasks = session.exec(select(Task)).all()
+    assert {t.sprint_id for t in tasks} == {target.id}
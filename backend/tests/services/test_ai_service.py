@@ -1,15 +1,26 @@
 """AIサービスのテスト。"""
 
+import asyncio
+import json
+import time
+
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from app.services.ai_progress import get_events
 from app.services.ai_service import (
     EpicList,
     SprintPlanList,
     TaskList,
-    decompose_tasks_node,
+    decompose_epic_node,
     extract_epics_node,
+    get_ai_workflow,
+    get_llm,
+    merge_epic_results,
+    merge_tasks_node,
     plan_sprints_node,
+    reset_llm_clients,
+    run_ai_decomposition,
 )
 
 
@@ -97,7 +108,7 @@ class TestExtractEpicsNode:
         mock_llm = MagicMock()
         mock_response = MagicMock()
         mock_response.content = '{"epics": [{"name": "Auth", "description": "認証"}]}'
-        mock_llm.invoke.return_value = mock_response
+        mock_llm.ainvoke = AsyncMock(return_value=mock_response)
         mock_get_llm.return_value = mock_llm
 
         state = {
@@ -108,18 +119,18 @@ class TestExtractEpicsNode:
             "error": None,
         }
 
-        result = extract_epics_node(state)
+        result = asyncio.run(extract_epics_node(state))
 
         assert result["error"] is None
         assert len(result["epics"]) == 1
         assert result["epics"][0]["name"] == "Auth"
-        mock_llm.invoke.assert_called_once()
+        mock_llm.ainvoke.assert_awaited_once()
 
     @patch("app.services.ai_service.get_llm")
     def test_extract_epics_failure(self, mock_get_llm):
         """エピック抽出の失敗ケース"""
         mock_llm = MagicMock()
-        mock_llm.invoke.side_effect = Exception("API Error")
+        mock_llm.ainvoke = AsyncMock(side_effect=Exception("API Error"))
         mock_get_llm.return_value = mock_llm
 
         state = {
@@ -130,19 +141,19 @@ class TestExtractEpicsNode:
             "error": None,
         }
 
-        result = extract_epics_node(state)
+        result = asyncio.run(extract_epics_node(state))
 
         assert result["error"] is not None
         assert "エピック抽出エラー" in result["error"]
         assert result["epics"] == []
 
 
-class TestDecomposeTasksNode:
-    """decompose_tasks_node のテスト"""
+class TestDecomposeEpicNode:
+    """decompose_epic_node のテスト"""
 
     @patch("app.services.ai_service.get_llm")
-    def test_decompose_tasks_success(self, mock_get_llm):
-        """タスク分解の成功ケース"""
+    def test_decompose_epic_success(self, mock_get_llm):
+        """エピック単位のタスク分解の成功ケース"""
         mock_llm = MagicMock()
         mock_response = MagicMock()
         mock_response.content = """
@@ -153,39 +164,111 @@ class TestDecomposeTasksNode:
                     "description": "Implement login",
                     "priority": 2,
                     "estimate": 8.0,
-                    "epic": "Auth"
+                    "epic": "wrong"
                 }
             ]
         }
         """
-        mock_llm.invoke.return_value = mock_response
+        mock_llm.ainvoke = AsyncMock(return_value=mock_response)
         mock_get_llm.return_value = mock_llm
 
-        state = {
+        state = {"epic_index": 1, "epic": {"name": "Auth", "description": "認証"}}
+
+        result = asyncio.run(decompose_epic_node(state))
+
+        (epic_result,) = result["epic_results"]
+        assert epic_result["epic_index"] == 1
+        assert epic_result["error"] is None
+        assert [t["title"] for t in epic_result["tasks"]] == ["Login"]
+        # エピック名はモデルの出力ではなく入力のエピックから付ける
+        assert epic_result["tasks"][0]["epic"] == "Auth"
+
+    @patch("app.services.ai_service.get_llm")
+    def test_decompose_epic_failure(self, mock_get_llm):
+        """LLM呼び出しに失敗した場合はエピック名付きのエラーを返す"""
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = AsyncMock(side_effect=Exception("API Error"))
+        mock_get_llm.return_value = mock_llm
+
+        state = {"epic_index": 0, "epic": {"name": "Auth", "description": "認証"}}
+
+        result = asyncio.run(decompose_epic_node(state))
+
+        (epic_result,) = result["epic_results"]
+        assert epic_result["tasks"] == []
+        assert epic_result["error"] == "Auth: API Error"
+
+
+class TestMergeEpicResults:
+    """merge_epic_results（エピック単位の結果のreducer）のテスト"""
+
+    def test_orders_by_epic_index(self):
+        """完了順に関係なくepic_index順に並べる"""
+        left = [{"epic_index": 2, "tasks": [], "error": None}]
+        right = [
+            {"epic_index": 0, "tasks": [], "error": None},
+            {"epic_index": 1, "tasks": [], "error": None},
+        ]
+
+        merged = merge_epic_results(left, right)
+
+        assert [r["epic_index"] for r in merged] == [0, 1, 2]
+
+    def test_same_epic_is_not_duplicated(self):
+        """同じエピックの結果は後勝ちで1件にする"""
+        old = {"epic_index": 0, "tasks": [], "error": "old"}
+        new = {"epic_index": 0, "tasks": [{"title": "T"}], "error": None}
+
+        assert merge_epic_results([old], [new]) == [new]
+
+
+class TestMergeTasksNode:
+    """merge_tasks_node のテスト"""
+
+    @staticmethod
+    def _state(epics, epic_results):
+        return {
             "user_requirement": "テスト",
-            "epics": [{"name": "Auth", "description": "認証"}],
+            "epics": epics,
             "tasks": [],
             "sprints": [],
             "error": None,
+            "epic_results": epic_results,
         }
 
-        result = decompose_tasks_node(state)
+    def test_merge_tasks_in_epic_order(self):
+        """エピックごとのタスクを順に連結する"""
+        state = self._state(
+            [{"name": "A"}, {"name": "B"}],
+            [
+                {"epic_index": 0, "tasks": [{"title": "A1"}, {"title": "A2"}], "error": None},
+                {"epic_index": 1, "tasks": [{"title": "B1"}], "error": None},
+            ],
+        )
+
+        result = asyncio.run(merge_tasks_node(state))
 
         assert result["error"] is None
-        assert len(result["tasks"]) == 1
-        assert result["tasks"][0]["title"] == "Login"
+        assert [t["title"] for t in result["tasks"]] == ["A1", "A2", "B1"]
+
+    def test_merge_tasks_fails_if_any_epic_failed(self):
+        """一部のエピックが失敗した場合は全体をエラーにする"""
+        state = self._state(
+            [{"name": "A"}, {"name": "B"}],
+            [
+                {"epic_index": 0, "tasks": [{"title": "A1"}], "error": None},
+                {"epic_index": 1, "tasks": [], "error": "B: API Error"},
+            ],
+        )
 
-    def test_decompose_tasks_no_epics(self):
-        """エピックなしの場合"""
-        state = {
-            "user_requirement": "テスト",
-            "epics": [],
-            "tasks": [],
-            "sprints": [],
-            "error": None,
-        }
+        result = asyncio.run(merge_tasks_node(state))
+
+        assert result["error"] == "タスク分解エラー: B: API Error"
+        assert result["tasks"] == []
 
-        result = decompose_tasks_node(state)
+    def test_merge_tasks_no_epics(self):
+        """エピックなしの場合"""
+        result = asyncio.run(merge_tasks_node(self._state([], [])))
 
         assert result["error"] == "エピックが抽出されていません"
         assert result["tasks"] == []
@@ -206,7 +289,7 @@ class TestPlanSprintsNode:
             ]
         }
         """
-        mock_llm.invoke.return_value = mock_response
+        mock_llm.ainvoke = AsyncMock(return_value=mock_response)
         mock_get_llm.return_value = mock_llm
 
         state = {
@@ -220,7 +303,7 @@ class TestPlanSprintsNode:
             "error": None,
         }
 
-        result = plan_sprints_node(state)
+        result = asyncio.run(plan_sprints_node(state))
 
         assert result["error"] is None
         assert len(result["sprints"]) == 1
@@ -235,8 +318,119 @@ class TestPlanSprintsNode:
             "error": None,
         }
 
-        result = plan_sprints_node(state)
+        result = asyncio.run(plan_sprints_node(state))
 
         assert result["error"] == "タスクが分解されていません"
         assert result["sprints"] == []
 
+
+
+class TestSharedClients:
+    """LLMクライアント・ワークフローの共有テスト"""
+
+    def test_get_llm_is_shared(self):
+        """同じ設定ではクライアントとHTTP接続プールを使い回す"""
+        reset_llm_clients()
+        llm = get_llm()
+
+        assert get_llm() is llm
+        assert llm.http_client is not None
+
+        reset_llm_clients()
+        assert get_llm() is not llm
+
+    def test_get_ai_workflow_is_compiled_once(self):
+        """ワークフローは1回だけコンパイルする"""
+        assert get_ai_workflow() is get_ai_workflow()
+
+
+class TestParallelDecomposition:
+    """エピックごとの並列タスク分解のテスト"""
+
+    @staticmethod
+    def _response(content):
+        response = MagicMock()
+        response.content = json.dumps(content, ensure_ascii=False)
+        return response
+
+    def _mock_llm(self, epics, delay=0.0, fail_epic=None):
+        """プロンプトの内容に応じて各段階の応答を返すモックLLM"""
+        mock_llm = MagicMock()
+
+        async def ainvoke(messages):
+            prompt = messages[0].content
+            if '"sprints"' in prompt:
+                return self._response(
+                    {"sprints": [{"name": "Sprint 1", "tasks": [0, 1, 2], "total_estimate": 24.0}]}
+                )
+            if '"epics"' in prompt:
+                return self._response({"epics": epics})
+            epic = next(e for e in epics if f'"name": "{e["name"]}"' in prompt)
+            await asyncio.sleep(delay)
+            if epic["name"] == fail_epic:
+                raise Exception("API Error")
+            # モデルが誤ったエピック名を返しても入力側の対応が使われる
+            return self._response(
+                {"tasks": [{"title": f"{epic['name']} task", "epic": "wrong"}]}
+            )
+
+        mock_llm.ainvoke.side_effect = ainvoke
+        return mock_llm
+
+    @patch("app.services.ai_service.get_llm")
+    def test_epics_are_decomposed_concurrently_in_stable_order(self, mock_get_llm):
+        """エピックは並列に分解され、結果はエピックの順序どおりに連結される"""
+        epics = [{"name": f"Epic{i}", "description": ""} for i in range(3)]
+        mock_get_llm.return_value = self._mock_llm(epics, delay=0.3)
+
+        start = time.perf_counter()
+        result = asyncio.run(run_ai_decomposition("要件"))
+        elapsed = time.perf_counter() - start
+
+        assert result["error"] is None
+        assert [t["title"] for t in result["tasks"]] == [
+            "Epic0 task",
+            "Epic1 task",
+            "Epic2 task",
+        ]
+        assert [t["epic"] for t in result["tasks"]] == ["Epic0", "Epic1", "Epic2"]
+        assert len(result["sprints"]) == 1
+        # 逐次なら0.9秒以上かかる
+        assert elapsed < 0.8
+
+    @patch("app.services.ai_service.get_llm")
+    def test_failed_epic_fails_decomposition(self, mock_get_llm):
+        """一部のエピックの分解に失敗した場合は全体をエラーにする"""
+        epics = [{"name": "Auth", "description": ""}, {"name": "Billing", "description": ""}]
+        mock_get_llm.return_value = self._mock_llm(epics, fail_epic="Billing")
+
+        result = asyncio.run(run_ai_decomposition("要件"))
+
+        assert "タスク分解エラー" in result["error"]
+        assert "Billing" in result["error"]
+        assert result["tasks"] == []
+        assert result["sprints"] == []
+
+    @patch("app.services.ai_service.get_llm")
+    def test_stages_publish_progress(self, mock_get_llm, redis_client):
+        """ジョブIDを指定すると段階ごとの完了と途中結果を配信する"""
+        epics = [{"name": f"Epic{i}", "description": ""} for i in range(2)]
+        mock_get_llm.return_value = self._mock_llm(epics)
+
+        async def run():
+            await run_ai_decomposition("要件", job_id="job-1")
+            return await get_events("job-1")
+
+        events = [event for _, event in asyncio.run(run())]
+
+        assert [e["event"] for e in events] == [
+            "epics",
+            "epic_tasks",
+            "epic_tasks",
+            "tasks",
+            "sprints",
+        ]
+        partial = sorted(events[1:3], key=lambda e: e["data"]["epic_index"])
+        assert [e["data"]["epic"] for e in partial] == ["Epic0", "Epic1"]
+        assert partial[0]["data"]["tasks"][0]["title"] == "Epic0 task"
+        assert len(events[3]["data"]["tasks"]) == 2
@@ -0,0 +1,173 @@
+"""保持期間を過ぎた論理削除行の定期削除のテスト。"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.celery_app import celery_app
+from app.models import (
+    Achievement,
+    ArchivedRecord,
+    PointsHistory,
+    Project,
+    Sprint,
+    Task,
+    User,
+    UserAchievement,
+)
+from app.services.soft_delete_purge import purge_soft_deleted
+from app.tasks.maintenance_tasks import purge_soft_deleted_rows
+
+NOW = datetime(2026, 6, 1)
+OLD = NOW - timedelta(days=60)
+RECENT = NOW - timedelta(days=1)
+
+
+def _add(session: Session, *rows):
+    session.add_all(rows)
+    session.commit()
+    return rows
+
+
+def _ids(session: Session, model) -> set[int]:
+    return set(session.exec(select(model.id)).all())
+
+
+def _stats(results) -> dict:
+    return {r.table: (r.eligible, r.purged, r.pending) for r in results}
+
+
+def test_purge_archives_old_rows_children_first(session: Session):
+    """子から順に処理し、保持期間内の行・参照されている親は残す"""
+    (user,) = _add(session, User(email="purge@example.com", password_hash="x"))
+    removed, live = _add(
+        session,
+        Project(name="Removed", owner_id=user.id, deleted_at=OLD),
+        Project(name="Live", owner_id=user.id),
+    )
+    removed_sprint, referenced_sprint = _add(
+        session,
+        Sprint(name="Removed", project_id=removed.id, deleted_at=OLD),
+        Sprint(name="Referenced", project_id=live.id, deleted_at=OLD),
+    )
+    old_task, recent_task, active_task = _add(
+        session,
+        Task(
+            title="Old",
+            project_id=removed.id,
+            sprint_id=removed_sprint.id,
+            deleted_at=OLD,
+        ),
+        Task(title="Recent", project_id=live.id, deleted_at=RECENT),
+        Task(title="Active", project_id=live.id, sprint_id=referenced_sprint.id),
+    )
+    ids = {
+        "task": old_task.id,
+        "sprint": removed_sprint.id,
+        "project": removed.id,
+    }
+
+    results = purge_soft_deleted(session, retention_days=30, now=NOW)
+
+    assert _stats(results) == {
+        "task": (1, 1, 0),
+        "sprint": (1, 1, 0),
+        "project": (1, 1, 0),
+        "user": (0, 0, 0),
+    }
+    assert _ids(session, Task) == {recent_task.id, active_task.id}
+    assert _ids(session, Sprint) == {referenced_sprint.id}
+    assert _ids(session, Project) == {live.id}
+    archived = session.exec(select(ArchivedRecord)).all()
+    assert {a.source_table: a.record_id for a in archived} == ids
+    task_record = next(a for a in archived if a.source_table == "task")
+    assert task_record.data["title"] == "Old"
+    assert task_record.deleted_at == OLD
+
+
+def test_purge_archives_cascading_user_children(session: Session):
+    """user と一緒に消える PointsHistory・UserAchievement もアーカイブする"""
+    (user,) = _add(
+        session,
+        User(email="purge-points@example.com", password_hash="x", deleted_at=OLD),
+    )
+    (achievement,) = _add(
+        session, Achievement(key="purge_first", name="First", title="First")
+    )
+    history, unlocked = _add(
+        session,
+        PointsHistory(user_id=user.id, points=10, reason="task_completed"),
+        UserAchievement(user_id=user.id, achievement_id=achievement.id),
+    )
+    user_id, history_id, unlocked_id = user.id, history.id, unlocked.id
+
+    results = purge_soft_deleted(session, retention_days=30, now=NOW)
+
+    assert _stats(results)["user"] == (1, 1, 0)
+    assert user_id not in _ids(session, User)
+    archived = {
+        (a.source_table, a.record_id): a
+        for a in session.exec(select(ArchivedRecord)).all()
+    }
+    assert set(archived) == {
+        ("user", user_id),
+        ("pointshistory", history_id),
+        ("userachievement", unlocked_id),
+    }
+    history_record = archived[("pointshistory", history_id)]
+    assert history_record.data["points"] == 10
+    assert history_record.data["user_id"] == user_id
+    assert history_record.deleted_at == OLD
+
+
+def test_purge_delete_mode_in_bounded_batches(session: Session):
+    """バッチ数の上限を超えた分は次回の実行に残す"""
+    (user,) = _add(session, User(email="purge-batch@example.com", password_hash="x"))
+    (project,) = _add(session, Project(name="Batch", owner_id=user.id))
+    _add(
+        session,
+        *(Task(title=f"T{i}", project_id=project.id, deleted_at=OLD) for i in range(5)),
+    )
+
+    results = purge_soft_deleted(
+        session,
+        retention_days=30,
+        mode="delete",
+        batch_size=2,
+        max_batches=2,
+        now=NOW,
+    )
+
+    assert results[0].table == "task"
+    assert (results[0].purged, results[0].batches, results[0].pending) == (4, 2, 1)
+    assert len(_ids(session, Task)) == 1
+    assert session.exec(select(ArchivedRecord)).all() == []
+
+
+def test_purge_dry_run_only_counts(session: Session):
+    """ドライランでは件数を数えるだけで行は変更しない"""
+    (user,) = _add(session, User(email="purge-dry@example.com", password_hash="x"))
+    (project,) = _add(session, Project(name="Dry", owner_id=user.id))
+    _add(session, Task(title="Old", project_id=project.id, deleted_at=OLD))
+
+    results = purge_soft_deleted(session, retention_days=30, dry_run=True, now=NOW)
+
+    assert _stats(results)["task"] == (1, 0, 1)
+    assert len(_ids(session, Task)) == 1
+    assert session.exec(select(ArchivedRecord)).all() == []
+
+
+def test_purge_rejects_unknown_mode(session: Session):
+    with pytest.raises(ValueError, match="Invalid purge mode"):
+        purge_soft_deleted(session, retention_days=30, mode="truncate")
+
+
+def test_purge_task_is_scheduled_and_can_be_disabled(monkeypatch):
+    """beatで定期実行され、保持期間0では何もしない"""
+    schedule = celery_app.conf.beat_schedule["purge-soft-deleted"]
+    assert schedule["task"] == purge_soft_deleted_rows.name
+
+    monkeypatch.setattr("app.core.config.settings.PURGE_RETENTION_DAYS", 0)
+
+    assert purge_soft_deleted_rows.run() == {"status": "disabled"}
@@ -0,0 +1,59 @@
+"""AIワーカーのキュー構成と待ち時間の計測のテスト。"""
+
+import asyncio
+import time
+
+from app.celery_app import celery_app
+from app.tasks.queues import (
+    BULK_QUEUE,
+    INTERACTIVE_QUEUE,
+    fair_priority,
+    queue_for,
+    record_wait,
+    wait_stats,
+)
+
+
+def test_queue_for():
+    """バックグラウンド処理は専用のキューに入れる"""
+    assert queue_for(background=False) == INTERACTIVE_QUEUE
+    assert queue_for(background=True) == BULK_QUEUE
+
+
+def test_fair_priority_is_bounded():
+    """プロジェクトの実行中ジョブ数に応じて優先度を下げる（範囲内に収める）"""
+    assert [fair_priority(n) for n in (-1, 0, 1, 5, 9, 50)] == [0, 0, 1, 5, 9, 9]
+
+
+def test_celery_routes_to_priority_queues():
+    """両方のキューを処理し、ブローカーは優先度ごとのリストを使う"""
+    conf = celery_app.conf
+    assert {q.name for q in conf.task_queues} == {INTERACTIVE_QUEUE, BULK_QUEUE}
+    assert conf.task_default_queue == INTERACTIVE_QUEUE
+    assert conf.broker_transport_options["queue_order_strategy"] == "priority"
+
+
+def test_wait_stats_from_recorded_waits(redis_client):
+    """記録した待ち時間から分位点を計算する（キューごとに別集計）"""
+
+    async def scenario():
+        now = time.time()
+        for seconds in (0.1, 0.2, 0.3, 0.4):
+            await record_wait(BULK_QUEUE, now - seconds)
+        stats = await wait_stats(BULK_QUEUE)
+        assert stats["samples"] == 4
+        assert 100 <= stats["p50_ms"] <= stats["p95_ms"] <= stats["max_ms"]
+        assert stats["max_ms"] >= 400
+        assert (await wait_stats(INTERACTIVE_QUEUE))["samples"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_wait_stats_without_redis():
+    """Redis未接続の場合は記録せず、統計は空になる"""
+
+    async def scenario():
+        await record_wait(BULK_QUEUE, time.time())
+        assert (await wait_stats(BULK_QUEUE))["samples"] == 0
+
+    asyncio.run(scenario())
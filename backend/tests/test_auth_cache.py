@@ -0,0 +1,61 @@
+"""認証キャッシュ（トークン検証・ユーザー行）のテスト。"""
+
+from unittest.mock import patch
+
+from jose import jwt
+
+from app.core.security import create_access_token, decode_access_token
+from app.utils.ttl_cache import TTLCache
+
+
+def test_ttl_cache_expires_entries():
+    """有効期限切れのエントリは返さない"""
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=-1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """上限を超えると最も古く参照されたエントリから削除される"""
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_disabled():
+    """maxsize=0 では何もキャッシュしない"""
+    cache: TTLCache[str, int] = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_decode_access_token_is_cached():
+    """同じトークンの署名検証は1回だけ行う"""
+    token = create_access_token(subject=1, email="cache@example.com")
+
+    with patch("app.core.security.jwt.decode", wraps=jwt.decode) as mock_decode:
+        first = decode_access_token(token)
+        second = decode_access_token(token)
+
+    assert first == second
+    assert first["sub"] == "1"
+    assert mock_decode.call_count == 1
+
+
+def test_invalid_token_is_not_cached():
+    """不正なトークンはキャッシュせず毎回拒否する"""
+    with patch("app.core.security.jwt.decode", wraps=jwt.decode) as mock_decode:
+        assert decode_access_token("invalid.token.value") is None
+        assert decode_access_token("invalid.token.value") is None
+
+    assert mock_decode.call_count == 2
@@ -0,0 +1,102 @@
+"""ログ出力の設定のテスト。"""
+
+import json
+import logging
+import queue
+import sys
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.core.logging_config import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    parse_sample_rates,
+    setup_logging,
+    stop_logging,
+)
+
+
+def _record(name: str, level: int = logging.INFO, msg: str = "hello", args=None):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates("") == {}
+    assert parse_sample_rates("sqlalchemy.engine=0.1, uvicorn.access=1") == {
+        "sqlalchemy.engine": 0.1,
+        "uvicorn.access": 1.0,
+    }
+    with pytest.raises(ValueError, match="Invalid"):
+        parse_sample_rates("sqlalchemy.engine")
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        parse_sample_rates("sqlalchemy.engine=2")
+
+
+def test_sampling_filter_keeps_configured_ratio():
+    """一致したロガーは割合どおりに間引き、WARNING以上と他のロガーは残す"""
+    sampler = SamplingFilter({"sqlalchemy.engine": 0.1, "sqlalchemy.engine.x": 0})
+
+    kept = [sampler.filter(_record("sqlalchemy.engine.Engine")) for _ in range(100)]
+    assert sum(kept) == 10
+    assert kept[0]
+    assert not any(sampler.filter(_record("sqlalchemy.engine.x")) for _ in range(5))
+    assert sampler.filter(_record("sqlalchemy.engine.x", logging.WARNING))
+    assert sampler.filter(_record("sqlalchemy.engineering"))
+    assert sampler.filter(_record("app.main"))
+
+
+def test_json_formatter_includes_extra_and_exception():
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger = logging.getLogger("test.json")
+        record = logger.makeRecord(
+            "test.json",
+            logging.ERROR,
+            __file__,
+            1,
+            "failed %s",
+            ("job-1",),
+            sys.exc_info(),
+            extra={"job_id": "job-1"},
+        )
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["level"] == "ERROR"
+    assert entry["logger"] == "test.json"
+    assert entry["message"] == "failed job-1"
+    assert entry["job_id"] == "job-1"
+    assert "RuntimeError: boom" in entry["exc_info"]
+
+
+def test_queue_handler_drops_records_when_full():
+    """キューが満杯の間は待たずに捨て、件数を数える"""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    before = REGISTRY.get_sample_value("log_records_dropped_total") or 0.0
+
+    handler.handle(_record("app", msg="a %s", args=("1",)))
+    handler.handle(_record("app", msg="b"))
+
+    assert handler.queue.get_nowait().msg == "a 1"
+    assert REGISTRY.get_sample_value("log_records_dropped_total") == before + 1
+
+
+def test_setup_logging_writes_json_lines_through_listener(tmp_path, monkeypatch):
+    """ロガーへの出力は専用スレッドでファイルに書き出される"""
+    log_file = tmp_path / "server.log"
+    monkeypatch.setattr(settings, "LOG_FILE", str(log_file))
+    monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+    try:
+        setup_logging()
+        logging.getLogger("app.test").info("queued %d", 1)
+        stop_logging()
+
+        lines = log_file.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["message"] for line in lines] == ["queued 1"]
+    finally:
+        monkeypatch.undo()
+        setup_logging()
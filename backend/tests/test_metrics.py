@@ -0,0 +1,87 @@
+"""Prometheusメトリクスのテスト。"""
+
+import asyncio
+
+import fakeredis
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlmodel import Session, create_engine, text
+
+from app.core.metrics import RequestDbStats, request_db_stats
+from app.core.redis import _MeteredAsyncCommandsMixin
+from app.db.query_metrics import instrument_engine
+from tests.factories import ProjectFactory
+
+
+def _sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint_labels_requests_by_route_template(
+    client: TestClient, auth_headers: dict, session: Session
+):
+    """リクエストはパスではなくルートのテンプレートで集計される"""
+    project = ProjectFactory(owner__email="metrics@example.com")
+    labels = {"method": "GET", "route": "/api/projects/{project_id}", "status": "403"}
+    before = _sample("http_request_duration_seconds_count", labels)
+
+    client.get(f"/api/projects/{project.id}", headers=auth_headers)
+    client.get("/no-such-path")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert _sample("http_request_duration_seconds_count", labels) == before + 1
+    assert 'route="<unmatched>",status="404"' in response.text
+    assert "http_requests_in_progress" in response.text
+
+
+def test_instrumented_engine_counts_queries_per_request():
+    """クエリの所要時間をエンジンごと・リクエストごとに記録する"""
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, "test")
+    before = _sample("db_query_duration_seconds_count", {"engine": "test"})
+
+    stats = RequestDbStats()
+    token = request_db_stats.set(stats)
+    try:
+        with Session(engine) as session:
+            session.exec(text("SELECT 1"))
+            session.exec(text("SELECT 2"))
+    finally:
+        request_db_stats.reset(token)
+
+    assert stats.queries == 2
+    assert stats.seconds > 0
+    assert _sample("db_query_duration_seconds_count", {"engine": "test"}) == before + 2
+
+
+class _MeteredFakeRedis(_MeteredAsyncCommandsMixin, fakeredis.FakeAsyncRedis):
+    pass
+
+
+def test_metered_redis_records_command_latency():
+    """コマンドごと（パイプラインは PIPELINE）にレイテンシを記録する"""
+    client = _MeteredFakeRedis(decode_responses=True)
+    before_set = _sample("redis_command_duration_seconds_count", {"command": "SET"})
+    before_pipe = _sample(
+        "redis_command_duration_seconds_count", {"command": "PIPELINE"}
+    )
+
+    async def scenario():
+        await client.set("k", "v")
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.get("k")
+            pipe.incr("n")
+            assert await pipe.execute() == ["v", 1]
+
+    asyncio.run(scenario())
+
+    assert (
+        _sample("redis_command_duration_seconds_count", {"command": "SET"})
+        == before_set + 1
+    )
+    assert (
+        _sample("redis_command_duration_seconds_count", {"command": "PIPELINE"})
+        == before_pipe + 1
+    )
@@ -0,0 +1,46 @@
+"""パスワードハッシュ用エグゼキューターのテスト。"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.core.exceptions import ServiceUnavailableException
+from app.core.password_hasher import PasswordHasher
+
+
+def test_run_records_metrics():
+    """実行結果を返し、完了件数と待ち行列の深さを記録する"""
+    hasher = PasswordHasher(workers=1, max_queue=1)
+
+    result = asyncio.run(hasher.run(lambda x: x * 2, 21))
+
+    stats = hasher.snapshot()
+    assert result == 42
+    assert stats["submitted"] == 1
+    assert stats["completed"] == 1
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+    assert stats["queued_peak"] == 1
+
+
+def test_run_rejects_when_queue_is_full():
+    """ワーカーと待ち行列が埋まっている場合は即座に拒否する"""
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(hasher.run(release.wait))
+        waiting = asyncio.ensure_future(hasher.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ServiceUnavailableException):
+            await hasher.run(release.wait)
+        assert hasher.snapshot()["queued"] == 1
+        release.set()
+        await asyncio.gather(running, waiting)
+
+    asyncio.run(scenario())
+
+    stats = hasher.snapshot()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
@@ -0,0 +1,63 @@
+"""コネクションプールメトリクスのテスト。"""
+
+import threading
+
+from sqlmodel import create_engine
+
+from app.db.pool_metrics import MeteredQueuePool, PoolMetrics
+
+
+def _create_engine(tmp_path, metrics: PoolMetrics):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MeteredQueuePool,
+        pool_size=1,
+        max_overflow=metrics.max_overflow,
+        connect_args={"check_same_thread": False},
+    )
+    engine.pool.metrics = metrics
+    return engine
+
+
+def test_checkout_is_recorded(tmp_path):
+    """チェックアウトが記録される"""
+    metrics = PoolMetrics(name="test")
+    engine = _create_engine(tmp_path, metrics)
+
+    with engine.connect():
+        pass
+
+    stats = metrics.snapshot(engine.pool)
+    assert stats["checkouts"] == 1
+    assert stats["waits"] == 0
+    assert stats["checked_out"] == 0
+
+
+def test_saturated_pool_counts_wait(tmp_path):
+    """プール枯渇時のチェックアウトは待機として記録される"""
+    metrics = PoolMetrics(name="test")
+    engine = _create_engine(tmp_path, metrics)
+
+    held = engine.connect()
+    threading.Timer(0.1, held.close).start()
+    with engine.connect():
+        pass
+
+    stats = metrics.snapshot(engine.pool)
+    assert stats["checkouts"] == 2
+    assert stats["waits"] == 1
+    assert stats["checkout_seconds_max"] >= 0.05
+
+
+def test_overflow_peak(tmp_path):
+    """オーバーフロー使用量のピークが記録される"""
+    metrics = PoolMetrics(name="test", max_overflow=2)
+    engine = _create_engine(tmp_path, metrics)
+
+    connections = [engine.connect() for _ in range(3)]
+    for connection in connections:
+        connection.close()
+
+    stats = metrics.snapshot(engine.pool)
+    assert stats["overflow_peak"] == 2
+    assert stats["waits"] == 0
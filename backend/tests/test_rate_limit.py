@@ -0,0 +1,93 @@
+"""Redisのトークンバケットによるレート制限のテスト。"""
+
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.error_handlers import register_error_handlers
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.middleware.rate_limit import RateLimit, RateLimitPolicy
+
+
+def _app(rate: str) -> TestClient:
+    app = FastAPI()
+    register_error_handlers(app)
+
+    @app.get("/limited", dependencies=[Depends(RateLimit("test", rate))])
+    def limited():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def _auth(user_id: int) -> dict:
+    token = create_access_token(subject=user_id, email=f"user{user_id}@example.com")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_parse_policy():
+    """ "回数/期間" 形式を解釈する"""
+    assert RateLimitPolicy.parse("p", "10/minute") == RateLimitPolicy("p", 10, 60)
+    assert RateLimitPolicy.parse("p", "5/hours").period == 3600
+    for invalid in ("10", "0/minute", "ten/minute", "10/fortnight"):
+        with pytest.raises(ValueError, match="Invalid rate limit"):
+            RateLimitPolicy.parse("p", invalid)
+
+
+def test_limits_per_user(redis_client):
+    """認証済みのリクエストはユーザーごとに上限を数える"""
+    client = _app("2/minute")
+
+    first = client.get("/limited", headers=_auth(1))
+    assert first.status_code == 200
+    assert first.headers["X-RateLimit-Limit"] == "2"
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    assert client.get("/limited", headers=_auth(1)).status_code == 200
+
+    denied = client.get("/limited", headers=_auth(1))
+    assert denied.status_code == 429
+    assert int(denied.headers["Retry-After"]) >= 1
+    assert denied.json()["error"]["type"] == "RateLimitExceededException"
+
+    # 別ユーザー・未認証（IPアドレス単位）は別のバケット
+    assert client.get("/limited", headers=_auth(2)).status_code == 200
+    assert client.get("/limited").status_code == 200
+
+
+def test_tokens_refill(redis_client):
+    """期間に応じてトークンが補充される"""
+    client = _app("10/second")
+    statuses = [client.get("/limited").status_code for _ in range(11)]
+    assert statuses[-1] == 429
+
+    time.sleep(0.25)
+    assert client.get("/limited").status_code == 200
+
+
+def test_allows_without_redis():
+    """Redis未接続時は制限しない"""
+    client = _app("1/minute")
+    assert [client.get("/limited").status_code for _ in range(3)] == [200] * 3
+
+
+def test_disabled(redis_client, monkeypatch):
+    """RATE_LIMIT_ENABLED=False の場合は制限しない"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    client = _app("1/minute")
+    assert [client.get("/limited").status_code for _ in range(3)] == [200] * 3
+
+
+def test_login_policy(client: TestClient, redis_client):
+    """ログインはIPアドレスごとに RATE_LIMIT_LOGIN 回まで"""
+    body = {"email": "nobody@example.com", "password": "wrong-password"}
+    limit = RateLimitPolicy.parse("auth:login", settings.RATE_LIMIT_LOGIN).limit
+
+    statuses = [
+        client.post("/api/auth/login", json=body).status_code for _ in range(limit + 1)
+    ]
+
+    assert statuses[:limit] == [401] * limit
+    assert statuses[limit] == 429
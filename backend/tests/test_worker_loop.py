@@ -0,0 +1,117 @@
+"""Celeryワーカーの永続イベントループのテスト"""
+
+import asyncio
+import signal
+import threading
+
+import pytest
+from celery.exceptions import SoftTimeLimitExceeded
+
+from app.core.redis import get_redis_client
+from app.tasks.event_loop import close_worker_loops, get_worker_loop, run_async
+
+
+async def _current_loop():
+    return asyncio.get_running_loop()
+
+
+async def _redis_client():
+    return get_redis_client()
+
+
+def test_run_async_reuses_loop():
+    """同じスレッドでは同じループで実行される"""
+    try:
+        first = run_async(_current_loop())
+        second = run_async(_current_loop())
+        assert first is second
+        assert not first.is_closed()
+    finally:
+        close_worker_loops()
+
+
+def test_loop_per_thread():
+    """スレッドごとに別のループを使う"""
+    loops = []
+    try:
+        loops.append(run_async(_current_loop()))
+        thread = threading.Thread(target=lambda: loops.append(get_worker_loop()))
+        thread.start()
+        thread.join()
+        assert loops[0] is not loops[1]
+    finally:
+        close_worker_loops()
+
+
+def test_close_worker_loops_recreates_loop():
+    """後片付け後は新しいループが作成される"""
+    loop = get_worker_loop()
+    close_worker_loops()
+    assert loop.is_closed()
+    try:
+        assert run_async(_current_loop()) is not loop
+    finally:
+        close_worker_loops()
+
+
+def test_redis_client_without_prefork_init():
+    """solo・threadsプールでもループごとの非同期Redisクライアントが用意される"""
+    assert get_redis_client() is None
+    clients = []
+    try:
+        clients.append(run_async(_redis_client()))
+        clients.append(run_async(_redis_client()))
+        thread = threading.Thread(
+            target=lambda: clients.append(run_async(_redis_client()))
+        )
+        thread.start()
+        thread.join()
+
+        assert clients[0] is not None
+        # 同じループでは同じクライアント、別スレッドのループでは別のクライアント
+        assert clients[1] is clients[0]
+        assert clients[2] is not None
+        assert clients[2] is not clients[0]
+    finally:
+        close_worker_loops()
+
+    # 後片付け後のループでは新しいクライアントが作成される
+    try:
+        assert run_async(_redis_client()) not in clients
+    finally:
+        close_worker_loops()
+
+
+def test_shared_redis_client_takes_precedence(redis_client):
+    """プロセス共有のクライアントがある場合はそちらを使う"""
+    try:
+        assert run_async(_redis_client()) is redis_client
+    finally:
+        close_worker_loops()
+
+
+def test_interrupted_run_async_leaves_no_pending_task():
+    """ソフトタイムリミットで中断された場合、タスクをループに残さない"""
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    def interrupt(signum, frame):
+        raise SoftTimeLimitExceeded()
+
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    try:
+        signal.setitimer(signal.ITIMER_REAL, 0.05)
+        with pytest.raises(SoftTimeLimitExceeded):
+            run_async(work())
+        assert cancelled == [True]
+        assert asyncio.all_tasks(get_worker_loop()) == set()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        close_worker_loops()